@@ -468,14 +468,8 @@ class CharacterAdmin(EntityAdmin):
         if "duplicate" in request.POST:
             form = DuplicateCharacterForm(request.POST)
             if form.is_valid():
-                name = form.cleaned_data["name"]
-                count = form.cleaned_data["count"]
-                campaign = form.cleaned_data["campaign"]
                 for character in queryset.order_by("name", "title"):
-                    character_name = character.name
-                    for nb in range(count):
-                        new_name = f"{name or character_name} {nb + 1}" if count > 1 else name
-                        character.duplicate(name=new_name, campaign=campaign)
+                    character.spawn(**form.cleaned_data)
                 self.message_user(
                     request,
                     message=_("Les personnages sélectionnés ont été dupliqués."),
@@ -1582,6 +1576,7 @@ class DamageHistoryAdmin(CommonAdmin):
                     "damage_resistance",
                     "real_damage",
                     "damage_rate",
+                    "ticks",
                 ),
                 classes=("wide",),
             ),
@@ -12,9 +12,12 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.generics import get_object_or_404
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from fallout.constants import *  # noqa
 from fallout.enums import *  # noqa
 from fallout.models import *  # noqa
+from fallout.simulation import EncounterSimulation
 
 # Désactive les listes déroulantes sur les champs de relations
 disable_relation_fields(*MODELS)
@@ -22,6 +25,64 @@ disable_relation_fields(*MODELS)
 # Création des APIs REST standard pour les modèles de cette application
 router, all_serializers, all_viewsets = create_api(*MODELS)
 
+
+def api_view_with_deferred_stats(*args, **kwargs):
+    """
+    Décorateur d'API identique à api_view_with_serializer qui diffère l'écriture des statistiques
+    et des personnages recalculés jusqu'à la fin de la requête
+    """
+
+    def decorator(func):
+        return api_view_with_serializer(*args, **kwargs)(StatsUnitOfWork()(func))
+
+    return decorator
+
+
+class ManyCharacterRelatedField(serializers.ManyRelatedField):
+    """
+    Champ de relation multiple vers des personnages qui les charge tous en une seule requête
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        child = self.child_relation
+        try:
+            pks = [int(pk) for pk in data]
+        except (TypeError, ValueError):
+            child.fail("incorrect_type", data_type=type(data).__name__)
+        characters = Character.get_targets(pks, queryset=child.get_queryset())
+        for pk in pks:
+            if pk not in characters:
+                child.fail("does_not_exist", pk_value=pk)
+        return [characters[pk] for pk in pks]
+
+
+class CharacterRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Champ de relation vers un personnage qui réutilise les personnages préchargés par le serializer parent
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManyCharacterRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        # Characters are preloaded by the parent serializer from the same restricted queryset
+        characters = self.context.get("characters") or {}
+        try:
+            character = characters.get(int(data))
+        except (TypeError, ValueError):
+            character = None
+        return character or super().to_internal_value(data)
+
+
 # Serializer sans statistiques pour le personnage
 BaseCharacterSerializer = create_model_serializer(Character, exclude=tuple(LIST_EDITABLE_STATS))
 
@@ -64,7 +125,7 @@ class RecursiveField(serializers.Serializer):
         return serializer.data
 
 
-@api_view_with_serializer(["POST"])
+@api_view_with_deferred_stats(["POST"])
 def campaign_clear_loot(request, campaign_id):
     """
     API pour supprimer tous les butins de la campagne
@@ -125,7 +186,7 @@ class RollHistorySerializer(HistorySerializer):
     character = SimpleCharacterSerializer(read_only=True, label=_("personnage"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=CampaignRollInputSerializer,
     serializer=RollHistorySerializer,
@@ -139,7 +200,7 @@ def campaign_roll(request, campaign_id):
     filters.update(is_active=True)
     if group:
         filters.update(is_player=(group == 1))
-    characters = Character.objects.select_related("campaign", "statistics").filter(**filters)
+    characters = Character.objects.with_combat().filter(**filters)
     any(is_authorized(request, character.campaign) for character in characters)
     try:
         return [character.roll(**request.validated_data) for character in characters]
@@ -166,7 +227,7 @@ class CampaignEffectSerializer(CommonModelSerializer):
     damages = create_model_serializer(DamageHistory)(read_only=True, many=True, label=_("dégâts"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=EffectAffectInputSerializer,
     serializer=CampaignEffectSerializer,
@@ -200,7 +261,7 @@ class ExperienceSerializer(SimpleCharacterSerializer):
     level_up = serializers.BooleanField()
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=ExperienceInputSerializer,
     serializer=ExperienceSerializer,
@@ -218,7 +279,7 @@ def character_xp(request, character_id):
         raise ValidationError(str(exception))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=RollInputSerializer,
     serializer=RollHistorySerializer,
@@ -240,7 +301,7 @@ class BaseFightInputSerializer(BaseCustomSerializer):
     Serializer d'entrée de base pour les attaques
     """
 
-    target = serializers.PrimaryKeyRelatedField(queryset=Character.objects.order_by("name"), label=_("cible"))
+    target = CharacterRelatedField(queryset=Character.objects.order_by("name"), label=_("cible"))
     target_range = serializers.IntegerField(initial=1, required=False, label=_("distance"))
 
     def __init__(self, *args, **kwargs):
@@ -359,6 +420,18 @@ class BurstInputSerializer(BaseCustomSerializer):
     )
     reason = serializers.CharField(required=False, allow_blank=True, label=_("raison"))
 
+    def to_internal_value(self, data):
+        """
+        Charge l'ensemble des cibles en une seule requête avant la validation de chacune d'elles
+        """
+        targets = data.get("targets") if hasattr(data, "get") else None
+        if isinstance(targets, (list, tuple)):
+            target_field = self.fields["targets"].child.fields["target"]
+            pks = [target.get("target") for target in targets if hasattr(target, "get")]
+            pks = [pk for pk in pks if isinstance(pk, int) or (isinstance(pk, str) and pk.isdigit())]
+            self.context["characters"] = Character.get_targets(pks, queryset=target_field.get_queryset())
+        return super().to_internal_value(data)
+
 
 @to_model_serializer(FightHistory)
 class FightHistorySerializer(HistorySerializer):
@@ -372,7 +445,7 @@ class FightHistorySerializer(HistorySerializer):
     fail = RecursiveField(read_only=True)
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=FightInputSerializer,
     serializer=FightHistorySerializer,
@@ -389,7 +462,7 @@ def character_fight(request, character_id):
         raise ValidationError(str(exception))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=BurstInputSerializer,
     serializer=FightHistorySerializer,
@@ -467,7 +540,7 @@ class MultiDamageInputSerializer(DamageInputSerializer):
     Serializer d'entrée pour infliger des dégâts à de multiples personnages
     """
 
-    characters = serializers.PrimaryKeyRelatedField(
+    characters = CharacterRelatedField(
         queryset=Character.objects.order_by("name"),
         many=True,
         label=_("personnages"),
@@ -496,7 +569,7 @@ class DamageHistorySerializer(HistorySerializer):
     is_heal = serializers.ReadOnlyField()
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=MultiDamageInputSerializer,
     serializer=DamageHistorySerializer,
@@ -505,9 +578,7 @@ def campaign_damage(request, campaign_id):
     """
     API permettant d'infliger des dégâts à plusieurs personnages de la campagne
     """
-    characters = Character.objects.select_related("campaign", "statistics").filter(
-        pk__in=request.validated_data.pop("characters", [])
-    )
+    characters = list(dict.fromkeys(request.validated_data.pop("characters", [])))
     any(is_authorized(request, character.campaign) for character in characters)
     try:
         return [character.damage(**request.validated_data) for character in characters]
@@ -515,7 +586,107 @@ def campaign_damage(request, campaign_id):
         raise ValidationError(str(exception))
 
 
-@api_view_with_serializer(
+class EncounterInputSerializer(BaseCustomSerializer):
+    """
+    Serializer d'entrée pour la simulation d'une bataille entre deux groupes de personnages
+    """
+
+    attackers = CharacterRelatedField(
+        queryset=Character.objects.order_by("name"),
+        many=True,
+        label=_("attaquants"),
+    )
+    defenders = CharacterRelatedField(
+        queryset=Character.objects.order_by("name"),
+        many=True,
+        label=_("défenseurs"),
+    )
+    target_range = serializers.IntegerField(
+        initial=1,
+        min_value=0,
+        required=False,
+        label=_("distance"),
+    )
+    target_policy = serializers.ChoiceField(
+        initial=TARGET_POLICY_WEAKEST,
+        choices=TARGET_POLICIES,
+        required=False,
+        label=_("choix de la cible"),
+    )
+    max_rounds = serializers.IntegerField(
+        initial=ENCOUNTER_MAX_ROUNDS,
+        min_value=1,
+        max_value=ENCOUNTER_MAX_ROUNDS,
+        required=False,
+        label=_("tours max."),
+    )
+    hit_chance_modifier = serializers.IntegerField(
+        initial=0,
+        required=False,
+        label=_("modificateur"),
+    )
+    count = serializers.IntegerField(
+        initial=ENCOUNTER_COUNT,
+        min_value=1,
+        max_value=ENCOUNTER_API_MAX_COUNT,
+        required=False,
+        label=_("nombre"),
+    )
+    seed = serializers.IntegerField(
+        allow_null=True,
+        required=False,
+        label=_("graine"),
+    )
+
+
+class EncounterGroupSerializer(BaseCustomSerializer):
+    """
+    Serializer des résultats d'un groupe de personnages lors d'une simulation de bataille
+    """
+
+    win_chance = serializers.FloatField(label=_("chances de victoire"))
+    casualties = serializers.FloatField(label=_("pertes"))
+    ammo = serializers.FloatField(label=_("munitions"))
+    characters = serializers.DictField(child=serializers.DictField(), label=_("personnages"))
+
+
+class EncounterSerializer(BaseCustomSerializer):
+    """
+    Serializer des résultats d'une simulation de bataille
+    """
+
+    count = serializers.IntegerField(label=_("nombre"))
+    draw_chance = serializers.FloatField(label=_("chances d'égalité"))
+    rounds = serializers.FloatField(label=_("tours"))
+    attackers = EncounterGroupSerializer(label=_("attaquants"))
+    defenders = EncounterGroupSerializer(label=_("défenseurs"))
+
+
+@api_view_with_deferred_stats(
+    ["POST"],
+    input_serializer=EncounterInputSerializer,
+    serializer=EncounterSerializer,
+)
+def campaign_encounter(request, campaign_id):
+    """
+    API permettant de simuler l'issue d'une bataille entre deux groupes de personnages de la campagne
+    """
+    campaign = get_object_or_404(Campaign, pk=campaign_id)
+    is_authorized(request, campaign)
+    count = min(request.validated_data.pop("count", ENCOUNTER_COUNT), ENCOUNTER_API_MAX_COUNT)
+    seed = request.validated_data.pop("seed", None)
+    characters = request.validated_data["attackers"] + request.validated_data["defenders"]
+    if any(character.campaign_id != campaign.pk for character in characters):
+        raise ValidationError(_("Tous les personnages doivent appartenir à la campagne."))
+    try:
+        # Battles are simulated in the request process (forking a pool would duplicate its open connections),
+        # their number is bounded to keep the request short
+        return EncounterSimulation(**request.validated_data).run(count, seed=seed, workers=1)
+    except Exception as exception:
+        raise ValidationError(str(exception))
+
+
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=DamageInputSerializer,
     serializer=DamageHistorySerializer,
@@ -568,7 +739,7 @@ class CharacterCopyInputSerializer(BaseCustomSerializer):
     )
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=CharacterCopyInputSerializer,
     serializer=SimpleCharacterSerializer,
@@ -593,6 +764,62 @@ def character_copy(request, character_id):
         raise ValidationError(str(exception))
 
 
+class CharacterSpawnInputSerializer(CharacterCopyInputSerializer):
+    """
+    Serializer d'entrée pour la création en masse de copies d'un personnage
+    """
+
+    name = serializers.CharField(
+        allow_blank=True,
+        required=False,
+        label=_("nom"),
+        help_text=_("{number} est remplacé par le numéro de la copie."),
+    )
+    count = serializers.IntegerField(
+        initial=1,
+        min_value=1,
+        max_value=500,
+        required=False,
+        label=_("nombre"),
+    )
+    points = serializers.IntegerField(
+        initial=0,
+        min_value=0,
+        required=False,
+        label=_("points du S.P.E.C.I.A.L."),
+    )
+    level = serializers.IntegerField(
+        initial=0,
+        min_value=0,
+        required=False,
+        label=_("niveau"),
+    )
+    balance = serializers.IntegerField(
+        initial=0,
+        min_value=0,
+        max_value=100,
+        required=False,
+        label=_("balance"),
+    )
+
+
+@api_view_with_deferred_stats(
+    ["POST"],
+    input_serializer=CharacterSpawnInputSerializer,
+    serializer=SimpleCharacterSerializer,
+)
+def character_spawn(request, character_id):
+    """
+    API permettant de créer en masse des copies d'un personnage dans une campagne
+    """
+    character = get_object_or_404(Character, pk=character_id)
+    is_authorized(request, request.validated_data.get("campaign"))
+    try:
+        return character.spawn(**request.validated_data)
+    except Exception as exception:
+        raise ValidationError(str(exception))
+
+
 class CharacterRandomizeSpecialSerializer(BaseCustomSerializer):
     """
     Serializer d'entrée pour la génération aléatoire du S.P.E.C.I.A.L.
@@ -601,7 +828,7 @@ class CharacterRandomizeSpecialSerializer(BaseCustomSerializer):
     points = serializers.IntegerField(initial=40, min_value=1, label=_("points"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=CharacterRandomizeSpecialSerializer,
     serializer=SimpleCharacterSerializer,
@@ -629,7 +856,7 @@ class CharacterRandomizeStatsSerializer(BaseCustomSerializer):
     reset = serializers.BooleanField(initial=False, required=False, label=_("reset ?"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=CharacterRandomizeStatsSerializer,
     serializer=SimpleCharacterSerializer,
@@ -658,7 +885,7 @@ class CharacterEffectSerializer(CommonModelSerializer):
     damages = create_model_serializer(DamageHistory)(read_only=True, many=True, label=_("dégâts"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=EffectAffectInputSerializer,
     serializer=CharacterEffectSerializer,
@@ -696,7 +923,7 @@ class ItemGiveInputSerializer(BaseCustomSerializer):
     condition = serializers.IntegerField(initial=100, required=False, label=_("état"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=ItemGiveInputSerializer,
     serializer=EquipmentSerializer,
@@ -722,7 +949,7 @@ class ActionInputSerializer(BaseCustomSerializer):
     is_action = serializers.BooleanField(initial=False, required=False, label=_("action ?"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=ActionInputSerializer,
     serializer=EquipmentSerializer,
@@ -757,7 +984,7 @@ class EquipmentUseSerializer(BaseCustomSerializer):
     modifiers = ItemModifierSerializer(read_only=True, many=True, label=_("modificateurs"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=ActionInputSerializer,
     serializer=EquipmentUseSerializer,
@@ -775,7 +1002,7 @@ def equipment_use(request, equipment_id):
         raise ValidationError(str(exception))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=ActionInputSerializer,
     serializer=EquipmentSerializer,
@@ -810,7 +1037,7 @@ class LootItemSerializer(CommonModelSerializer):
     item = create_model_serializer(Item)(read_only=True, label=_("objet"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=ActionWithQuantityInputSerializer,
     serializer=LootItemSerializer,
@@ -849,7 +1076,7 @@ class LootTakeInputSerializer(ActionInputSerializer):
             character_field.queryset = character_field.queryset.filter(campaign__loots=loot_id)
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=LootTakeInputSerializer,
     serializer=EquipmentSerializer,
@@ -893,7 +1120,7 @@ class LootSerializer(BaseCustomSerializer):
     loots = LootItemSerializer(many=True, read_only=True, label=_("butins"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=LootTemplateOpenInputSerializer,
     serializer=LootSerializer,
@@ -932,7 +1159,7 @@ class NextTurnSerializer(BaseCustomSerializer):
     damages = DamageHistorySerializer(read_only=True, many=True, label=_("dégâts"))
 
 
-@api_view_with_serializer(
+@api_view_with_deferred_stats(
     ["POST"],
     input_serializer=NextTurnInputSerializer,
     serializer=NextTurnSerializer,
@@ -999,6 +1226,11 @@ urlpatterns = [
         campaign_damage,
         name="campaign_damage",
     ),
+    path(
+        "campaign/<int:campaign_id>/encounter/",
+        campaign_encounter,
+        name="campaign_encounter",
+    ),
     path(
         "campaign/<int:campaign_id>/effect/",
         campaign_effect,
@@ -1034,6 +1266,11 @@ urlpatterns = [
         character_copy,
         name="character_copy",
     ),
+    path(
+        "character/<int:character_id>/spawn/",
+        character_spawn,
+        name="character_spawn",
+    ),
     path(
         "character/<int:character_id>/random_special/",
         character_randomize_special,
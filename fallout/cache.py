@@ -0,0 +1,173 @@
+# coding: utf-8
+from collections import OrderedDict
+from threading import RLock
+from time import monotonic, time_ns
+from typing import Any, Hashable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class StatsCache:
+    """
+    Cache des statistiques calculées des personnages
+    Combine un cache local borné (LRU avec durée de vie) et le cache partagé de Django (Redis en production),
+    l'invalidation entre les processus se fait grâce à un numéro de version par personnage
+    et par groupe (campagne) pour invalider toutes les entrées d'un groupe en une seule opération
+    Une entrée locale dont la version vient d'être vérifiée est servie sans interroger le cache partagé
+    pendant un court délai (les invalidations faites par le processus lui-même sont immédiates)
+    """
+
+    def __init__(
+        self,
+        alias: Optional[str] = None,
+        size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        check: Optional[float] = None,
+        prefix: str = "fallout:stats",
+    ):
+        """
+        Initialisation du cache
+        :param alias: Alias du cache partagé de Django
+        :param size: Nombre maximum d'entrées dans le cache local
+        :param timeout: Durée de vie (en secondes) des entrées
+        :param check: Délai (en secondes) avant de revérifier la version d'une entrée locale dans le cache partagé
+        :param prefix: Préfixe des clés dans le cache partagé
+        """
+        self.alias = alias or getattr(settings, "STATS_CACHE_ALIAS", "default")
+        self.size = size or getattr(settings, "STATS_CACHE_SIZE", 1000)
+        self.timeout = timeout or getattr(settings, "STATS_CACHE_TIMEOUT", 3600)
+        self.check = getattr(settings, "STATS_CACHE_CHECK", 2.0) if check is None else check
+        self.prefix = prefix
+        self.local: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = RLock()
+
+    @property
+    def cache(self):
+        """
+        Cache partagé de Django
+        """
+        return caches[self.alias]
+
+    def get_key(self, key: Hashable, version: str) -> str:
+        return f"{self.prefix}:{key}:{version}"
+
+    def get_version_key(self, key: Hashable) -> str:
+        return f"{self.prefix}:version:{key}"
+
+    def get_group_version_key(self, group: Hashable) -> str:
+        return f"{self.prefix}:group:{group}"
+
+    def get_version(self, key: Hashable, group: Optional[Hashable] = None) -> str:
+        """
+        Récupère la version courante d'une entrée (et de son groupe) depuis le cache partagé
+        :param key: Clé
+        :param group: Groupe de l'entrée (optionnel)
+        :return: Version
+        """
+        version_keys = [self.get_version_key(key)]
+        if group is not None:
+            version_keys.append(self.get_group_version_key(group))
+        versions = self.cache.get_many(version_keys)
+        for version_key in version_keys:
+            if versions.get(version_key) is None:
+                # A missing version must never match an entry stored before its eviction
+                self.cache.add(version_key, time_ns(), None)
+                versions[version_key] = self.cache.get(version_key) or 0
+        return ".".join(str(versions[version_key]) for version_key in version_keys)
+
+    def get(self, key: Hashable, default: Any = None, group: Optional[Hashable] = None) -> Any:
+        """
+        Récupère une entrée du cache si elle est toujours valide
+        :param key: Clé
+        :param default: Valeur par défaut
+        :param group: Groupe de l'entrée (optionnel)
+        :return: Valeur
+        """
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None:
+                entry_version, entry_group, expiration, checked, value = entry
+                # Recently checked entries are served without any round trip to the shared cache
+                if entry_group == group and min(expiration, checked) > monotonic():
+                    self.local.move_to_end(key)
+                    return value
+        version = self.get_version(key, group)
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None:
+                entry_version, entry_group, expiration, checked, value = entry
+                if entry_version == version and entry_group == group and expiration > monotonic():
+                    self.local[key] = (entry_version, entry_group, expiration, monotonic() + self.check, value)
+                    self.local.move_to_end(key)
+                    return value
+                del self.local[key]
+        value = self.cache.get(self.get_key(key, version))
+        if value is None:
+            return default
+        self._set_local(key, version, group, value)
+        return value
+
+    def set(self, key: Hashable, value: Any, group: Optional[Hashable] = None) -> None:
+        """
+        Ajoute ou remplace une entrée dans le cache
+        :param key: Clé
+        :param value: Valeur
+        :param group: Groupe de l'entrée (optionnel)
+        :return: Rien
+        """
+        version = self.get_version(key, group)
+        self.cache.set(self.get_key(key, version), value, self.timeout)
+        self._set_local(key, version, group, value)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        Invalide une ou plusieurs entrées pour l'ensemble des processus
+        :param keys: Clés
+        :return: Rien
+        """
+        for key in keys:
+            with self.lock:
+                self.local.pop(key, None)
+            self._incr_version(self.get_version_key(key))
+
+    def invalidate_group(self, *groups: Hashable) -> None:
+        """
+        Invalide toutes les entrées d'un ou plusieurs groupes pour l'ensemble des processus
+        (les entrées locales des autres processus sont écartées à leur prochaine vérification)
+        :param groups: Groupes
+        :return: Rien
+        """
+        with self.lock:
+            for key in [key for key, entry in self.local.items() if entry[1] in groups]:
+                del self.local[key]
+        for group in groups:
+            self._incr_version(self.get_group_version_key(group))
+
+    def clear(self) -> None:
+        """
+        Vide le cache local du processus
+        :return: Rien
+        """
+        with self.lock:
+            self.local.clear()
+
+    def _incr_version(self, version_key: str) -> None:
+        try:
+            self.cache.incr(version_key)
+        except ValueError:
+            self.cache.add(version_key, time_ns(), None)
+
+    def _set_local(self, key: Hashable, version: str, group: Optional[Hashable], value: Any) -> None:
+        with self.lock:
+            now = monotonic()
+            self.local[key] = (version, group, now + self.timeout, now + self.check, value)
+            self.local.move_to_end(key)
+            while len(self.local) > self.size:
+                self.local.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+
+__all__ = ("StatsCache",)
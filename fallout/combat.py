@@ -0,0 +1,762 @@
+# coding: utf-8
+import random
+from dataclasses import dataclass, field
+from math import sqrt
+from operator import add
+from random import Random
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from fallout.constants import *  # noqa
+from fallout.enums import *  # noqa
+
+gv = getattr
+
+# Attribut du personnage modifié (et sens de la modification) selon le type de dégâts
+DAMAGE_ATTRIBUTES = {
+    DAMAGE_RADIATION: ("rads", 1),
+    HEAL_RADIATION: ("rads", 1),
+    DAMAGE_THIRST: ("thirst", 1),
+    HEAL_THIRST: ("thirst", 1),
+    DAMAGE_HUNGER: ("hunger", 1),
+    HEAL_HUNGER: ("hunger", 1),
+    DAMAGE_SLEEP: ("sleep", 1),
+    HEAL_SLEEP: ("sleep", 1),
+    ADD_MONEY: ("money", -1),
+    REMOVE_MONEY: ("money", -1),
+    ADD_KARMA: ("karma", -1),
+    REMOVE_KARMA: ("karma", -1),
+}
+
+
+@dataclass
+class EquipmentSnapshot:
+    """
+    Etat figé d'un équipement (l'objet n'est lu que pour ses caractéristiques)
+    """
+
+    item: Any
+    id: Optional[int] = None
+    quantity: int = 1
+    clip_count: Optional[int] = None
+    condition: Optional[float] = None
+
+    @classmethod
+    def from_equipment(cls, equipment) -> Optional["EquipmentSnapshot"]:
+        """
+        Fige l'état d'un équipement
+        :param equipment: Equipement
+        :return: Etat de l'équipement
+        """
+        if equipment is None:
+            return None
+        return cls(
+            item=equipment.item,
+            id=equipment.pk,
+            quantity=equipment.quantity,
+            clip_count=equipment.clip_count,
+            condition=equipment.condition,
+        )
+
+
+@dataclass
+class CombatantSnapshot:
+    """
+    Etat figé d'un combattant (statistiques, équipements portés et état courant)
+    """
+
+    stats: Any
+    id: Optional[int] = None
+    level: int = 1
+    has_stats: bool = True
+    health: int = 0
+    action_points: int = 0
+    equipments: Dict[str, EquipmentSnapshot] = field(default_factory=dict)
+
+    def get_equipment(self, slot: str) -> Optional[EquipmentSnapshot]:
+        """
+        Retourne l'équipement porté dans un emplacement
+        :param slot: Emplacement (ou "secondary" pour l'arme secondaire)
+        :return: Equipement
+        """
+        return self.equipments.get(slot)
+
+    def get_weapon(self, weapon_type: str = WEAPON_TYPE_PRIMARY) -> Tuple[Optional[EquipmentSnapshot], ...]:
+        """
+        Retourne l'arme et les munitions utilisées selon le type d'arme
+        :param weapon_type: Type d'arme utilisé ("primary", "secondary", "grenade" ou "unarmed")
+        :return: Arme et munitions
+        """
+        if weapon_type == WEAPON_TYPE_GRENADE:
+            return self.get_equipment(ITEM_GRENADE), None
+        elif weapon_type == WEAPON_TYPE_SECONDARY:
+            return self.get_equipment(WEAPON_TYPE_SECONDARY), None
+        elif weapon_type == WEAPON_TYPE_UNARMED:
+            return None, None
+        return self.get_equipment(ITEM_WEAPON), self.get_equipment(ITEM_AMMO)
+
+
+class DamageReduction(NamedTuple):
+    """
+    Absorptions et résistances (armure et personnage) appliquées aux dégâts
+    """
+
+    armor_threshold: float = 0.0
+    armor_resistance: float = 0.0
+    damage_threshold: float = 0.0
+    damage_resistance: float = 0.0
+
+    @property
+    def armor_factor(self) -> float:
+        return max(1.0 - min(round(self.armor_resistance / 100.0, 2), 1.0), 0.0)
+
+    @property
+    def damage_factor(self) -> float:
+        return max(1.0 - round(self.damage_resistance / 100.0, 2), 0.0)
+
+
+@dataclass
+class DamageResult:
+    """
+    Résultat de dégâts infligés à un combattant
+    """
+
+    damage_type: str = DAMAGE_NORMAL
+    body_part: str = ""
+    raw_damage: float = 0.0
+    min_damage: int = 0
+    max_damage: int = 0
+    base_damage: float = 0.0
+    armor: Any = None
+    armor_threshold: float = 0.0
+    armor_resistance: float = 0.0
+    armor_damage: float = 0.0
+    damage_threshold: float = 0.0
+    damage_resistance: float = 0.0
+    real_damage: int = 0
+    damage_rate: float = 0.0
+    ticks: int = 1
+    # Target already KO (damage not applied nor historized)
+    ko: bool = False
+    # State mutations
+    armor_id: Optional[int] = None
+    changes: Dict[str, int] = field(default_factory=dict)
+
+    def get_history(self) -> Dict[str, Union[str, int, float]]:
+        """
+        Retourne les valeurs à historiser
+        :return: Valeurs par champ de l'historique des dégâts
+        """
+        return dict(
+            damage_type=self.damage_type,
+            body_part=self.body_part,
+            raw_damage=self.raw_damage,
+            min_damage=self.min_damage,
+            max_damage=self.max_damage,
+            base_damage=self.base_damage,
+            armor=self.armor,
+            armor_threshold=self.armor_threshold,
+            armor_resistance=self.armor_resistance,
+            armor_damage=self.armor_damage,
+            damage_threshold=self.damage_threshold,
+            damage_resistance=self.damage_resistance,
+            real_damage=self.real_damage,
+            damage_rate=self.damage_rate,
+            ticks=self.ticks,
+        )
+
+
+@dataclass
+class FightResult:
+    """
+    Résultat d'un coup porté par un combattant sur un autre
+    """
+
+    status: Optional[str] = None
+    body_part: Optional[str] = None
+    hit_modifier: int = 0
+    hit_chance: int = 0
+    hit_roll: int = 0
+    success: bool = False
+    critical: bool = False
+    weapon: Any = None
+    ammo: Any = None
+    armor: Any = None
+    damage: Optional[DamageResult] = None
+    # State mutations
+    ap_cost: int = 0
+    weapon_id: Optional[int] = None
+    quantity: int = 0
+    thrown: bool = False
+    clip_count: int = 0
+    condition: float = 0.0
+
+    def get_history(self) -> Dict[str, Any]:
+        """
+        Retourne les valeurs à historiser
+        :return: Valeurs par champ de l'historique de combat
+        """
+        return dict(
+            status=self.status or "",
+            body_part=self.body_part or "",
+            hit_modifier=self.hit_modifier,
+            hit_chance=self.hit_chance,
+            hit_roll=self.hit_roll,
+            success=self.success,
+            critical=self.critical,
+            attacker_weapon=self.weapon,
+            attacker_ammo=self.ammo,
+            defender_armor=self.armor,
+        )
+
+
+def get_roll_modifier(stats) -> int:
+    """
+    Modificateur de jet (basé sur la chance) pour la partie du corps touchée
+    :param stats: Statistiques
+    :return: Modificateur
+    """
+    return int(round((5 - stats.luck) * LUCK_ROLL_MULT, 0))
+
+
+def roll_body_part(stats, rng: Random = random) -> str:
+    """
+    Tire aléatoirement la partie du corps touchée
+    :param stats: Statistiques de l'attaquant
+    :param rng: Générateur aléatoire
+    :return: Partie du corps
+    """
+    roll_modifier, body_part = get_roll_modifier(stats), None
+    for body_part, chance in BODY_PARTS_RANDOM_CHANCES:
+        if rng.randint(1, 100 + roll_modifier) <= chance:
+            break
+    return body_part
+
+
+def get_ap_cost(attacker: CombatantSnapshot, weapon, target_part: Optional[str] = None, is_burst: bool = False) -> int:
+    """
+    Coût en points d'action d'une attaque
+    :param attacker: Attaquant
+    :param weapon: Arme utilisée
+    :param target_part: Partie du corps ciblée
+    :param is_burst: Attaque en rafale (hors grenades) ?
+    :return: Coût en points d'action
+    """
+    ap_cost_type = "ap_cost_burst" if is_burst else "ap_cost_target" if target_part else "ap_cost_normal"
+    ap_cost = gv(weapon, ap_cost_type, None)
+    ap_cost = ap_cost if ap_cost is not None else AP_COST_FIGHT
+    return ap_cost + attacker.stats.ap_cost_modifier
+
+
+def get_hit_chance(
+    attacker: CombatantSnapshot,
+    weapon,
+    ammo,
+    target_range: int = 1,
+    target_part: Optional[str] = None,
+    is_burst: bool = False,
+) -> Tuple[float, int]:
+    """
+    Précision de base de l'attaquant (avant l'état de l'arme et la classe d'armure de la cible)
+    :param attacker: Attaquant
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :param target_range: Distance (en cases) entre les deux personnages
+    :param target_part: Partie du corps ciblée
+    :param is_burst: Attaque en rafale ?
+    :return: Précision et portée maximale
+    """
+    stats = attacker.stats
+    is_melee = not weapon or weapon.is_melee
+    skill = gv(weapon, "skill", SKILL_UNARMED)
+    hit_chance = gv(stats, skill, 0)  # Base skill
+    if not hit_chance and not attacker.has_stats:
+        hit_chance = attacker.level * LEVELED_STATS_MULT  # Base skill level for creatures
+    # Accuracy modifier for one-hand or two-hands weapons
+    hit_chance += [0, stats.one_hand_accuracy, stats.two_hands_accuracy][gv(weapon, "hands", 0)]
+    # Accuracy malus if below required strength or skill
+    hit_chance += min(MIN_STRENGTH_MALUS * (stats.strength - gv(weapon, "min_strength", 0)), 0)
+    hit_chance += min(MIN_SKILL_MALUS * (gv(stats, skill, 0) - gv(weapon, "min_skill", 0)), 0)
+    # Weapon/ammo range modifiers (min & max)
+    range_type = "{}_burst_range" if is_burst else "{}_range"
+    min_range = (
+        0 if not weapon else max(add(gv(weapon, range_type.format("min"), 0), gv(ammo, range_type.format("min"), 0)), 0)
+    )
+    max_range = (
+        1 if not weapon else max(add(gv(weapon, range_type.format("max"), 0), gv(ammo, range_type.format("max"), 0)), 1)
+    )
+    # Ranged weapon accuracy modifiers
+    if weapon and weapon.attack_mode in RANGE_MODIFIERS:
+        hit_chance += (stats.perception - 2) * RANGE_MODIFIERS.get(weapon.attack_mode)
+        hit_chance -= max(min_range - target_range, 0) * RANGED_CLOSE_MALUS_MULT
+        hit_chance -= max(target_range - min_range, 0) * RANGED_MALUS_MULT
+    # Increase hit chance of weapons
+    elif not is_melee:
+        range_stats = SPECIAL_STRENGTH if weapon.is_throwable else SPECIAL_PERCEPTION
+        hit_chance += RANGED_NORMAL_MULT * gv(stats, range_stats, 0)
+        hit_chance -= target_range * RANGED_MALUS_MULT
+    # Targeted hit chance modifier
+    if target_part:
+        ranged_hit_modifier, melee_hit_modifier, *modifiers = BODY_PARTS_MODIFIERS[target_part]
+        hit_chance += melee_hit_modifier if is_melee else ranged_hit_modifier
+    hit_chance += gv(weapon, "hit_chance_modifier", 0)
+    hit_chance += gv(ammo, "hit_chance_modifier", 0)
+    return hit_chance, max_range
+
+
+def get_armor_class(target: CombatantSnapshot, armor, weapon, ammo) -> float:
+    """
+    Classe d'armure de la cible face à une arme
+    :param target: Cible
+    :param armor: Armure portée sur la partie du corps touchée
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Classe d'armure
+    """
+    armor_class = gv(armor, "armor_class", 0) + target.stats.armor_class
+    armor_class -= int((5 - target.stats.luck) * LUCK_ROLL_MULT)  # Luck-based armor class
+    armor_class *= max(
+        1.0 + add(gv(weapon, "armor_class_modifier", 0), gv(ammo, "armor_class_modifier", 0)) / 100.0,
+        0.0,
+    )
+    return armor_class
+
+
+def get_damage_type(weapon, ammo) -> str:
+    """
+    Type des dégâts infligés par une arme
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Type de dégâts
+    """
+    return gv(ammo, "damage_type", None) or gv(weapon, "damage_type", None) or DAMAGE_NORMAL
+
+
+def get_damage_multiplier(attacker: CombatantSnapshot, weapon, ammo) -> float:
+    """
+    Multiplicateur des dégâts de l'attaquant
+    :param attacker: Attaquant
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Multiplicateur
+    """
+    modifiers = (attacker.stats.damage_modifier, gv(weapon, "damage_modifier", 0), gv(ammo, "damage_modifier", 0))
+    return max(1.0 + sum(modifiers) / 100.0, 0.0)
+
+
+def get_critical_chance(attacker: CombatantSnapshot, body_part: str, weapon, ammo) -> int:
+    """
+    Chance de coup critique sur une partie du corps
+    :param attacker: Attaquant
+    :param body_part: Partie du corps touchée
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Chance de coup critique
+    """
+    ranged_hit_modifier, melee_hit_modifier, critical_modifier, critical_damage_modifier = BODY_PARTS_MODIFIERS[
+        body_part
+    ]
+    critical_chance = gv(attacker.stats, "critical_chance", 0) + critical_modifier
+    critical_chance += add(gv(weapon, "critical_modifier", 0), gv(ammo, "critical_modifier", 0))
+    return critical_chance
+
+
+def get_critical_multiplier(attacker: CombatantSnapshot, body_part: str, weapon, ammo) -> float:
+    """
+    Multiplicateur des dégâts d'un coup critique sur une partie du corps
+    :param attacker: Attaquant
+    :param body_part: Partie du corps touchée
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Multiplicateur
+    """
+    ranged_hit_modifier, melee_hit_modifier, critical_modifier, critical_damage_modifier = BODY_PARTS_MODIFIERS[
+        body_part
+    ]
+    is_melee = not weapon or weapon.is_melee
+    modifiers = (
+        attacker.stats.critical_damage,
+        critical_damage_modifier,
+        gv(weapon, "critical_damage_modifier", 0),
+        gv(ammo, "critical_damage_modifier", 0),
+        ((attacker.stats.strength * 10) if is_melee else 0),
+    )
+    return max(1.0 + sum(modifiers) / 100.0, 0.0)
+
+
+def get_damage_modifiers(weapon, ammo) -> Tuple[int, int, int]:
+    """
+    Modificateurs d'absorption et de résistance aux dégâts apportés par une arme
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Modificateurs d'absorption, de taux d'absorption et de résistance
+    """
+    return (
+        add(gv(weapon, "threshold_modifier", 0), gv(ammo, "threshold_modifier", 0)),
+        add(gv(weapon, "threshold_rate_modifier", 0), gv(ammo, "threshold_rate_modifier", 0)),
+        add(gv(weapon, "resistance_modifier", 0), gv(ammo, "resistance_modifier", 0)),
+    )
+
+
+def get_weapon_wear(weapon, ammo) -> float:
+    """
+    Perte d'état d'une arme à chaque tir
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :return: Perte d'état
+    """
+    durability = gv(weapon, "durability", 0)
+    if not durability:
+        return 0.0
+    return (1.0 / durability) * (
+        1.0 - add(gv(weapon, "condition_modifier", 0.0), gv(ammo, "condition_modifier", 0.0))
+    )
+
+
+def get_armor(target: CombatantSnapshot, damage_type: str, body_part: str) -> Optional[EquipmentSnapshot]:
+    """
+    Retourne l'armure protégeant la cible contre des dégâts
+    :param target: Cible
+    :param damage_type: Type des dégâts
+    :param body_part: Partie du corps touchée
+    :return: Armure
+    """
+    if not body_part or damage_type in LIST_NON_DAMAGE:
+        return None
+    to_head = damage_type == DAMAGE_GAZ_INHALED or body_part in (PART_EYES, PART_HEAD)
+    return target.get_equipment(ITEM_HELMET if to_head else ITEM_ARMOR)
+
+
+def get_damage_reduction(
+    target: CombatantSnapshot,
+    armor: Optional[EquipmentSnapshot],
+    damage_type: str,
+    threshold_modifier: int = 0,
+    threshold_rate_modifier: int = 0,
+    resistance_modifier: int = 0,
+) -> DamageReduction:
+    """
+    Calcule les absorptions et résistances (armure et personnage) appliquées aux dégâts
+    :param target: Cible
+    :param armor: Armure protégeant la cible
+    :param damage_type: Type des dégâts
+    :param threshold_modifier: Modificateur d'absorption de dégâts (appliqué à l'armure et au personnage)
+    :param threshold_rate_modifier: Modificateur de taux d'absorption de dégâts (appliqué à l'armure et au personnage)
+    :param resistance_modifier: Modificateur de résistance aux dégâts (appliqué à l'armure et au personnage)
+    :return: Absorptions et résistances
+    """
+    if damage_type in LIST_NON_DAMAGE:
+        return DamageReduction()
+    stats, threshold_rate_modifier = target.stats, round(threshold_rate_modifier / 100.0, 2)
+    armor_threshold, armor_resistance = 0.0, 0.0
+    if armor and armor.item:
+        armor_threshold = (armor.item.get_threshold(damage_type) * armor.condition) + threshold_modifier
+        armor_threshold = round(armor_threshold * max(1.0 + threshold_rate_modifier, 0.0), 2)
+        armor_resistance = armor.item.get_resistance(damage_type) * armor.condition
+        armor_resistance *= 1.0 + (resistance_modifier / 100.0)
+        armor_resistance = round(min(max(0, armor_resistance), MAX_DAMAGE_RESISTANCE), 2)
+    damage_threshold = stats.get_threshold(damage_type)
+    damage_resistance = stats.get_resistance(damage_type)
+    if damage_type in LIST_PHYSICAL_DAMAGE:
+        damage_threshold += stats.damage_threshold
+        damage_resistance += stats.damage_resistance
+    damage_threshold += threshold_modifier
+    damage_threshold = round(damage_threshold * threshold_rate_modifier, 2)
+    damage_resistance *= 1.0 + (resistance_modifier / 100.0)
+    damage_resistance = round(min(max(0, damage_resistance), MAX_DAMAGE_RESISTANCE), 2)
+    return DamageReduction(armor_threshold, armor_resistance, damage_threshold, damage_resistance)
+
+
+def reduce_damage(damage: float, reduction: DamageReduction, damage_type: str, armor=None) -> Tuple[int, float]:
+    """
+    Applique les absorptions et résistances (armure et personnage) à des dégâts
+    :param damage: Dégâts de base
+    :param reduction: Absorptions et résistances
+    :param damage_type: Type des dégâts
+    :param armor: Armure protégeant la cible (objet)
+    :return: Dégâts réels et usure de l'armure
+    """
+    total_damage, armor_damage = damage, 0.0
+    if armor:
+        # Armor threshold and resistance
+        total_damage = max(total_damage - max(reduction.armor_threshold, 0), 0)
+        total_damage *= reduction.armor_factor
+        if armor.durability and damage_type in LIST_PHYSICAL_DAMAGE:
+            armor_damage = max(((damage - total_damage) / armor.durability) * (1.0 - armor.condition_modifier), 0)
+    # Self threshold and resistance
+    total_damage = max(total_damage - max(reduction.damage_threshold, 0), 0)
+    total_damage *= reduction.damage_factor
+    total_damage *= -1.0 if damage_type in LIST_HEALS + (ADD_MONEY, ADD_KARMA) else 1.0
+    return int(round(total_damage)), armor_damage
+
+
+def get_random_totals(values: Sequence[Tuple[float, ...]], count: int, rng: Random = random) -> List[float]:
+    """
+    Tire la somme de plusieurs tirages uniformes parmi des valeurs en temps constant
+    (approximation normale au-delà d'un certain nombre de tirages, commune à toutes les colonnes des valeurs)
+    :param values: Valeurs possibles d'un tirage (plusieurs colonnes croissantes avec le tirage)
+    :param count: Nombre de tirages
+    :param rng: Générateur aléatoire
+    :return: Somme des tirages par colonne
+    """
+    if count <= RANDOM_SUM_EXACT_LIMIT:
+        draws = [values[rng.randrange(len(values))] for _ in range(count)]
+        return [sum(column) for column in zip(*draws)]
+    deviation, totals = rng.gauss(0.0, 1.0), []
+    for column in zip(*values):
+        mean = sum(column) / len(column)
+        variance = sum((value - mean) ** 2 for value in column) / len(column)
+        total = count * mean + deviation * sqrt(count * variance)
+        totals.append(min(max(total, count * min(column)), count * max(column)))
+    return totals
+
+
+def resolve_damage(
+    target: CombatantSnapshot,
+    raw_damage: float = 0.0,
+    min_damage: int = 0,
+    max_damage: int = 0,
+    damage_type: str = "",
+    body_part: str = "",
+    threshold_modifier: int = 0,
+    threshold_rate_modifier: int = 0,
+    resistance_modifier: int = 0,
+    ticks: int = 1,
+    rng: Random = random,
+) -> DamageResult:
+    """
+    Calcule des dégâts infligés à un combattant (l'état de la cible et de son armure est mis à jour)
+    Les dégâts répétés (effets sur la durée) sont agrégés en un seul résultat : chaque application est réduite
+    par l'armure et le personnage tels qu'ils sont au départ et la somme est tirée en une seule fois
+    :param target: Cible
+    :param raw_damage: Dégâts bruts
+    :param min_damage: Dégâts minimum
+    :param max_damage: Dégâts maximum
+    :param damage_type: Type des dégâts
+    :param body_part: Partie du corps touchée
+    :param threshold_modifier: Modificateur d'absorption de dégâts (appliqué à l'armure et au personnage)
+    :param threshold_rate_modifier: Modificateur de taux d'absorption de dégâts (appliqué à l'armure et au personnage)
+    :param resistance_modifier: Modificateur de résistance aux dégâts (appliqué à l'armure et au personnage)
+    :param ticks: Nombre d'applications successives des dégâts
+    :param rng: Générateur aléatoire
+    :return: Résultat des dégâts
+    """
+    damage_type, body_part = damage_type or DAMAGE_NORMAL, body_part or ""
+    if not body_part and damage_type in LIST_NON_DAMAGE:
+        body_part = roll_body_part(target.stats, rng)
+    body_part = "" if damage_type in LIST_NON_DAMAGE else body_part
+    ticks = max(int(ticks), 1)
+    result = DamageResult(damage_type, body_part, raw_damage, min_damage, max_damage, ticks=ticks)
+    # Base damage
+    if ticks == 1:
+        result.base_damage = raw_damage + rng.randint(min_damage, max_damage)
+    # Character already KO
+    if damage_type != HEAL_HEALTH and target.health <= 0:
+        if ticks > 1:
+            result.base_damage = ticks * raw_damage + ticks * (min_damage + max_damage) / 2
+        result.ko = True
+        return result
+    armor = get_armor(target, damage_type, body_part)
+    reduction = get_damage_reduction(
+        target, armor, damage_type, threshold_modifier, threshold_rate_modifier, resistance_modifier
+    )
+    result.armor = gv(armor, "item", None)
+    attribute, sign = DAMAGE_ATTRIBUTES.get(damage_type, ("health", -1))
+    if ticks == 1:
+        total_damage, result.armor_damage = reduce_damage(
+            result.base_damage, reduction, damage_type, result.armor
+        )
+    else:
+        # Real damage and armor wear of each possible roll, then their sum over all ticks in one draw
+        values = []
+        for damage in range(min_damage, max_damage + 1):
+            damage = raw_damage + damage
+            values.append((damage, *reduce_damage(damage, reduction, damage_type, result.armor)))
+        result.base_damage, total_damage, result.armor_damage = get_random_totals(values, ticks, rng)
+        total_damage = int(round(total_damage))
+        # Repeated damage stops as soon as the character is KO
+        if attribute == "health" and total_damage > 0:
+            total_damage = min(total_damage, target.health)
+    if result.armor:
+        result.armor_threshold, result.armor_resistance = reduction.armor_threshold, reduction.armor_resistance
+        # Condition decrease on armor
+        if result.armor_damage > 0:
+            result.armor_id = armor.id
+            armor.condition -= result.armor_damage
+    # Damage on target
+    if total_damage:
+        if attribute == "health":
+            result.damage_rate = round(min(target.health, abs(total_damage)) / (target.stats.max_health or 1), 2)
+            target.health -= total_damage
+        result.changes[attribute] = sign * total_damage
+    result.damage_threshold, result.damage_resistance = reduction.damage_threshold, reduction.damage_resistance
+    result.real_damage = total_damage
+    return result
+
+
+def resolve_fight(
+    attacker: CombatantSnapshot,
+    target: CombatantSnapshot,
+    weapon: Optional[EquipmentSnapshot] = None,
+    ammo: Optional[EquipmentSnapshot] = None,
+    target_range: int = 1,
+    target_part: Optional[str] = None,
+    hit_chance_modifier: int = 0,
+    is_grenade: bool = False,
+    is_burst: bool = False,
+    is_action: bool = False,
+    hit_count: int = 0,
+    force_success: bool = False,
+    force_critical: bool = False,
+    force_raw_damage: bool = False,
+    fail: bool = False,
+    rng: Random = random,
+) -> FightResult:
+    """
+    Calcule un coup porté par un combattant sur un autre sans aucun accès à la base de données
+    (l'état des combattants et de leurs équipements est mis à jour, le résultat liste les modifications à écrire)
+    :param attacker: Attaquant
+    :param target: Cible
+    :param weapon: Arme utilisée
+    :param ammo: Munitions utilisées
+    :param target_range: Distance (en cases) entre les deux personnages
+    :param target_part: Partie du corps ciblée par l'attaquant (ou aléatoire)
+    :param hit_chance_modifier: Modificateurs complémentaires de précision (lumière, couverture, etc...)
+    :param is_grenade: Lancer de grenade ?
+    :param is_burst: Attaque en rafale ?
+    :param is_action: Vérifie les points d'action de l'attaquant ?
+    :param hit_count: Compteur de coups lors d'une attaque en rafale
+    :param force_success: Force le succès du coup ?
+    :param force_critical: Force un coup critique ?
+    :param force_raw_damage: Force les dégâts bruts ?
+    :param fail: Attaque donnée sur une cible secondaire suite à un échec critique ?
+    :param rng: Générateur aléatoire
+    :return: Résultat du coup
+    """
+    weapon_item, ammo_item = gv(weapon, "item", None), gv(ammo, "item", None)
+    result = FightResult(weapon=weapon_item, ammo=ammo_item)
+    # Fight conditions
+    if target.health <= 0:
+        result.status = STATUS_TARGET_DEAD
+    elif not fail:
+        if weapon_item:
+            if weapon_item.clip_size and weapon.clip_count <= 0:
+                result.status = STATUS_NO_MORE_AMMO
+            elif weapon_item.is_throwable and weapon.quantity <= 0:
+                if not is_grenade or (is_burst and not hit_count):
+                    result.status = STATUS_NO_MORE_AMMO
+        elif weapon and weapon.condition is not None and weapon.condition <= 0.0:
+            result.status = STATUS_WEAPON_BROKEN
+    # Action points
+    if is_action and not fail:
+        result.ap_cost = get_ap_cost(attacker, weapon_item, target_part, is_burst and not is_grenade)
+        if result.ap_cost > attacker.action_points:
+            result.status = STATUS_NOT_ENOUGH_AP
+    # Premature end of fight
+    if result.status:
+        result.ap_cost = 0
+        return result
+    attacker.action_points -= max(result.ap_cost, 0)
+    # Targeted body part and armor
+    body_part = result.body_part = (target_part or roll_body_part(attacker.stats, rng)) or PART_TORSO
+    armor = target.get_equipment(ITEM_HELMET if body_part in (PART_EYES, PART_HEAD) else ITEM_ARMOR)
+    result.armor = gv(armor, "item", None)
+    # Hit chance
+    hit_chance, max_range = get_hit_chance(attacker, weapon_item, ammo_item, target_range, target_part, is_burst)
+    hit_chance *= gv(weapon, "condition", 1.0) or 1.0  # Weapon condition
+    hit_chance -= get_armor_class(target, result.armor, weapon_item, ammo_item)  # Defender armor class modifier
+    hit_chance += int(hit_chance_modifier)  # Other modifiers
+    hit_chance = max(min(hit_chance, MAX_HIT_CHANCE), 0)
+    # Force hit chance to null if target is farther than weapon range
+    if target_range > max_range:
+        hit_chance = 0
+    # Hit roll
+    result.hit_modifier = int(hit_chance_modifier)
+    result.hit_chance = int(round(hit_chance))
+    result.status = STATUS_HIT_FAILED
+    result.hit_roll = rng.randint(1, 100)
+    result.success = bool(force_success) or result.hit_roll <= result.hit_chance
+    result.critical = bool(force_critical) or result.hit_roll >= min(
+        100, CRITICAL_FAIL_D100 - get_roll_modifier(attacker.stats)
+    )
+    if result.success:
+        damage_type = get_damage_type(weapon_item, ammo_item)
+        damage = 0
+        for item in (weapon_item, ammo_item):
+            if not item:
+                continue
+            damage += rng.randint(item.min_damage, item.max_damage) + item.raw_damage
+        damage += attacker.stats.melee_damage if not weapon_item or weapon_item.is_melee else 0
+        damage *= get_damage_multiplier(attacker, weapon_item, ammo_item)
+        result.status = STATUS_HIT_SUCCEED
+        result.critical = bool(force_critical) or result.hit_roll <= get_critical_chance(
+            attacker, body_part, weapon_item, ammo_item
+        )
+        # Critical damage
+        if result.critical:
+            damage *= get_critical_multiplier(attacker, body_part, weapon_item, ammo_item)
+            damage += add(gv(weapon_item, "critical_damage", 0), gv(ammo_item, "critical_damage", 0))
+            critical_raw_chance = attacker.stats.critical_raw_chance + add(
+                gv(weapon_item, "critical_raw_modifier", 0),
+                gv(ammo_item, "critical_raw_modifier", 0),
+            )
+            critical_raw_damage = force_raw_damage or rng.randint(1, 100) <= critical_raw_chance
+            if damage_type not in LIST_NON_DAMAGE and critical_raw_damage:
+                damage_type = DAMAGE_RAW
+        damage = max(damage, 0)  # Avoid negative damage
+        threshold_modifier, threshold_rate_modifier, resistance_modifier = get_damage_modifiers(weapon_item, ammo_item)
+        result.damage = resolve_damage(
+            target,
+            raw_damage=damage,
+            damage_type=damage_type,
+            body_part=body_part,
+            threshold_modifier=threshold_modifier,
+            threshold_rate_modifier=threshold_rate_modifier,
+            resistance_modifier=resistance_modifier,
+            rng=rng,
+        )
+        if target.health <= 0:
+            result.status = STATUS_TARGET_KILLED
+    # Clip count & weapon condition
+    if weapon and weapon_item and not fail:
+        result.weapon_id = weapon.id
+        if is_grenade and (not is_burst or not hit_count):
+            result.quantity = 1
+        elif not is_grenade and weapon_item.is_throwable:
+            result.quantity, result.thrown = 1, True
+        elif weapon_item.clip_size:
+            result.clip_count = 1
+        if weapon_item.durability and weapon_item.is_repairable:
+            result.condition = get_weapon_wear(weapon_item, ammo_item)
+        weapon.quantity -= result.quantity
+        if result.clip_count:
+            weapon.clip_count -= result.clip_count
+        if result.condition:
+            weapon.condition -= result.condition
+    return result
+
+
+__all__ = (
+    "DAMAGE_ATTRIBUTES",
+    "CombatantSnapshot",
+    "DamageReduction",
+    "DamageResult",
+    "EquipmentSnapshot",
+    "FightResult",
+    "get_ap_cost",
+    "get_armor",
+    "get_armor_class",
+    "get_critical_chance",
+    "get_critical_multiplier",
+    "get_damage_modifiers",
+    "get_damage_multiplier",
+    "get_damage_reduction",
+    "get_damage_type",
+    "get_hit_chance",
+    "get_random_totals",
+    "get_roll_modifier",
+    "get_weapon_wear",
+    "reduce_damage",
+    "resolve_damage",
+    "resolve_fight",
+    "roll_body_part",
+)
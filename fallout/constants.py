@@ -250,6 +250,31 @@ CARRY_WEIGHT_EFFECTS: Dict[Tuple[int, Optional[int]], Dict[str, Tuple[int, Optio
 # S.P.E.C.I.A.L.
 SPECIAL_POINTS: int = 40
 
+# Maximum number of exact random draws when summing stacked modifiers (normal approximation beyond)
+RANDOM_SUM_EXACT_LIMIT: int = 20
+
+# Number of fights run by a combat simulation (default and maximum)
+SIMULATION_COUNT: int = 10000
+SIMULATION_MAX_COUNT: int = 100000
+
+# Lifetime (in seconds) of the progress of background tasks in the cache
+TASK_PROGRESS_TIMEOUT: int = 3600
+
+# Age (in days) of the histories archived by the periodic task and number of rows archived at once
+HISTORY_RETENTION_DAYS: int = 90
+HISTORY_ARCHIVE_BATCH_SIZE: int = 1000
+
+# Maximum range of the fight odds computed for each range and body part
+ODDS_MAX_RANGE: int = 30
+
+# Number of battles run by an encounter simulation (default, maximum and maximum from the API request),
+# battles per worker task and maximum number of rounds of a battle
+ENCOUNTER_COUNT: int = 1000
+ENCOUNTER_MAX_COUNT: int = 100000
+ENCOUNTER_API_MAX_COUNT: int = 1000
+ENCOUNTER_BATCH_SIZE: int = 250
+ENCOUNTER_MAX_ROUNDS: int = 50
+
 # Survival modifiers when resting
 NEEDS_RESTING_RATE: float = 0.75
 NEEDS_NORMAL_RATE: float = 1.00
@@ -397,8 +422,15 @@ __all__ = (
     "CRITICAL_FAIL_D100",
     "CRITICAL_SUCCESS_D10",
     "CRITICAL_SUCCESS_D100",
+    "ENCOUNTER_API_MAX_COUNT",
+    "ENCOUNTER_BATCH_SIZE",
+    "ENCOUNTER_COUNT",
+    "ENCOUNTER_MAX_COUNT",
+    "ENCOUNTER_MAX_ROUNDS",
     "EXTRA_LUCK_MONEY_MULT",
     "HEALING_RATE_RESTING_MULT",
+    "HISTORY_ARCHIVE_BATCH_SIZE",
+    "HISTORY_RETENTION_DAYS",
     "HUNGER_EFFECTS",
     "LEVELED_STATS_MULT",
     "LIST_COMPUTED_STATS",
@@ -409,18 +441,23 @@ __all__ = (
     "MIN_STRENGTH_MALUS",
     "NEEDS_NORMAL_RATE",
     "NEEDS_RESTING_RATE",
+    "ODDS_MAX_RANGE",
     "RACES_STATS",
     "RADS_EFFECTS",
+    "RANDOM_SUM_EXACT_LIMIT",
     "RANGED_CLOSE_MALUS_MULT",
     "RANGED_LONG_MULT",
     "RANGED_MALUS_MULT",
     "RANGED_NORMAL_MULT",
     "RANGED_SCOPED_MULT",
     "RANGE_MODIFIERS",
+    "SIMULATION_COUNT",
+    "SIMULATION_MAX_COUNT",
     "SLEEP_EFFECTS",
     "SPECIAL_POINTS",
     "SURVIVAL_EFFECTS",
     "TAG_SKILL_BONUS",
+    "TASK_PROGRESS_TIMEOUT",
     "THIRST_EFFECTS",
     "TURN_TIME",
     "XP_GAIN_BURST",
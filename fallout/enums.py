@@ -204,6 +204,28 @@ WEAPON_TYPES = (
     (WEAPON_TYPE_UNARMED, _("à mains nues")),
 )
 
+# Background tasks status
+TASK_PENDING = "pending"
+TASK_RUNNING = "running"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+TASK_STATUS = (
+    (TASK_PENDING, _("en attente")),
+    (TASK_RUNNING, _("en cours")),
+    (TASK_DONE, _("terminée")),
+    (TASK_FAILED, _("en échec")),
+)
+
+# Target selection policies (encounter simulation)
+TARGET_POLICY_WEAKEST = "weakest"
+TARGET_POLICY_STRONGEST = "strongest"
+TARGET_POLICY_RANDOM = "random"
+TARGET_POLICIES = (
+    (TARGET_POLICY_WEAKEST, _("cible la plus faible")),
+    (TARGET_POLICY_STRONGEST, _("cible la plus forte")),
+    (TARGET_POLICY_RANDOM, _("cible au hasard")),
+)
+
 ALL_RESISTANCES = sum((((f1, l1), (f2, l2)) for (f1, l1), (f2, l2) in zip(THRESHOLDS, RESISTANCES)), tuple())
 LIST_ALL_RESISTANCES = dict(ALL_RESISTANCES)
 
@@ -731,6 +753,15 @@ __all__ = (
     "STATUS_TARGET_DEAD",
     "STATUS_TARGET_KILLED",
     "STATUS_WEAPON_BROKEN",
+    "TARGET_POLICIES",
+    "TARGET_POLICY_RANDOM",
+    "TARGET_POLICY_STRONGEST",
+    "TARGET_POLICY_WEAKEST",
+    "TASK_DONE",
+    "TASK_FAILED",
+    "TASK_PENDING",
+    "TASK_RUNNING",
+    "TASK_STATUS",
     "THIRST_LABELS",
     "THRESHOLDS",
     "THRESHOLD_DAMAGE",
@@ -21,8 +21,34 @@ class DuplicateCharacterForm(CampaignForm):
     """
 
     count = forms.IntegerField(min_value=1, initial=1, label=_("Nombre"))
-    name = forms.CharField(required=False, label=_("Nom"))
+    name = forms.CharField(
+        required=False,
+        label=_("Nom"),
+        help_text=_("{number} sera remplacé par le numéro de chaque copie."),
+    )
     is_active = forms.BooleanField(required=False, initial=True, label=_("Actif ?"))
+    points = forms.IntegerField(
+        min_value=0,
+        initial=0,
+        required=False,
+        label=_("Points"),
+        help_text=_("Ces points seront aléatoirement répartis dans le S.P.E.C.I.A.L. de chaque copie."),
+    )
+    level = forms.IntegerField(
+        min_value=0,
+        initial=0,
+        required=False,
+        label=_("Niveau"),
+        help_text=_("Les compétences de chaque copie seront générées aléatoirement jusqu'à ce niveau."),
+    )
+    balance = forms.IntegerField(
+        min_value=0,
+        max_value=100,
+        initial=50,
+        required=False,
+        label=_("Balance"),
+        help_text=_("Pourcentage de points de compétences à répartir dans les spécialités."),
+    )
 
 
 class RollCharacterForm(forms.Form):
@@ -0,0 +1,361 @@
+# coding: utf-8
+import ast
+import inspect
+from textwrap import dedent
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from fallout.constants import *  # noqa
+from fallout.enums import *  # noqa
+
+
+class FormulaTracer:
+    """
+    Objet factice permettant de relever les statistiques lues par une formule
+    """
+
+    def __init__(self, value: int = 1):
+        self._names, self._value = set(), value
+
+    def __getattr__(self, name: str) -> int:
+        self._names.add(name)
+        return self._value
+
+
+def get_formula_dependencies(formula: Callable) -> FrozenSet[str]:
+    """
+    Retourne les statistiques (et propriétés du personnage) lues par une formule
+    :param formula: Formule de calcul (statistiques, personnage)
+    :return: Ensemble des noms de statistiques
+    """
+    tracer = FormulaTracer()
+    formula(tracer, tracer)
+    return frozenset(tracer._names)
+
+
+# Dependency graph of computed statistics: formula -> statistics read by the formula
+COMPUTED_STATS_DEPENDENCIES: Dict[str, FrozenSet[str]] = {
+    stats_name: get_formula_dependencies(formula) for stats_name, formula in COMPUTED_STATS
+}
+
+
+def _get_dependents() -> Dict[str, Tuple[str, ...]]:
+    dependents: Dict[str, set] = {}
+    for stats_name, dependencies in COMPUTED_STATS_DEPENDENCIES.items():
+        for dependency in dependencies:
+            dependents.setdefault(dependency, set()).add(stats_name)
+            # Transitive dependencies (max_health depends on hit_points_per_level which depends on endurance)
+            for source, targets in dependents.items():
+                if dependency in targets:
+                    targets.add(stats_name)
+    order = [stats_name for stats_name, formula in COMPUTED_STATS]
+    return {name: tuple(sorted(targets, key=order.index)) for name, targets in dependents.items()}
+
+
+# Reversed dependency graph: statistics -> all computed statistics to refresh when it changes
+COMPUTED_STATS_DEPENDENTS: Dict[str, Tuple[str, ...]] = _get_dependents()
+
+
+def get_affected_stats(names: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Retourne les statistiques calculées à réévaluer suite au changement d'une ou plusieurs statistiques
+    :param names: Statistiques modifiées
+    :return: Statistiques calculées impactées (dans l'ordre d'évaluation)
+    """
+    affected = set()
+    for name in names:
+        if name in LIST_COMPUTED_STATS:
+            affected.add(name)
+        affected.update(COMPUTED_STATS_DEPENDENTS.get(name, ()))
+    return tuple(stats_name for stats_name, formula in COMPUTED_STATS if stats_name in affected)
+
+
+# Position of each editable statistics in the flat vector used by the compiled evaluators
+STATS_NAMES: Tuple[str, ...] = tuple(LIST_EDITABLE_STATS)
+STATS_INDEXES: Dict[str, int] = {stats_name: index for index, stats_name in enumerate(STATS_NAMES)}
+# Built-in functions allowed in the compiled formulas
+FORMULA_BUILTINS = ("abs", "int", "max", "min", "round")
+
+
+class VectorView:
+    """
+    Accès aux valeurs d'un vecteur de statistiques par leur nom (formules non compilables)
+    """
+
+    __slots__ = ("vector", "level")
+
+    def __init__(self, vector: List[int], level: int):
+        self.vector, self.level = vector, level
+
+    def __getattr__(self, name: str) -> int:
+        try:
+            return self.vector[STATS_INDEXES[name]]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class FormulaTranslator(ast.NodeTransformer):
+    """
+    Traduit le corps d'une formule en expression sur un vecteur de statistiques
+    """
+
+    def __init__(self, stats: str, character: str, vector: str, local: bool = False):
+        self.stats, self.character, self.vector, self.local = stats, character, vector, local
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        if not isinstance(node.value, ast.Name) or node.value.id not in (self.stats, self.character):
+            raise ValueError(node.attr)
+        if node.attr == "level":
+            return ast.Name(id="level", ctx=ast.Load())
+        if node.value.id != self.stats or node.attr not in STATS_INDEXES:
+            raise ValueError(node.attr)
+        if self.local:
+            return ast.Name(id=f"{self.vector}_{node.attr}", ctx=ast.Load())
+        return ast.Subscript(
+            value=ast.Name(id=self.vector, ctx=ast.Load()),
+            slice=ast.Constant(value=STATS_INDEXES[node.attr]),
+            ctx=ast.Load(),
+        )
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id not in FORMULA_BUILTINS:
+            raise ValueError(node.id)
+        return node
+
+
+def get_formula_expression(formula: Callable, vector: str, local: bool = False) -> Optional[str]:
+    """
+    Traduit une formule (lambda s, c: ...) en expression Python sur un vecteur de statistiques
+    :param formula: Formule de calcul
+    :param vector: Nom de la variable du vecteur dans l'expression générée
+    :param local: Utilise des variables locales préfixées par le nom du vecteur plutôt que le vecteur lui-même
+    :return: Expression ou None si la formule ne peut être traduite
+    """
+    try:
+        tree = ast.parse(dedent(inspect.getsource(formula)).strip().rstrip(","))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    lambdas = [node for node in ast.walk(tree) if isinstance(node, ast.Lambda)]
+    if len(lambdas) != 1 or len(lambdas[0].args.args) != 2:
+        return None
+    stats, character = (arg.arg for arg in lambdas[0].args.args)
+    try:
+        expression = FormulaTranslator(stats, character, vector, local).visit(lambdas[0].body)
+    except ValueError:
+        return None
+    return ast.unparse(ast.fix_missing_locations(expression))
+
+
+def compile_stats(race: str) -> Callable:
+    """
+    Compile les formules et effets des statistiques (COMPUTED_STATS, RACES_STATS, SURVIVAL_EFFECTS et
+    CARRY_WEIGHT_EFFECTS) en une fonction Python travaillant sur un vecteur d'entiers pour une race donnée
+    :param race: Race
+    :return: Fonction d'évaluation
+    """
+    namespace = dict(
+        INDEXES=STATS_INDEXES,
+        COMPUTED=LIST_COMPUTED_STATS,
+        FORMULAS=[formula for stats_name, formula in COMPUTED_STATS],
+        CARRY_WEIGHT_EFFECTS=list(CARRY_WEIGHT_EFFECTS.values()),
+        VectorView=VectorView,
+        INF=float("inf"),
+    )
+    race_stats = RACES_STATS.get(race, {})
+    lines = [
+        "def evaluate(v, b, level, tags, modifiers, campaign_modifiers, charge, character, change):",
+        "    raw, clamped = dict.fromkeys(COMPUTED, 0), set()",
+    ]
+
+    def emit_change(indent: str, stats_name: str, value, mini=None, maxi=None, limit: bool = False) -> None:
+        if stats_name in LIST_COMPUTED_STATS:
+            lines.append(f"{indent}raw[{stats_name!r}] += {value!r}")
+        elif stats_name not in STATS_INDEXES:
+            lines.append(f"{indent}change({stats_name!r}, {value!r})")
+        elif limit:
+            bonus, race_mini, race_maxi = race_stats.get(stats_name, (None, None, None))
+            mini = (mini if mini is not None else race_mini) or None
+            maxi = (maxi if maxi is not None else race_maxi) or None
+            index = STATS_INDEXES[stats_name]
+            lines.append(f"{indent}x = v[{index}] + {value!r}")
+            if mini is not None:
+                lines.append(f"{indent}if x < {mini!r}:")
+                lines.append(f"{indent}    x = {mini!r}")
+            if maxi is not None:
+                lines.append(f"{indent}if x > {maxi!r}:")
+                lines.append(f"{indent}    x = {maxi!r}")
+            lines.append(f"{indent}v[{index}] = x")
+        else:
+            index = STATS_INDEXES[stats_name]
+            lines.append(f"{indent}x = v[{index}] + {value!r}")
+            lines.append(f"{indent}if x < 0:")
+            lines.append(f"{indent}    x = 0")
+            lines.append(f"{indent}    clamped.add({stats_name!r})")
+            lines.append(f"{indent}v[{index}] = x")
+
+    def emit_formula(position: int, vector: str, local: bool = False) -> str:
+        expression = get_formula_expression(COMPUTED_STATS[position][1], vector, local)
+        if expression is not None:
+            return expression
+        if vector == "b":
+            return f"FORMULAS[{position}](VectorView(b, level), VectorView(b, level))"
+        return f"FORMULAS[{position}](VectorView(v, level), character)"
+
+    # Racial modifiers
+    for stats_name, (value, mini, maxi) in race_stats.items():
+        emit_change("    ", stats_name, value, mini, maxi, limit=True)
+        if stats_name in STATS_INDEXES and value:
+            lines.append(f"    b[{STATS_INDEXES[stats_name]}] += {value!r}")
+    # Tag skills
+    lines += [
+        "    for index in tags:",
+        f"        b[index] += {TAG_SKILL_BONUS!r}",
+        f"        x = v[index] + {TAG_SKILL_BONUS!r}",
+        "        v[index] = x if x > 0 else 0",
+    ]
+    # Base statistics (statistics read by the formulas are loaded in local variables)
+    dependencies = [
+        stats_name
+        for stats_name in STATS_NAMES
+        if any(stats_name in names for names in COMPUTED_STATS_DEPENDENCIES.values())
+    ]
+    for stats_name in dependencies:
+        lines.append(f"    b_{stats_name} = b[{STATS_INDEXES[stats_name]}]")
+    for position, (stats_name, formula) in enumerate(COMPUTED_STATS):
+        index = STATS_INDEXES[stats_name]
+        lines.append(f"    b_{stats_name} = b[{index}] + ({emit_formula(position, 'b', local=True)})")
+        lines.append(f"    b[{index}] = b_{stats_name}")
+    # Survival modifiers
+    for stats_name, survival in SURVIVAL_EFFECTS:
+        lines.append(f"    need = getattr(character, {stats_name!r}, 0)")
+        keyword = "if"
+        for (mini, maxi), effects in survival.items():
+            lines.append(f"    {keyword} {(mini or 0)!r} <= need < {maxi or 'INF'}:")
+            if not effects:
+                lines.append("        pass")
+            for name, values in effects.items():
+                emit_change("        ", name, *values)
+            keyword = "elif"
+    # Equipment, active effects and campaign effects modifiers
+    lines += [
+        "    for items in (modifiers, campaign_modifiers):",
+        "        for name, value in items.items():",
+        "            if name in COMPUTED:",
+        "                raw[name] += value",
+        "                continue",
+        "            index = INDEXES.get(name)",
+        "            if index is None:",
+        "                change(name, value)",
+        "                continue",
+        "            x = v[index] + value",
+        "            if x < 0:",
+        "                x = 0",
+        "                clamped.add(name)",
+        "            v[index] = x",
+    ]
+    initial = ", ".join(
+        f"{stats_name!r}: v[{STATS_INDEXES[stats_name]}]" for stats_name, formula in COMPUTED_STATS
+    )
+    lines.append(f"    initial = {{{initial}}}")
+
+    def emit_derived(position: int, stats_name: str, local: bool = False) -> None:
+        index = STATS_INDEXES[stats_name]
+        expression = emit_formula(position, "v", local)
+        lines.append(f"    x = v[{index}] + ({expression}) + raw[{stats_name!r}]")
+        if local:
+            lines.append(f"    v_{stats_name} = v[{index}] = x if x > 0 else 0")
+        else:
+            lines.append(f"    v[{index}] = x if x > 0 else 0")
+
+    # Carry weight & charge effects
+    emit_derived(0, COMPUTED_STATS[0][0])
+    carry_weight = STATS_INDEXES[COMPUTED_STATS[0][0]]
+    lines.append(f"    rate = (charge / (v[{carry_weight}] or 1)) * 100.0")
+    lines.append("    carry_effects = {}")
+    keyword = "if"
+    for position, ((mini, maxi), effects) in enumerate(CARRY_WEIGHT_EFFECTS.items()):
+        lines.append(f"    {keyword} {float(mini or 0.0)!r} <= rate < {maxi or 'INF'}:")
+        lines.append(f"        carry_effects = CARRY_WEIGHT_EFFECTS[{position}]")
+        for name, values in effects.items():
+            emit_change("        ", name, *values)
+        keyword = "elif"
+    # Derivated statistics
+    for stats_name in dependencies:
+        lines.append(f"    v_{stats_name} = v[{STATS_INDEXES[stats_name]}]")
+    for position, (stats_name, formula) in enumerate(COMPUTED_STATS[1:], start=1):
+        emit_derived(position, stats_name, local=True)
+    lines.append("    return raw, clamped, initial, carry_effects")
+    source = "\n".join(lines)
+    exec(compile(source, f"<stats:{race}>", "exec"), namespace)
+    evaluate = namespace["evaluate"]
+    evaluate.source = source
+    return evaluate
+
+
+# Compiled evaluators per race
+COMPILED_STATS: Dict[str, Callable] = {}
+
+
+def get_stats_evaluator(race: str) -> Callable:
+    """
+    Retourne l'évaluateur compilé des statistiques d'une race
+    :param race: Race
+    :return: Fonction d'évaluation
+    """
+    evaluator = COMPILED_STATS.get(race)
+    if evaluator is None:
+        evaluator = COMPILED_STATS[race] = compile_stats(race)
+    return evaluator
+
+
+for _race in RACES_STATS:
+    get_stats_evaluator(_race)
+
+
+def compile_needs() -> Callable:
+    """
+    Compile les formules des besoins (COMPUTED_NEEDS) en une fonction Python travaillant sur un vecteur d'entiers
+    :return: Fonction d'évaluation retournant la consommation horaire de chaque besoin (dans l'ordre de COMPUTED_NEEDS)
+    """
+    namespace = dict(
+        FORMULAS=[formula for stats_name, formula in COMPUTED_NEEDS],
+        VectorView=VectorView,
+    )
+    expressions = []
+    for position, (stats_name, formula) in enumerate(COMPUTED_NEEDS):
+        expression = get_formula_expression(formula, "v")
+        if expression is None:
+            expression = f"FORMULAS[{position}](VectorView(v, level), character)"
+        expressions.append(expression)
+    source = "\n".join(
+        [
+            "def evaluate(v, level, character):",
+            f"    return ({', '.join(expressions)},)",
+        ]
+    )
+    exec(compile(source, "<needs>", "exec"), namespace)
+    evaluate = namespace["evaluate"]
+    evaluate.source = source
+    return evaluate
+
+
+# Compiled evaluator of the needs
+NEEDS_EVALUATOR: Callable = compile_needs()
+
+
+__all__ = (
+    "COMPILED_STATS",
+    "COMPUTED_STATS_DEPENDENCIES",
+    "COMPUTED_STATS_DEPENDENTS",
+    "FormulaTracer",
+    "FormulaTranslator",
+    "NEEDS_EVALUATOR",
+    "STATS_INDEXES",
+    "STATS_NAMES",
+    "VectorView",
+    "compile_needs",
+    "compile_stats",
+    "get_affected_stats",
+    "get_formula_dependencies",
+    "get_formula_expression",
+    "get_stats_evaluator",
+)
@@ -0,0 +1,32 @@
+# coding: utf-8
+from math import isqrt
+
+from fallout.constants import BASE_XP
+
+
+def get_level_experience(level: int) -> int:
+    """
+    Retourne l'expérience totale nécessaire pour atteindre un niveau
+    Le palier du niveau N est la somme des (N - 1) premiers multiples de BASE_XP (nombre triangulaire)
+    :param level: Niveau
+    :return: Expérience nécessaire
+    """
+    level = max(level, 1)
+    return BASE_XP * level * (level - 1) // 2
+
+
+def get_experience_level(experience: int) -> int:
+    """
+    Retourne le niveau atteint avec une quantité d'expérience
+    Plus grand niveau N tel que N * (N - 1) <= 2 * expérience / BASE_XP
+    :param experience: Expérience
+    :return: Niveau
+    """
+    steps = 2 * max(experience, 0) // BASE_XP
+    return (1 + isqrt(1 + 4 * steps)) // 2
+
+
+__all__ = (
+    "get_experience_level",
+    "get_level_experience",
+)
@@ -0,0 +1,48 @@
+# coding: utf-8
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.utils.timezone import make_aware, now
+from django.utils.translation import gettext as _
+
+from fallout.constants import HISTORY_RETENTION_DAYS
+from fallout.models import HistoryArchiver
+
+
+def parse_date(value: str) -> datetime:
+    return make_aware(datetime.fromisoformat(value))
+
+
+class Command(BaseCommand):
+    help = _("Archive les historiques de jets, de dégâts et de combats et conserve leurs cumuls")
+    leave_locale_alone = True
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help=_("Age (en jours réels) des historiques à archiver"))
+        parser.add_argument("--before", type=parse_date, help=_("Date réelle avant laquelle archiver"))
+        parser.add_argument("--game-before", type=parse_date, dest="game_before", help=_("Date en jeu"))
+        parser.add_argument("--campaign", type=int, help=_("Identifiant de la campagne"))
+        parser.add_argument("--output", type=str, help=_("Répertoire du fichier d'archive"))
+        parser.add_argument("--no-file", action="store_true", dest="no_file", help=_("Sans fichier d'archive"))
+
+    def handle(
+        self, days=None, before=None, game_before=None, campaign=None, output=None, no_file=False, *args, **options
+    ):
+        if days is None and before is None and game_before is None:
+            days = HISTORY_RETENTION_DAYS
+        date = before or (now() - timedelta(days=days) if days is not None else None)
+        try:
+            archiver = HistoryArchiver(
+                date=date,
+                game_date=game_before,
+                campaign=campaign,
+                directory=None if no_file else (output or settings.HISTORY_ARCHIVE_ROOT),
+            )
+            counts = archiver.archive()
+        except AssertionError as error:
+            raise CommandError(str(error))
+        for model_name, count in counts.items():
+            self.stdout.write(_("{model} : {count} ligne(s) archivée(s)").format(model=model_name, count=count))
+        if archiver.filename:
+            self.stdout.write(_("Fichier d'archive : {filename}").format(filename=archiver.filename))
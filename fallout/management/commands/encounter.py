@@ -0,0 +1,59 @@
+# coding: utf-8
+from django.core.management import BaseCommand, CommandError
+from django.utils.translation import gettext as _
+
+from fallout.constants import ENCOUNTER_COUNT, ENCOUNTER_MAX_ROUNDS
+from fallout.enums import TARGET_POLICIES, TARGET_POLICY_WEAKEST
+from fallout.models import Character
+from fallout.simulation import EncounterSimulation
+
+
+class Command(BaseCommand):
+    help = _("Simule l'issue d'une bataille entre deux groupes de personnages")
+    leave_locale_alone = True
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attackers", type=int, nargs="+", required=True, help=_("Attaquants"))
+        parser.add_argument("--defenders", type=int, nargs="+", required=True, help=_("Défenseurs"))
+        parser.add_argument("--range", type=int, default=1, dest="target_range", help=_("Distance"))
+        parser.add_argument(
+            "--policy",
+            choices=dict(TARGET_POLICIES),
+            default=TARGET_POLICY_WEAKEST,
+            dest="target_policy",
+            help=_("Choix de la cible"),
+        )
+        parser.add_argument("--rounds", type=int, default=ENCOUNTER_MAX_ROUNDS, dest="max_rounds", help=_("Tours max."))
+        parser.add_argument("--count", type=int, default=ENCOUNTER_COUNT, help=_("Nombre de batailles"))
+        parser.add_argument("--workers", type=int, default=None, help=_("Nombre de processus"))
+        parser.add_argument("--seed", type=int, default=None, help=_("Graine"))
+
+    def handle(self, attackers=None, defenders=None, count=None, workers=None, seed=None, *args, **options):
+        characters = Character.get_targets(attackers + defenders)
+        missing = [pk for pk in attackers + defenders if pk not in characters]
+        if missing:
+            raise CommandError(_("Personnages introuvables : {ids}").format(ids=", ".join(map(str, missing))))
+        simulation = EncounterSimulation(
+            [characters[pk] for pk in attackers],
+            [characters[pk] for pk in defenders],
+            target_range=options["target_range"],
+            target_policy=options["target_policy"],
+            max_rounds=options["max_rounds"],
+        )
+        results = simulation.run(count, seed=seed, workers=workers)
+        self.stdout.write(_("Batailles : {count}").format(count=results["count"]))
+        self.stdout.write(_("Tours (moyenne) : {rounds:.2f}").format(rounds=results["rounds"]))
+        self.stdout.write(_("Egalité : {chance:.1%}").format(chance=results["draw_chance"]))
+        for key, label in (("attackers", _("Attaquants")), ("defenders", _("Défenseurs"))):
+            group = results[key]
+            self.stdout.write(
+                _("{label} : victoire {win:.1%}, pertes {casualties:.2f}, munitions {ammo:.1f}").format(
+                    label=label, win=group["win_chance"], casualties=group["casualties"], ammo=group["ammo"]
+                )
+            )
+            for pk, character in group["characters"].items():
+                self.stdout.write(
+                    _("  {name} : mort {death:.1%}, munitions {ammo:.1f}").format(
+                        name=characters[pk].name, death=character["death_chance"], ammo=character["ammo"]
+                    )
+                )
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fallout", "0008_history_reason"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="campaigneffect",
+            index=models.Index(fields=["campaign", "next_date"], name="campaigneffect_next_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="campaigneffect",
+            index=models.Index(fields=["campaign", "end_date"], name="campaigneffect_end_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="charactereffect",
+            index=models.Index(fields=["character", "next_date"], name="charactereffect_next_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="charactereffect",
+            index=models.Index(fields=["character", "end_date"], name="charactereffect_end_date_idx"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fallout", "0009_effect_schedule_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="damagehistory",
+            name="ticks",
+            field=models.PositiveIntegerField(default=1, verbose_name="applications"),
+        ),
+        migrations.AlterField(
+            model_name="damagehistory",
+            name="base_damage",
+            field=models.IntegerField(default=0, verbose_name="dégâts de base"),
+        ),
+        migrations.AlterField(
+            model_name="damagehistory",
+            name="real_damage",
+            field=models.IntegerField(default=0, verbose_name="dégâts réels"),
+        ),
+    ]
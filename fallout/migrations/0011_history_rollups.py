@@ -0,0 +1,116 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fallout", "0010_damage_history_ticks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FightHistoryRollup",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("is_attacker", models.BooleanField(default=True, verbose_name="attaquant ?")),
+                ("level", models.SmallIntegerField(default=0, verbose_name="niveau")),
+                ("success", models.BooleanField(default=False, verbose_name="touché ?")),
+                ("critical", models.BooleanField(default=False, verbose_name="critique ?")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="nombre")),
+                ("damage", models.IntegerField(default=0, verbose_name="dégâts")),
+                (
+                    "character",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fight_rollups",
+                        to="fallout.character",
+                        verbose_name="personnage",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "cumul de combats",
+                "verbose_name_plural": "cumuls des combats",
+                "unique_together": {("character", "is_attacker", "level", "success", "critical")},
+            },
+        ),
+        migrations.CreateModel(
+            name="RollHistoryRollup",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("level", models.SmallIntegerField(default=0, verbose_name="niveau")),
+                (
+                    "stats",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            (
+                                "S.P.E.C.I.A.L.",
+                                [
+                                    ("strength", "force"),
+                                    ("perception", "perception"),
+                                    ("endurance", "endurance"),
+                                    ("charisma", "charisme"),
+                                    ("intelligence", "intelligence"),
+                                    ("agility", "agilité"),
+                                    ("luck", "chance"),
+                                ],
+                            ),
+                            (
+                                "Compétences",
+                                [
+                                    ("small_guns", "armes à feu légères"),
+                                    ("big_guns", "armes à feu lourdes"),
+                                    ("energy_weapons", "armes à énergie"),
+                                    ("unarmed", "à mains nues"),
+                                    ("melee_weapons", "armes de mêlée"),
+                                    ("throwing", "armes de lancer"),
+                                    ("athletics", "athlétisme"),
+                                    ("detection", "détection"),
+                                    ("first_aid", "premiers secours"),
+                                    ("doctor", "médecine"),
+                                    ("chems", "pharmacologie"),
+                                    ("sneak", "discrétion"),
+                                    ("lockpick", "crochetage"),
+                                    ("steal", "pickpocket"),
+                                    ("traps", "pièges"),
+                                    ("explosives", "explosifs"),
+                                    ("science", "science"),
+                                    ("repair", "mécanique"),
+                                    ("computers", "informatique"),
+                                    ("electronics", "électronique"),
+                                    ("speech", "persuasion"),
+                                    ("deception", "tromperie"),
+                                    ("barter", "marchandage"),
+                                    ("survival", "survie"),
+                                    ("knowledge", "connaissance"),
+                                ],
+                            ),
+                        ],
+                        max_length=20,
+                        verbose_name="statistique",
+                    ),
+                ),
+                ("success", models.BooleanField(default=False, verbose_name="succès ?")),
+                ("critical", models.BooleanField(default=False, verbose_name="critique ?")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="nombre")),
+                (
+                    "character",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="roll_rollups",
+                        to="fallout.character",
+                        verbose_name="personnage",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "cumul de jets",
+                "verbose_name_plural": "cumuls des jets",
+                "unique_together": {("character", "level", "stats", "success", "critical")},
+            },
+        ),
+    ]
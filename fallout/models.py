@@ -1,27 +1,48 @@
 # coding: utf-8
-import dataclasses
+import gzip
+import os
+from array import array
 from collections import OrderedDict as odict, Counter
 from collections import namedtuple
+from contextlib import ContextDecorator
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from operator import add
-from random import choice, randint
-from typing import Dict, Iterable, List, Optional, Tuple, Union
+from heapq import heappop, heappush
+from itertools import chain, count
+from operator import attrgetter
+from math import sqrt
+from random import choice, choices, gauss, randint
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from common.fields import JsonField
-from common.models import CommonModel, CommonQuerySet, Entity
+from common.models import CommonModel, CommonQuerySet, Entity, EntityQuerySet
 from common.utils import to_object
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import AbstractUser
+from django.core import serializers
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.db.models import Case, Count, F, Prefetch, Q, Sum, Value, When
+from django.db.models.query import ModelIterable
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from multiselectfield import MultiSelectField
 
+from fallout.cache import StatsCache
+from fallout.combat import (
+    CombatantSnapshot,
+    DamageResult,
+    EquipmentSnapshot,
+    FightResult,
+    get_weapon_wear,
+    resolve_damage,
+    resolve_fight,
+)
 from fallout.constants import *  # noqa
 from fallout.enums import *  # noqa
+from fallout.formulas import NEEDS_EVALUATOR, STATS_INDEXES, STATS_NAMES, get_affected_stats, get_stats_evaluator
+from fallout.levels import get_experience_level, get_level_experience
 
 
 gv, sv = getattr, setattr
@@ -38,6 +59,74 @@ def _assert(condition, message: str = None) -> None:
         raise AssertionError(message)
 
 
+def get_random_sum(minimum: int, maximum: int, count: int = 1) -> int:
+    """
+    Tire la somme de plusieurs valeurs aléatoires uniformes en temps constant
+    (approximation normale au-delà d'un certain nombre de tirages)
+    :param minimum: Valeur minimale d'un tirage
+    :param maximum: Valeur maximale d'un tirage
+    :param count: Nombre de tirages
+    :return: Somme des tirages
+    """
+    if count <= 0:
+        return 0
+    if minimum == maximum:
+        return minimum * count
+    minimum, maximum = min(minimum, maximum), max(minimum, maximum)
+    if count <= RANDOM_SUM_EXACT_LIMIT:
+        return sum(randint(minimum, maximum) for _ in range(count))
+    mean = count * (minimum + maximum) / 2
+    deviation = sqrt(count * ((maximum - minimum + 1) ** 2 - 1) / 12)
+    return min(max(round(gauss(mean, deviation)), minimum * count), maximum * count)
+
+
+def get_random_distribution(names: List[str], points: int, costs: Dict[str, int] = None) -> Counter:
+    """
+    Répartit aléatoirement et uniformément des points entre plusieurs noms par tirages groupés
+    (équivalent à un tirage point par point jusqu'à épuisement des points, chaque point pouvant avoir un coût)
+    :param names: Noms entre lesquels répartir les points
+    :param points: Nombre de points à dépenser
+    :param costs: Coût d'un point pour chaque nom (1 par défaut)
+    :return: Nombre de points attribués par nom
+    """
+    costs = costs or {}
+    distribution = Counter()
+    max_cost = max((costs.get(name, 1) for name in names), default=1)
+    while points > 0 and names:
+        # All these draws would have happened one by one before running out of points
+        draws = Counter(choices(names, k=max(points // max_cost, 1)))
+        distribution.update(draws)
+        points -= sum(costs.get(name, 1) * count for name, count in draws.items())
+    return distribution
+
+
+def get_balanced_values(values: Dict[str, int], total: int, bounds: Dict[str, Tuple[int, int]]) -> Dict[str, int]:
+    """
+    Ajuste des valeurs pour que leur somme atteigne un total en respectant leurs bornes
+    (les valeurs les plus basses sont augmentées en premier, les plus hautes sont diminuées en premier)
+    :param values: Valeurs par nom
+    :param total: Total à atteindre
+    :param bounds: Bornes minimale et maximale par nom
+    :return: Valeurs ajustées
+    """
+    values = dict(values)
+    left = total - sum(values.values())
+    shift = -1 if left < 0 else 1
+    left = abs(left)
+    while left:
+        candidates = [
+            name
+            for name, value in sorted(values.items(), key=lambda e: e[1] * shift)
+            if (value < bounds[name][1] if shift > 0 else value > bounds[name][0])
+        ]
+        if not candidates:
+            break
+        for name in candidates[:left]:
+            values[name] += shift
+        left -= min(left, len(candidates))
+    return values
+
+
 def get_thumbnails(directory: str = "") -> List[Tuple[str, str]]:
     """
     Scanne les images le répertoire "medias" à la recherche de miniatures
@@ -98,172 +187,466 @@ def get_class(
     return default
 
 
-@dataclasses.dataclass
+# Equipements dont les modificateurs sont pris en compte dans les statistiques
+STATS_EQUIPMENT_FILTER = ~Q(slot="") | Q(item__type__in=(ITEM_EXTRA, ITEM_TOOL))
+# Lecture groupée des statistiques modifiables d'un personnage
+STATS_GETTER = attrgetter(*STATS_NAMES)
+# Valeurs par défaut des statistiques modifiables
+STATS_DEFAULTS = array("i", (5 if stats_name in LIST_SPECIALS else 0 for stats_name in STATS_NAMES))
+
+
+def get_survival_levels(values: Dict[str, Any]) -> Tuple[int, ...]:
+    """
+    Retourne le palier atteint pour chacun des besoins (voir SURVIVAL_EFFECTS)
+    :param values: Valeurs des besoins
+    :return: Index du palier de chaque besoin
+    """
+    levels = []
+    for stats_name, survival in SURVIVAL_EFFECTS:
+        value = values.get(stats_name) or 0.0
+        levels.append(
+            next(
+                (index for index, (mini, maxi) in enumerate(survival) if (mini or 0) <= value < (maxi or float("inf"))),
+                -1,
+            )
+        )
+    return tuple(levels)
+
+
+# Champs du personnage utilisés dans le calcul des statistiques
+CHARACTER_STATS_FIELDS = frozenset(
+    STATS_NAMES + ("level", "race", "tag_skills", "has_stats", "campaign", "campaign_id")
+)
+# Champs du personnage modifiés par le passage du temps (écriture groupée)
+CHARACTER_TIME_FIELDS = (
+    "health",
+    "action_points",
+    "rads",
+    "thirst",
+    "hunger",
+    "sleep",
+    "regeneration",
+    "money",
+    "karma",
+)
+# Calcul de la charge portée par un personnage
+STATS_CHARGE_SUM = Sum(F("quantity") * F("item__weight"), output_field=models.FloatField())
+
+
 class Stats:
     """
     Statistiques actuelles du personnage
+    Les valeurs sont stockées dans un vecteur d'entiers ordonné selon LIST_EDITABLE_STATS
+    et restent accessibles par attribut (ex : stats.strength)
     """
 
-    # S.P.E.C.I.A.L.
-    strength: int = 5
-    perception: int = 5
-    endurance: int = 5
-    charisma: int = 5
-    intelligence: int = 5
-    agility: int = 5
-    luck: int = 5
-    # Secondary statistics
-    max_health: int = 0
-    max_action_points: int = 0
-    armor_class: int = 0
-    carry_weight: int = 0
-    melee_damage: int = 0
-    sequence: int = 0
-    healing_rate: int = 0
-    ap_cost_modifier: int = 0
-    one_hand_accuracy: int = 0
-    two_hands_accuracy: int = 0
-    damage_modifier: int = 0
-    critical_chance: int = 0
-    critical_raw_chance: int = 0
-    critical_damage: int = 0
-    # Skills
-    small_guns: int = 0
-    big_guns: int = 0
-    energy_weapons: int = 0
-    unarmed: int = 0
-    melee_weapons: int = 0
-    throwing: int = 0
-    athletics: int = 0
-    detection: int = 0
-    first_aid: int = 0
-    doctor: int = 0
-    chems: int = 0
-    sneak: int = 0
-    lockpick: int = 0
-    steal: int = 0
-    traps: int = 0
-    explosives: int = 0
-    science: int = 0
-    repair: int = 0
-    computers: int = 0
-    electronics: int = 0
-    speech: int = 0
-    deception: int = 0
-    barter: int = 0
-    survival: int = 0
-    knowledge: int = 0
-    # Leveled stats
-    hit_points_per_level: int = 0
-    skill_points_per_level: int = 0
-    perk_rate: int = 0
-    # Resistances
-    damage_threshold: int = 0
-    damage_resistance: int = 0
-    normal_threshold: int = 0
-    normal_resistance: int = 0
-    laser_threshold: int = 0
-    laser_resistance: int = 0
-    plasma_threshold: int = 0
-    plasma_resistance: int = 0
-    explosive_threshold: int = 0
-    explosive_resistance: int = 0
-    fire_threshold: int = 0
-    fire_resistance: int = 0
-    electricity_threshold: int = 0
-    electricity_resistance: int = 0
-    poison_threshold: int = 0
-    poison_resistance: int = 0
-    radiation_threshold: int = 0
-    radiation_resistance: int = 0
-    gas_contact_threshold: int = 0
-    gas_contact_resistance: int = 0
-    gas_inhaled_threshold: int = 0
-    gas_inhaled_resistance: int = 0
-    # Modifiers
-    charge: float = 0.0
-    modifiers: dict = dataclasses.field(init=False)
-
-    def __post_init__(self):
+    __slots__ = (
+        "values",
+        "charge",
+        "raw",
+        "base",
+        "_modifiers",
+        "character_modifiers",
+        "character",
+        "initial",
+        "carry_effects",
+        "clamped",
+    )
+
+    def __init__(self, values: Optional[Iterable[int]] = None, charge: float = 0.0, **stats: int):
+        """
+        Initialisation des statistiques
+        :param values: Valeurs ordonnées des statistiques (optionnel)
+        :param charge: Charge portée
+        :param stats: Valeurs individuelles des statistiques
+        """
+        self.values = array("i", STATS_DEFAULTS if values is None else values)
+        self.charge = charge
+        for stats_name, value in stats.items():
+            sv(self, stats_name, value)
         self.raw = {}
-        self.base = {}
-        self.modifiers = {}
+        self.base = array("i", self.values)
+        self._modifiers = {}
         self.character_modifiers = {}
         self.character = None
+        # Incremental computation
+        self.initial = {}
+        self.carry_effects = {}
+        self.clamped = set()
+
+    @property
+    def modifiers(self) -> Dict[str, int]:
+        """
+        Ecarts entre les statistiques et leurs valeurs de base
+        """
+        if self._modifiers is None:
+            self._modifiers = {
+                stats_name: value - base_value
+                for stats_name, value, base_value in zip(STATS_NAMES, self.values, self.base)
+                if value != base_value
+            }
+        return self._modifiers
+
+    @modifiers.setter
+    def modifiers(self, modifiers: Dict[str, int]) -> None:
+        self._modifiers = modifiers
+
+    def __eq__(self, other):
+        if not isinstance(other, Stats):
+            return NotImplemented
+        return self.values == other.values and self.charge == other.charge and self.modifiers == other.modifiers
+
+    def __repr__(self):
+        values = ", ".join(f"{stats_name}={value}" for stats_name, value in zip(STATS_NAMES, self.values))
+        return f"Stats({values}, charge={self.charge})"
+
+    def __getstate__(self):
+        # The character is not shared through the stats cache
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["character"] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def to_row(self) -> Dict[str, Union[int, float, dict]]:
+        """
+        Retourne les valeurs à enregistrer dans la table des statistiques
+        :return: Valeurs par champ
+        """
+        return dict(zip(STATS_NAMES, self.values), charge=self.charge, modifiers=self.modifiers)
+
+    def get_threshold(self, damage_type: str = DAMAGE_NORMAL) -> int:
+        """
+        Récupère l'absorption de dégâts d'un type particulier
+        """
+        return gv(self, damage_type + "_threshold", 0)
+
+    def get_resistance(self, damage_type: str = DAMAGE_NORMAL) -> int:
+        """
+        Récupère la résistance aux dégâts d'un type
+        """
+        return gv(self, damage_type + "_resistance", 0)
+
+    def diff(self, other: Union["Stats", Iterable[int]]) -> Dict[str, int]:
+        """
+        Compare les statistiques avec un autre instantané
+        :param other: Autres statistiques (ou vecteur de valeurs)
+        :return: Valeurs actuelles des statistiques qui diffèrent
+        """
+        other = other.values if isinstance(other, Stats) else other
+        return {
+            STATS_NAMES[index]: value
+            for index, (value, other_value) in enumerate(zip(self.values, other))
+            if value != other_value
+        }
 
     @staticmethod
-    def get(character: "Character") -> "Stats":
+    def get(
+        character: "Character",
+        modifiers: Optional[Dict[str, int]] = None,
+        campaign_modifiers: Optional[Dict[str, int]] = None,
+        charge: Optional[float] = None,
+        compiled: bool = True,
+    ) -> "Stats":
         """
         Récupère toutes les statistiques à jour d'un personnage
         :param character: Personnage
+        :param modifiers: Modificateurs agrégés des équipements et effets actifs du personnage (optionnel)
+        :param campaign_modifiers: Modificateurs agrégés des effets actifs de la campagne (optionnel)
+        :param charge: Charge totale préchargée (optionnel)
+        :param compiled: Utilise l'évaluateur compilé de la race du personnage ?
         :return: Statistiques
         """
         stats = Stats()
         stats.character = character
+        # Equipment & active effects modifiers
+        if modifiers is None or campaign_modifiers is None:
+            all_modifiers, all_campaign_modifiers = Stats.get_modifiers([character])
+            modifiers = all_modifiers.get(character.pk, {}) if modifiers is None else modifiers
+            campaign_modifiers = (
+                all_campaign_modifiers.get(character.campaign_id, {})
+                if campaign_modifiers is None
+                else campaign_modifiers
+            )
+        # Charge
+        if charge is None:
+            charge = character.equipments.aggregate(charge=STATS_CHARGE_SUM).get("charge")
+        stats.charge = charge or 0.0
+        if compiled:
+            stats.evaluate(character, modifiers, campaign_modifiers)
+        else:
+            stats.interpret(character, modifiers, campaign_modifiers)
+        return stats
+
+    def evaluate(self, character: "Character", modifiers: Dict[str, int], campaign_modifiers: Dict[str, int]) -> None:
+        """
+        Calcule les statistiques du personnage avec l'évaluateur compilé de sa race
+        :param character: Personnage
+        :param modifiers: Modificateurs agrégés des équipements et effets actifs du personnage
+        :param campaign_modifiers: Modificateurs agrégés des effets actifs de la campagne
+        :return: Rien
+        """
+        vector = list(STATS_GETTER(character))
+        base = vector.copy()
+        tags = [STATS_INDEXES[skill] for skill in set(character.tag_skills) if skill in STATS_INDEXES]
+        self.raw, clamped, self.initial, self.carry_effects = get_stats_evaluator(character.race)(
+            vector,
+            base,
+            character.level,
+            tags,
+            modifiers,
+            campaign_modifiers,
+            self.charge,
+            character,
+            self.change_stats,
+        )
+        self.clamped.update(clamped)
+        self.values = array("i", vector)
+        self.base = array("i", base)
+        # Modifiers are only computed when they are read
+        self._modifiers = None
+
+    def interpret(self, character: "Character", modifiers: Dict[str, int], campaign_modifiers: Dict[str, int]) -> None:
+        """
+        Calcule les statistiques du personnage en interprétant directement les formules et effets
+        :param character: Personnage
+        :param modifiers: Modificateurs agrégés des équipements et effets actifs du personnage
+        :param campaign_modifiers: Modificateurs agrégés des effets actifs de la campagne
+        :return: Rien
+        """
         # Get all character's stats
+        base = {}
         for stats_name in LIST_EDITABLE_STATS:
-            stats.base[stats_name] = gv(character, stats_name, 0)
-            sv(stats, stats_name, gv(character, stats_name, 0))
+            base[stats_name] = gv(character, stats_name, 0)
+            sv(self, stats_name, gv(character, stats_name, 0))
         # Racial modifiers
         race_stats = RACES_STATS.get(character.race, {})
-        stats.change_all_stats(limit=True, **race_stats)
+        self.change_all_stats(limit=True, **race_stats)
         for stats_name, (value, mini, maxi) in race_stats.items():
-            stats.base[stats_name] = (stats.base.get(stats_name) or 0) + (value or 0)
+            base[stats_name] = (base.get(stats_name) or 0) + (value or 0)
         # Tag skills
         for skill in set(character.tag_skills):
-            stats.base[skill] = (stats.base.get(skill) or 0) + TAG_SKILL_BONUS
-            stats.change_stats(skill, TAG_SKILL_BONUS, raw=False)
+            base[skill] = (base.get(skill) or 0) + TAG_SKILL_BONUS
+            self.change_stats(skill, TAG_SKILL_BONUS, raw=False)
         # Base statistics
-        base_stats = to_object(stats.base)
+        base_stats = to_object(base)
         base_stats.level = character.level
         for stats_name, formula in COMPUTED_STATS:
-            result = stats.base[stats_name] = stats.base.get(stats_name, 0) + formula(base_stats, base_stats)
+            result = base[stats_name] = base.get(stats_name, 0) + formula(base_stats, base_stats)
             sv(base_stats, stats_name, result)
         # Survival modifiers
         for stats_name, survival in SURVIVAL_EFFECTS:
             for (mini, maxi), effects in survival.items():
                 if (mini or 0) <= gv(character, stats_name, 0) < (maxi or float("inf")):
-                    stats.change_all_stats(**effects)
+                    self.change_all_stats(**effects)
                     break
-        # Equipment modifiers
-        for equipment in character.inventory.filter(~Q(slot="") | Q(item__type__in=(ITEM_EXTRA, ITEM_TOOL))):
-            for count in range(equipment.quantity):
-                for modifier in equipment.item.modifiers.all():
-                    stats.change_stats(modifier.stats, modifier.calculated_value)
-        # Active effects modifiers
-        for effect in character.effects.exclude(effect__modifiers__isnull=True):
-            for modifier in effect.effect.modifiers.all():
-                stats.change_stats(modifier.stats, modifier.calculated_value)
+        # Equipment & active effects modifiers
+        for stats_name, value in modifiers.items():
+            self.change_stats(stats_name, value)
         # Campaign effects modifiers
-        if character.campaign:
-            for effect in character.campaign.effects.exclude(effect__modifiers__isnull=True):
-                for modifier in effect.effect.modifiers.all():
-                    stats.change_stats(modifier.stats, modifier.calculated_value, limit=False)
+        for stats_name, value in campaign_modifiers.items():
+            self.change_stats(stats_name, value, limit=False)
         # Carry weight & charge
+        self.initial = {stats_name: gv(self, stats_name, 0) for stats_name in LIST_COMPUTED_STATS}
         for stats_name, formula in COMPUTED_STATS[:1]:  # Only carry weight formula (1st in list)
-            stats.change_stats(stats_name, formula(stats, character) + stats.raw.get(stats_name, 0), raw=False)
-        stats.charge = (
-            character.equipments.aggregate(
-                charge=Sum(F("quantity") * F("item__weight"), output_field=models.FloatField())
-            ).get("charge")
-            or 0.0
-        )
-        charge_rate = (stats.charge / (stats.carry_weight or 1)) * 100.0
-        for (mini, maxi), effects in CARRY_WEIGHT_EFFECTS.items():
-            if (mini or 0.0) <= charge_rate < (maxi or float("inf")):
-                stats.change_all_stats(**effects)
-                break
+            self.change_stats(stats_name, formula(self, character) + self.raw.get(stats_name, 0), raw=False)
+        self.carry_effects = self.get_carry_weight_effects()
+        self.change_all_stats(**self.carry_effects)
         # Derivated statistics
         for stats_name, formula in COMPUTED_STATS[1:]:  # Except carry weight
-            stats.change_stats(stats_name, formula(stats, character) + stats.raw.get(stats_name, 0), raw=False)
+            self.change_stats(stats_name, formula(self, character) + self.raw.get(stats_name, 0), raw=False)
+        self.base = array("i", (base.get(stats_name, 0) for stats_name in STATS_NAMES))
         # Modifiers
         for stats_name in LIST_EDITABLE_STATS:
-            from_base = stats.base.get(stats_name, 0)
-            from_stats = gv(stats, stats_name, 0)
+            from_base = base.get(stats_name, 0)
+            from_stats = gv(self, stats_name, 0)
             if from_base == from_stats:
                 continue
-            stats.modifiers[stats_name] = from_stats - from_base
-        return stats
+            self.modifiers[stats_name] = from_stats - from_base
+
+    @staticmethod
+    def get_modifier_groups(
+        character_ids: Iterable[int], campaign_ids: Iterable[int] = ()
+    ) -> Tuple[Dict[int, list], Dict[int, list], Dict[int, list]]:
+        """
+        Regroupe et compte en base de données les modificateurs identiques des équipements et des effets actifs
+        de plusieurs personnages et des effets actifs de plusieurs campagnes
+        :param character_ids: Identifiants des personnages
+        :param campaign_ids: Identifiants des campagnes
+        :return: Groupes (statistique, minimum, maximum, valeur brute, nombre) des équipements par personnage,
+            des effets actifs par personnage et des effets actifs par campagne
+        """
+        character_ids, campaign_ids = set(filter(None, character_ids)), set(filter(None, campaign_ids))
+
+        def get_groups(queryset: models.QuerySet, owner: str, relation: str, count) -> Dict[int, list]:
+            # Identical modifiers are grouped and counted in the database
+            groups: Dict[int, list] = {}
+            for owner_id, *group in (
+                queryset.filter(**{f"{relation}__isnull": False})
+                .order_by()
+                .values_list(
+                    owner,
+                    f"{relation}__stats",
+                    f"{relation}__min_value",
+                    f"{relation}__max_value",
+                    f"{relation}__raw_value",
+                )
+                .annotate(total=count)
+            ):
+                if group[-1]:
+                    groups.setdefault(owner_id, []).append(group)
+            return groups
+
+        equipment_groups, effect_groups, campaign_groups = {}, {}, {}
+        if character_ids:
+            # Equipment modifiers
+            equipment_groups = get_groups(
+                Equipment.objects.filter(STATS_EQUIPMENT_FILTER, character_id__in=character_ids),
+                "character_id",
+                "item__modifiers",
+                Sum("quantity"),
+            )
+            # Active effects modifiers
+            effect_groups = get_groups(
+                CharacterEffect.objects.filter(character_id__in=character_ids),
+                "character_id",
+                "effect__modifiers",
+                Count("id"),
+            )
+        # Campaign effects modifiers
+        if campaign_ids:
+            campaign_groups = get_groups(
+                CampaignEffect.objects.filter(campaign_id__in=campaign_ids),
+                "campaign_id",
+                "effect__modifiers",
+                Count("id"),
+            )
+        return equipment_groups, effect_groups, campaign_groups
+
+    @staticmethod
+    def draw_modifiers(*groups: Iterable[list]) -> Counter:
+        """
+        Tire les valeurs de modificateurs regroupés
+        :param groups: Groupes de modificateurs (statistique, minimum, maximum, valeur brute, nombre)
+        :return: Valeurs des modificateurs par statistique
+        """
+        values = Counter()
+        for stats_name, min_value, max_value, raw_value, total in chain.from_iterable(groups):
+            values[stats_name] += get_random_sum(min_value, max_value, total) + raw_value * total
+        return values
+
+    @staticmethod
+    def get_modifiers(characters: Iterable["Character"]) -> Tuple[Dict[int, Counter], Dict[int, Counter]]:
+        """
+        Agrège en base de données les modificateurs des équipements et des effets actifs de plusieurs personnages
+        :param characters: Personnages
+        :return: Modificateurs par personnage et modificateurs par campagne
+        """
+        characters = list(characters)
+        equipment_groups, effect_groups, campaign_groups = Stats.get_modifier_groups(
+            [character.pk for character in characters], [character.campaign_id for character in characters]
+        )
+        modifiers = {
+            character_id: Stats.draw_modifiers(
+                equipment_groups.get(character_id, []), effect_groups.get(character_id, [])
+            )
+            for character_id in equipment_groups.keys() | effect_groups.keys()
+        }
+        campaign_modifiers = {
+            campaign_id: Stats.draw_modifiers(groups) for campaign_id, groups in campaign_groups.items()
+        }
+        return modifiers, campaign_modifiers
+
+    @staticmethod
+    def get_many(characters: Iterable["Character"]) -> Dict[int, "Stats"]:
+        """
+        Récupère les statistiques à jour de plusieurs personnages en un nombre fixe de requêtes
+        :param characters: Personnages
+        :return: Statistiques par identifiant de personnage
+        """
+        characters = [character for character in characters if character.pk]
+        if not characters:
+            return {}
+        modifiers, campaign_modifiers = Stats.get_modifiers(characters)
+        charges = dict(
+            Equipment.objects.filter(character_id__in={character.pk for character in characters})
+            .order_by()
+            .values("character_id")
+            .annotate(charge=STATS_CHARGE_SUM)
+            .values_list("character_id", "charge")
+        )
+        return {
+            character.pk: Stats.get(
+                character,
+                modifiers=modifiers.get(character.pk, {}),
+                campaign_modifiers=campaign_modifiers.get(character.campaign_id, {}),
+                charge=charges.get(character.pk),
+            )
+            for character in characters
+        }
+
+    def get_carry_weight_effects(self) -> Dict[str, Tuple[int, Optional[int], Optional[int]]]:
+        """
+        Retourne les effets liés à la charge portée
+        :return: Effets par statistique
+        """
+        charge_rate = (self.charge / (self.carry_weight or 1)) * 100.0
+        for (mini, maxi), effects in CARRY_WEIGHT_EFFECTS.items():
+            if (mini or 0.0) <= charge_rate < (maxi or float("inf")):
+                return effects
+        return {}
+
+    def update(self, character: Optional["Character"] = None, **modifiers: int) -> Optional[List[str]]:
+        """
+        Met à jour les statistiques de manière incrémentale suite au changement de modificateurs fixes
+        en ne recalculant que les statistiques qui en dépendent
+        :param character: Personnage (si les statistiques proviennent du cache)
+        :param modifiers: Valeurs des modificateurs à ajouter (ou à retirer) par statistique
+        :return: Liste des statistiques modifiées ou None si un recalcul complet est nécessaire
+        """
+        self.character = character or self.character
+        if not self.character or not self.initial:
+            return None
+        # Clamped values or statistics held by the character cannot be changed incrementally
+        for stats_name in modifiers:
+            if stats_name not in LIST_EDITABLE_STATS or stats_name in self.clamped:
+                return None
+        previous = self.values[:]
+        for stats_name, value in modifiers.items():
+            self.change_stats(stats_name, value)
+        if self.clamped.intersection(modifiers):
+            return None
+        affected = get_affected_stats(modifiers)
+        for stats_name, formula in COMPUTED_STATS[:1]:  # Only carry weight formula (1st in list)
+            if stats_name not in affected:
+                continue
+            sv(self, stats_name, self.initial.get(stats_name, 0))
+            self.change_stats(stats_name, formula(self, self.character) + self.raw.get(stats_name, 0), raw=False)
+            carry_effects = self.get_carry_weight_effects()
+            if carry_effects != self.carry_effects:
+                if any(name not in LIST_COMPUTED_STATS for name in (*self.carry_effects, *carry_effects)):
+                    return None
+                for name, (value, *limits) in self.carry_effects.items():
+                    self.change_stats(name, -value)
+                self.carry_effects = carry_effects
+                self.change_all_stats(**carry_effects)
+                affected = get_affected_stats((*modifiers, *carry_effects))
+        for stats_name, formula in COMPUTED_STATS[1:]:  # Except carry weight
+            if stats_name not in affected:
+                continue
+            sv(self, stats_name, self.initial.get(stats_name, 0))
+            self.change_stats(stats_name, formula(self, self.character) + self.raw.get(stats_name, 0), raw=False)
+        # Modifiers
+        changes = self.diff(previous)
+        for stats_name, value in changes.items():
+            difference = value - self.base[STATS_INDEXES[stats_name]]
+            if difference:
+                self.modifiers[stats_name] = difference
+            else:
+                self.modifiers.pop(stats_name, None)
+        return list(changes)
 
     def change_all_stats(self, limit: bool = False, **stats: Tuple[int, Optional[int], Optional[int]]) -> None:
         for name, values in stats.items():
@@ -291,11 +674,372 @@ class Stats:
         else:
             mini, maxi = 0, float("+inf")  # type: ignore
         result = min(max(gv(target, name, 0) + value, mini), maxi)
+        if raw and not limit and result != gv(target, name, 0) + value:
+            self.clamped.add(name)
         sv(target, name, result)
         if isinstance(target, Character):
             self.character_modifiers[name] = result
 
 
+def _get_stats_property(index: int) -> property:
+    def getter(self: Stats) -> int:
+        return self.values[index]
+
+    def setter(self: Stats, value: int) -> None:
+        self.values[index] = value
+
+    return property(getter, setter)
+
+
+for _index, _stats_name in enumerate(STATS_NAMES):
+    sv(Stats, _stats_name, _get_stats_property(_index))
+del _index, _stats_name
+
+
+# Unité de travail courante (par requête ou par tâche)
+_stats_unit_of_work: ContextVar[Optional["StatsUnitOfWork"]] = ContextVar("stats_unit_of_work", default=None)
+
+
+class StatsUnitOfWork(ContextDecorator):
+    """
+    Unité de travail différant l'écriture des statistiques calculées et des personnages modifiés par ce calcul
+    jusqu'à la fin d'une requête ou d'une tâche (une seule écriture par personnage)
+    Utilisable en tant que gestionnaire de contexte ou décorateur
+    (les unités imbriquées réutilisent l'unité courante)
+    """
+
+    def __init__(self):
+        self.statistics: Dict[int, "Statistics"] = {}
+        self.characters: Dict[int, Tuple["Character", set]] = {}
+        self.obsolete: set = set()
+        self.token = None
+
+    @staticmethod
+    def current() -> Optional["StatsUnitOfWork"]:
+        """
+        Retourne l'unité de travail courante
+        :return: Unité de travail ou None si aucune n'est active
+        """
+        return _stats_unit_of_work.get()
+
+    def __enter__(self) -> "StatsUnitOfWork":
+        current = _stats_unit_of_work.get()
+        if current is not None:
+            return current
+        self.token = _stats_unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if self.token is None:
+            return False
+        _stats_unit_of_work.reset(self.token)
+        self.token = None
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
+
+    def _recreate_cm(self) -> "StatsUnitOfWork":
+        # Each decorated call gets its own unit of work
+        return self.__class__()
+
+    def __contains__(self, character_id: int) -> bool:
+        return character_id in self.statistics or character_id in self.obsolete
+
+    def get_statistics(self, character_id: int) -> Optional["Statistics"]:
+        """
+        Retourne les statistiques en attente d'écriture d'un personnage
+        :param character_id: Identifiant du personnage
+        :return: Statistiques ou None
+        """
+        return self.statistics.get(character_id)
+
+    def add_statistics(self, character: "Character", stats: Stats) -> "Statistics":
+        """
+        Enregistre les statistiques calculées d'un personnage pour une écriture différée
+        :param character: Personnage
+        :param stats: Statistiques calculées
+        :return: Statistiques (non sauvegardées)
+        """
+        statistics = Statistics(character=character, obsolete=False, date=now(), **stats.to_row())
+        self.statistics[character.pk] = statistics
+        self.obsolete.discard(character.pk)
+        return statistics
+
+    def add_character(self, character: "Character", *fields: str) -> None:
+        """
+        Enregistre les champs modifiés d'un personnage pour une écriture différée
+        :param character: Personnage
+        :param fields: Champs modifiés
+        :return: Rien
+        """
+        instance, all_fields = self.characters.setdefault(character.pk, (character, set()))
+        if instance is not character:
+            self.characters[character.pk] = (character, all_fields)
+        all_fields.update(fields)
+
+    def reset(self, *character_ids: int) -> None:
+        """
+        Rend obsolètes les statistiques de personnages (l'écriture est également différée)
+        :param character_ids: Identifiants des personnages
+        :return: Rien
+        """
+        for character_id in character_ids:
+            self.statistics.pop(character_id, None)
+            self.obsolete.add(character_id)
+
+    def flush(self) -> None:
+        """
+        Ecrit en masse les statistiques et les personnages en attente
+        :return: Rien
+        """
+        statistics, obsolete, characters = list(self.statistics.values()), self.obsolete, self.characters.values()
+        self.statistics, self.obsolete, self.characters = {}, set(), {}
+        if statistics:
+            features = connections[router.db_for_write(Statistics)].features
+            Statistics.objects.bulk_create(
+                statistics,
+                update_conflicts=True,
+                unique_fields=["character"] if features.supports_update_conflicts_with_target else None,
+                update_fields=[field.name for field in Statistics._meta.concrete_fields if not field.primary_key],
+            )
+        if obsolete:
+            Statistics.objects.filter(character_id__in=obsolete).update(obsolete=True)
+        groups: Dict[Tuple[str, ...], List["Character"]] = {}
+        for character, fields in characters:
+            groups.setdefault(tuple(sorted(fields)), []).append(character)
+        for fields, group in groups.items():
+            Character.objects.bulk_update(group, fields=fields)
+
+    def discard(self) -> None:
+        """
+        Abandonne les écritures en attente et rend obsolètes les statistiques concernées
+        :return: Rien
+        """
+        character_ids = self.obsolete.union(self.statistics)
+        self.statistics, self.obsolete, self.characters = {}, set(), {}
+        if not character_ids:
+            return
+        if connections[router.db_for_write(Statistics)].needs_rollback:
+            # The current transaction is broken and will be rolled back anyway
+            return
+        Statistics.objects.filter(character_id__in=character_ids).update(obsolete=True)
+
+
+class CombatRecorder:
+    """
+    Etape de persistance des résultats du moteur de combat (voir fallout.combat)
+    Les modifications d'état sont reportées immédiatement sur les personnages et équipements en mémoire,
+    leur écriture et celle des historiques est différée et faite en masse dans une seule transaction
+    (une rafale complète est ainsi enregistrée en quelques requêtes)
+    """
+
+    def __init__(self, simulation: bool = False):
+        """
+        Initialisation
+        :param simulation: Simulation (aucune écriture) ?
+        """
+        self.simulation = simulation
+        self.characters: Dict[int, "Character"] = {}
+        self.equipments: Dict[int, "Equipment"] = {}
+        self.damages: List["DamageHistory"] = []
+        self.fights: List["FightHistory"] = []
+        self.effects: List[Tuple["Effect", "Character"]] = []
+
+    def add_character(self, character: "Character") -> None:
+        """
+        Enregistre un personnage modifié pour une écriture différée
+        :param character: Personnage
+        :return: Rien
+        """
+        if not self.simulation:
+            self.characters[id(character)] = character
+
+    def add_equipment(self, equipment: "Equipment") -> None:
+        """
+        Enregistre un équipement modifié pour une écriture différée
+        :param equipment: Equipement
+        :return: Rien
+        """
+        if not self.simulation:
+            self.equipments[id(equipment)] = equipment
+
+    def add_fight(self, history: "FightHistory") -> None:
+        """
+        Enregistre un historique de combat pour une écriture différée
+        :param history: Historique de combat
+        :return: Rien
+        """
+        if not self.simulation:
+            self.fights.append(history)
+
+    def add_effect(self, effect: "Effect", character: "Character") -> None:
+        """
+        Enregistre un effet à l'impact à appliquer sur un personnage lors de l'enregistrement
+        :param effect: Effet
+        :param character: Personnage
+        :return: Rien
+        """
+        if not self.simulation:
+            self.effects.append((effect, character))
+
+    def apply_damage(
+        self,
+        character: "Character",
+        result: DamageResult,
+        save: bool = True,
+        log: bool = True,
+        reason: str = "",
+    ) -> "DamageHistory":
+        """
+        Applique les dégâts calculés par le moteur de combat sur un personnage
+        :param character: Personnage
+        :param result: Résultat des dégâts
+        :param save: Sauvegarder les modifications sur le personnage ?
+        :param log: Historise les dégâts ?
+        :param reason: Raison de l'origine des dégâts (facultatif)
+        :return: Historique des dégâts
+        """
+        history = DamageHistory(character=character, level=character.level, reason=reason, **result.get_history())
+        history.game_date = character.campaign and character.campaign.current_game_date
+        for attribute, value in result.changes.items():
+            sv(character, attribute, gv(character, attribute) + value)
+        if result.changes and save:
+            self.add_character(character)
+        if result.armor_id and not self.simulation:
+            armor_equipment = character.get_from_inventory(id=result.armor_id)
+            armor_equipment.condition -= result.armor_damage
+            self.add_equipment(armor_equipment)
+        if log and not result.ko and not self.simulation:
+            self.damages.append(history)
+        return history
+
+    def apply_weapon(self, equipment: "Equipment", result: FightResult, save: bool = True) -> None:
+        """
+        Applique l'utilisation d'une arme (munitions, quantité et état) calculée par le moteur de combat
+        :param equipment: Arme équipée
+        :param result: Résultat du coup
+        :param save: Sauvegarder les modifications sur l'arme ?
+        :return: Rien
+        """
+        if result.thrown and not self.simulation:
+            equipment.drop(quantity=result.quantity, save=False)
+        else:
+            equipment.quantity -= result.quantity
+        if result.clip_count:
+            equipment.clip_count -= result.clip_count
+        if result.condition:
+            equipment.condition -= result.condition
+        if save:
+            self.add_equipment(equipment)
+
+    def save(self) -> None:
+        """
+        Applique les effets à l'impact puis écrit les équipements, personnages et historiques en attente
+        :return: Rien
+        """
+        equipments, characters = self.equipments.values(), self.characters.values()
+        damages, fights, effects = self.damages, self.fights, self.effects
+        self.equipments, self.characters, self.damages, self.fights, self.effects = {}, {}, [], [], []
+        with transaction.atomic(using=router.db_for_write(FightHistory)):
+            # On hit effects are added for each hit, their modifiers are then applied once per target
+            targets = {}
+            for effect, character in effects:
+                effect.affect(character)
+                targets[id(character)] = character
+            for character in targets.values():
+                character.apply_effects()
+            updates = []
+            for equipment in equipments:
+                equipment.reset_character_stats(incremental=True)
+                if equipment.clean_state():
+                    equipment.delete()
+                elif equipment.pk:
+                    updates.append(equipment)
+            if updates:
+                Equipment.objects.bulk_update(updates, fields=("quantity", "clip_count", "condition"))
+            # Characters killed by the attack are all looted at once
+            dying = [character for character in characters if character.is_dying]
+            Character.loot_bulk(character for character in dying if character.loot_on_death)
+            for character in dying:
+                character.is_active = False
+            for character in characters:
+                # Health, action points and experience don't change statistics unless the character levels up
+                level = character.level
+                character.check_level()
+                character.save(reset=character.level != level)
+            if connections[router.db_for_write(FightHistory)].features.can_return_rows_from_bulk_insert:
+                DamageHistory.objects.bulk_create(damages)
+                FightHistory.objects.bulk_create(fights)
+                return
+            # Damage histories must have a primary key before being linked to fight histories
+            for history in damages + fights:
+                history.save()
+
+
+class InventoryIndex:
+    """
+    Index de l'inventaire chargé d'un personnage par identifiant, emplacement et arme secondaire
+    (les emplacements correspondent au type des objets équipés)
+    Tenu à jour lors de la sauvegarde ou de la suppression des équipements du personnage
+    """
+
+    def __init__(self, equipments: Iterable["Equipment"]):
+        """
+        Initialisation de l'index
+        :param equipments: Equipements de l'inventaire (dans l'ordre d'affichage)
+        """
+        self.equipments: List["Equipment"] = list(equipments)
+        self.build()
+
+    def build(self) -> None:
+        """
+        Construit les différentes clés d'accès aux équipements
+        :return: Rien
+        """
+        self.by_id: Dict[int, "Equipment"] = {}
+        self.by_slot: Dict[str, "Equipment"] = {}
+        self.secondary: Optional["Equipment"] = None
+        self._ammunitions: Optional[set] = None
+        for equipment in self.equipments:
+            self.by_id[equipment.pk] = equipment
+            if equipment.slot:
+                self.by_slot.setdefault(equipment.slot, equipment)
+            if equipment.secondary and self.secondary is None:
+                self.secondary = equipment
+
+    @property
+    def ammunitions(self) -> set:
+        """
+        Identifiants des munitions compatibles avec l'arme équipée
+        """
+        if self._ammunitions is None:
+            weapon = self.by_slot.get(ITEM_WEAPON)
+            self._ammunitions = set(weapon.item.ammunitions.values_list("id", flat=True)) if weapon else set()
+        return self._ammunitions
+
+    def update(self, equipment: "Equipment", deleted: bool = False) -> None:
+        """
+        Met à jour l'index suite à la modification d'un équipement
+        :param equipment: Equipement
+        :param deleted: Equipement supprimé ?
+        :return: Rien
+        """
+        equipments = [current for current in self.equipments if current.pk != equipment.pk]
+        if not deleted:
+            position = next(
+                (index for index, current in enumerate(self.equipments) if current.pk == equipment.pk),
+                len(equipments),
+            )
+            equipments.insert(position, equipment)
+        self.equipments = equipments
+        self.build()
+
+    def __iter__(self):
+        return iter(self.equipments)
+
+
 class Player(AbstractUser):
     """
     Joueur
@@ -392,6 +1136,7 @@ class Campaign(CommonModel):
         resting: bool = False,
         apply: bool = True,
         reset: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
     ) -> Tuple[Optional["Character"], List["DamageHistory"]]:
         """
         Détermine qui est le prochain personnage à agir
@@ -399,11 +1144,12 @@ class Campaign(CommonModel):
         :param resting: Temps de repos ?
         :param apply: Applique directement le changement sur la campagne
         :param reset: Réinitialise l'ordre de passage des personnages
+        :param progress: Fonction appelée avec l'avancement (personnages traités, total) du passage du temps
         :return: Personnage suivant potentiel, liste des dégâts
         """
         next_character = None
         if not reset:
-            characters = self.characters.filter(is_active=True).exclude(health__lte=0)
+            characters = self.characters.filter(is_active=True).exclude(health__lte=0).with_stats()
             characters = sorted(characters, key=lambda e: -e.stats.sequence)
             if self.current_character not in characters:
                 self.current_character = None
@@ -421,7 +1167,7 @@ class Campaign(CommonModel):
         if apply:
             self.current_game_date += timedelta(seconds=seconds)
             self.current_character = next_character
-            self.save(resting=resting)
+            self.save(resting=resting, progress=progress)
             # Reset character action points
             if (
                 self.current_character
@@ -437,12 +1183,12 @@ class Campaign(CommonModel):
         :return: Rien
         """
         self.current_character = None
-        for character in self.characters.all():
+        for character in self.characters.with_stats():
             character.action_points = character.stats.max_action_points
             character.save(reset=False)
         self.save()
 
-    def save(self, resting=False, *args, **kwargs):
+    def save(self, resting=False, progress=None, *args, **kwargs):
         """
         Sauvegarde la campagne
         """
@@ -453,20 +1199,27 @@ class Campaign(CommonModel):
         if hours <= 0:
             return
         self.damages = []
-        for effect in self.effects:
-            self.damages.extend(effect.apply_all(save=False))
-        for character in self.characters.filter(is_active=True).exclude(health__lte=0):
-            self.damages.extend(
-                character.update_needs(
-                    hours=hours,
-                    radiation=self.radiation,
-                    resting=resting,
-                    needs=self.needs,
-                    save=False,
-                )
+        # Only the effects due at the current date are loaded and applied
+        scheduler = EffectScheduler(self)
+        self.damages.extend(scheduler.apply_campaign_effects(save=False))
+        characters = list(self.characters.filter(is_active=True).exclude(health__lte=0).with_stats())
+        scheduler.load_character_effects(characters)
+        self.damages.extend(
+            Character.update_needs_bulk(
+                characters,
+                hours=hours,
+                radiation=self.radiation,
+                resting=resting,
+                needs=self.needs,
             )
-            self.damages.extend(character.apply_effects(save=False))
-            character.save()
+        )
+        for index, character in enumerate(characters, start=1):
+            self.damages.extend(character.apply_effects(save=False, effects=scheduler.pop(character.pk)))
+            if progress:
+                progress(index, len(characters))
+        # Only the characters crossing a threshold (death, level or survival) go through the complete save
+        Character.save_bulk(characters)
+        self._effects = None
 
     def get_absolute_url(self):
         """
@@ -643,6 +1396,73 @@ EQUIP_TITLE = _("Armure : <strong>{armor}</strong><br>Casque : <strong>{helmet}<
 EMPTY = _("absent")
 
 
+class CharacterQuerySet(EntityQuerySet):
+    """
+    QuerySet des personnages
+    """
+
+    _with_stats = _with_combat = False
+
+    def with_stats(self) -> "CharacterQuerySet":
+        """
+        Prépare le calcul groupé des statistiques des personnages lors de l'évaluation du QuerySet
+        :return: QuerySet
+        """
+        queryset = self.select_related("statistics")
+        queryset._with_stats = True
+        return queryset
+
+    def with_combat(self) -> "CharacterQuerySet":
+        """
+        Précharge tout ce dont ont besoin les actions de combat (campagne, statistiques, inventaire et effets actifs)
+        afin que le nombre de requêtes ne dépende pas du nombre de personnages chargés
+        :return: QuerySet
+        """
+        queryset = (
+            self.with_stats()
+            .select_related("campaign")
+            .prefetch_related(
+                Prefetch(
+                    "equipments",
+                    queryset=Equipment.objects.select_related("item")
+                    .prefetch_related(
+                        "item__modifiers",
+                        Prefetch(
+                            "item__effects",
+                            queryset=Effect.objects.select_related("next_effect", "cancel_effect"),
+                        ),
+                    )
+                    .order_by("item__name"),
+                ),
+                Prefetch(
+                    "active_effects",
+                    queryset=CharacterEffect.objects.select_related("effect__next_effect").prefetch_related(
+                        "effect__modifiers"
+                    ),
+                ),
+            )
+        )
+        queryset._with_combat = True
+        return queryset
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_stats = self._with_stats
+        clone._with_combat = self._with_combat
+        return clone
+
+    def _fetch_all(self):
+        prepare = self._result_cache is None and self._iterable_class is ModelIterable
+        super()._fetch_all()
+        if prepare and self._with_combat:
+            # Prefetched relations become the inventory and effects caches of each character
+            for character in self._result_cache:
+                character._inventory = character.equipments.all()
+                character._effects = character.active_effects.all()
+        if prepare and self._with_stats:
+            Character.prepare_stats(self._result_cache)
+
+
 class Character(Entity, BaseStatistics):
     """
     Personnage
@@ -716,20 +1536,149 @@ class Character(Entity, BaseStatistics):
     extra_data = JsonField(blank=True, null=True, verbose_name=_("données complémentaires"))
     # Cache
     charge = 0
-    _stats: Dict[str, float] = {}
-    _inventory = _equipment = _effects = None
+    _stats: StatsCache = StatsCache()
+    _inventory = _inventory_index = _equipment = _effects = None
+    objects = CharacterQuerySet.as_manager()
+
+    @staticmethod
+    def reset_stats(*characters: Union["Character", int]):
+        """
+        Réinitialise le calcul des statistiques pour un ou plusieurs personnages
+        """
+        character_ids = []
+        for character in characters:
+            if isinstance(character, Character):
+                character.statistics = None  # type: ignore
+                character = character.pk
+            if character:
+                character_ids.append(character)
+        if character_ids:
+            Character._stats.invalidate(*character_ids)
+            unit = StatsUnitOfWork.current()
+            if unit is not None:
+                unit.reset(*character_ids)
+            else:
+                Statistics.objects.filter(character_id__in=character_ids).update(obsolete=True)
+
+    @staticmethod
+    def reset_stats_bulk(campaign: Union["Campaign", int]) -> int:
+        """
+        Réinitialise en une seule requête le calcul des statistiques de tous les personnages d'une campagne
+        :param campaign: Campagne ou identifiant de campagne
+        :return: Nombre de statistiques invalidées
+        """
+        campaign_id = campaign.pk if isinstance(campaign, Campaign) else campaign
+        if not campaign_id:
+            return 0
+        Character._stats.invalidate_group(campaign_id)
+        unit = StatsUnitOfWork.current()
+        if unit is not None:
+            for character_id, statistics in list(unit.statistics.items()):
+                if statistics.character.campaign_id == campaign_id:
+                    unit.reset(character_id)
+        return Statistics.objects.filter(character__campaign_id=campaign_id, obsolete=False).update(obsolete=True)
+
+    @staticmethod
+    def get_targets(
+        targets: Iterable[Union["Character", int]], queryset: Optional["CharacterQuerySet"] = None
+    ) -> Dict[int, "Character"]:
+        """
+        Charge en une seule requête l'ensemble des personnages ciblés par une action
+        avec tout ce dont ont besoin les actions de combat
+        :param targets: Personnages (conservés tels quels) ou identifiants de personnages
+        :param queryset: QuerySet de recherche des personnages (facultatif)
+        :return: Personnages par identifiant
+        """
+        characters, ids = {}, []
+        for target in targets:
+            if isinstance(target, Character):
+                characters[target.pk] = target
+            else:
+                ids.append(int(target))
+        if ids:
+            queryset = (queryset if queryset is not None else Character.objects.all()).with_combat()
+            characters.update(queryset.in_bulk(ids))
+        return characters
 
     @staticmethod
-    def reset_stats(character: Union["Character", int]):
+    def prepare_stats(characters: Iterable["Character"]) -> None:
         """
-        Réinitialise le calcul des statistiques pour un personnage
+        Calcule et enregistre en masse les statistiques obsolètes d'un ensemble de personnages
+        :param characters: Personnages (idéalement avec leurs statistiques préchargées)
+        :return: Rien
         """
-        if isinstance(character, Character):
-            character.statistics = None  # type: ignore
-            character = character.pk
-        if character:
-            Character._stats.pop(character, None)  # type: ignore
-            Statistics.objects.filter(character_id=character).update(obsolete=True)
+        unit = StatsUnitOfWork.current()
+        characters = [
+            character
+            for character in characters
+            if character.pk
+            and character.has_stats
+            and (
+                (unit is not None and character.pk in unit)
+                or getattr(getattr(character, "statistics", None), "obsolete", True)
+            )
+        ]
+        if unit is not None:
+            # Statistics already computed during the current unit of work
+            for character in characters:
+                if unit.get_statistics(character.pk):
+                    character.statistics = unit.get_statistics(character.pk)
+            characters = [character for character in characters if not unit.get_statistics(character.pk)]
+        if not characters:
+            return
+        all_stats = Stats.get_many(characters)
+        to_create, to_update, current_date = [], [], now()
+        for character in characters:
+            stats = all_stats[character.pk]
+            Character._stats.set(character.pk, stats, group=character.campaign_id)
+            if unit is not None:
+                character.statistics = unit.add_statistics(character, stats)
+                continue
+            statistics = Statistics(character=character, obsolete=False, date=current_date, **stats.to_row())
+            (to_update if getattr(character, "statistics", None) else to_create).append(statistics)
+            character.statistics = statistics
+        if to_create:
+            Statistics.objects.bulk_create(to_create)
+        if to_update:
+            Statistics.objects.bulk_update(
+                to_update, fields=[field.name for field in Statistics._meta.concrete_fields if not field.primary_key]
+            )
+        # Character modifiers from statistics
+        for character in characters:
+            stats = all_stats[character.pk]
+            if stats.character_modifiers:
+                for key, value in stats.character_modifiers.items():
+                    sv(character, key, value)
+                if unit is not None:
+                    unit.add_character(character, *stats.character_modifiers)
+                else:
+                    character.save(reset=False)
+
+    def update_stats(self, **modifiers: int) -> bool:
+        """
+        Met à jour de manière incrémentale les statistiques calculées du personnage suite au changement de modificateurs
+        :param modifiers: Valeurs des modificateurs à ajouter (ou à retirer) par statistique
+        :return: Vrai si la mise à jour incrémentale a été possible, faux si un recalcul complet est nécessaire
+        """
+        stats = self.pk and self.has_stats and self._stats.get(self.pk, group=self.campaign_id)
+        changes = stats.update(character=self, **modifiers) if stats else None
+        if changes is None:
+            return False
+        self._stats.set(self.pk, stats, group=self.campaign_id)
+        unit = StatsUnitOfWork.current()
+        if changes and unit is not None:
+            self.statistics = unit.add_statistics(self, stats)
+        elif changes:
+            values = {stats_name: gv(stats, stats_name, 0) for stats_name in changes}
+            Statistics.objects.filter(character_id=self.pk, obsolete=False).update(
+                modifiers=stats.modifiers, **values
+            )
+            statistics = self._state.fields_cache.get("statistics")
+            if statistics:
+                for stats_name, value in values.items():
+                    sv(statistics, stats_name, value)
+                statistics.modifiers = stats.modifiers
+        return True
 
     @property
     def stats(self) -> Union[Statistics, Stats]:
@@ -739,21 +1688,43 @@ class Character(Entity, BaseStatistics):
         """
         if not self.has_stats:
             return self
+        unit = StatsUnitOfWork.current()
         try:
+            if unit is not None and self.pk in unit:
+                statistics = unit.get_statistics(self.pk)
+                _assert(statistics)
+                self.statistics = statistics
             _assert(not self.statistics.obsolete)
         except:  # noqa
-            stats: Union[Statistics, Stats] = self._stats.get(self.pk) or Stats.get(self)  # type: ignore
+            stats: Union[Statistics, Stats] = (
+                self.pk and self._stats.get(self.pk, group=self.campaign_id)
+            ) or Stats.get(self)
             if self.pk:
-                self._stats[self.pk] = stats
-                self.statistics, created = Statistics.objects.update_or_create(
-                    character=self,
-                    defaults=dict(obsolete=False, **dataclasses.asdict(stats)),
-                )
+                self._stats.set(self.pk, stats, group=self.campaign_id)
+                if unit is not None:
+                    self.statistics = unit.add_statistics(self, stats)
+                else:
+                    values = dict(obsolete=False, **stats.to_row())
+                    try:
+                        statistics = self.statistics
+                    except Statistics.DoesNotExist:
+                        statistics = None
+                    if statistics is None:
+                        statistics, created = Statistics.objects.update_or_create(character=self, defaults=values)
+                    else:
+                        # Only the statistics which differ from the loaded ones are written
+                        for key, value in values.items():
+                            sv(statistics, key, value)
+                        statistics.save()
+                    self.statistics = statistics
                 # Character modifiers from statistics
                 if stats.character_modifiers:
                     for key, value in stats.character_modifiers.items():
                         sv(self, key, value)
-                    self.save(reset=False)
+                    if unit is not None:
+                        unit.add_character(self, *stats.character_modifiers)
+                    else:
+                        self.save(reset=False)
             else:
                 return stats
         return self.statistics
@@ -781,16 +1752,35 @@ class Character(Entity, BaseStatistics):
         )
         return self._inventory
 
+    @property
+    def inventory_index(self) -> InventoryIndex:
+        """
+        Retourne l'index de l'inventaire du personnage (construit une seule fois par personnage chargé)
+        :return: Index de l'inventaire
+        """
+        if self._inventory_index is None:
+            self._inventory_index = InventoryIndex(self.inventory)
+        return self._inventory_index
+
     def get_from_inventory(self, many: bool = False, **criterias) -> Optional[Union["Equipment", List["Equipment"]]]:
         """
         Retourne un objet depuis l'inventaire correspondant aux critères
-        (optimisé si l'inventaire est déjà chargé)
+        (accès direct pour l'identifiant, l'emplacement ou l'arme secondaire)
         :param many: Retourne plusieurs objets ?
         :param criterias: Critères exacts de recherche
         :return: Un ou plusieurs objets
         """
+        index = self.inventory_index
+        if not many and len(criterias) == 1:
+            key, value = next(iter(criterias.items()))
+            if key in ("id", "pk"):
+                return index.by_id.get(value)
+            if key == "slot" and value:
+                return index.by_slot.get(value)
+            if key == "secondary" and value is True:
+                return index.secondary
         items: Optional[Union["Equipment", List["Equipment"]]] = [] if many else None
-        for item in self.inventory:
+        for item in index:
             found = True
             for key, value in criterias.items():
                 found &= bool(gv(item, key) == value)
@@ -800,6 +1790,29 @@ class Character(Entity, BaseStatistics):
                 items.append(item)  # type: ignore
         return items
 
+    def get_snapshot(self, equipments: bool = True) -> CombatantSnapshot:
+        """
+        Fige l'état du personnage pour le moteur de combat
+        :param equipments: Inclut les équipements portés ?
+        :return: Etat du personnage
+        """
+        stats = self.stats
+        snapshot = CombatantSnapshot(
+            stats=Stats(stats.values if isinstance(stats, Stats) else STATS_GETTER(stats)),
+            id=self.pk,
+            level=self.level,
+            has_stats=self.has_stats,
+            health=self.health,
+            action_points=self.action_points,
+        )
+        if equipments:
+            index = self.inventory_index
+            for slot, equipment in index.by_slot.items():
+                snapshot.equipments[slot] = EquipmentSnapshot.from_equipment(equipment)
+            if index.secondary:
+                snapshot.equipments.setdefault(WEAPON_TYPE_SECONDARY, EquipmentSnapshot.from_equipment(index.secondary))
+        return snapshot
+
     @property
     def effects(self) -> "CommonQuerySet[CharacterEffect]":
         """
@@ -1095,14 +2108,14 @@ class Character(Entity, BaseStatistics):
         """
         Retourne le nombre de points d'expérience nécessaires pour passer au niveau suivant
         """
-        return sum(level * BASE_XP for level in range(1, self.level + 1))
+        return get_level_experience(self.level + 1)
 
     @property
     def previous_required_experience(self) -> int:
         """
         Retourne le nombre de points d'expérience nécessaires pour le niveau précédent
         """
-        return sum(level * BASE_XP for level in range(1, self.level))
+        return get_level_experience(self.level)
 
     @property
     def required_experience(self) -> int:
@@ -1215,21 +2228,18 @@ class Character(Entity, BaseStatistics):
         Vérification du niveau en fonction de l'expérience
         :return: Niveau actuel, expérience requise jusqu'au niveau suivant
         """
-        level = 1
-        needed_xp = BASE_XP
-        while self.experience >= needed_xp:
-            level += 1
-            needed_xp += level * BASE_XP
-            if self.level >= level:
-                continue
-            self.level += 1
-            self.skill_points += self.stats.skill_points_per_level
-            if self.stats.perk_rate and not self.level % self.stats.perk_rate:
-                self.perk_points += 1
+        level = get_experience_level(self.experience)
+        if level > self.level:
+            # Gains of all the levels reached at once
+            previous_level, levels = self.level, level - self.level
+            self.level = level
+            self.skill_points += levels * self.stats.skill_points_per_level
+            if self.stats.perk_rate:
+                self.perk_points += level // self.stats.perk_rate - previous_level // self.stats.perk_rate
             if not self.has_stats:
-                self.max_health += self.stats.hit_points_per_level
-            self.health += self.stats.hit_points_per_level
-        return level, needed_xp
+                self.max_health += levels * self.stats.hit_points_per_level
+            self.health += levels * self.stats.hit_points_per_level
+        return level, get_level_experience(level + 1)
 
     def randomize_special(self, points: int = 40, save: bool = True, **kwargs) -> None:
         """
@@ -1240,25 +2250,12 @@ class Character(Entity, BaseStatistics):
         """
         points = points or 40
         race = RACES_STATS.get(self.race) or RACES_STATS.get(RACE_HUMAN)
-        points_min = points_max = 0
-        for stat in LIST_SPECIALS:
-            bonus, mini, maxi = race.get(stat, (0, 1, 10))
-            points_min += mini
-            points_max += maxi
+        bounds = {stat: race.get(stat, (0, 1, 10))[1:] for stat in LIST_SPECIALS}
+        points_min = sum(mini for mini, maxi in bounds.values())
+        points_max = sum(maxi for mini, maxi in bounds.values())
         points = max(min(points, points_max), points_min)
-        special = {}
-        for idx, stat in enumerate(LIST_SPECIALS):
-            bonus, mini, maxi = race.get(stat, (0, 1, 10))
-            special[stat] = randint(mini, maxi)
-        left = points - sum(special.values())
-        while left:
-            shift = -1 if left < 0 else 1
-            for stat, value in sorted(special.items(), key=lambda e: e[1] * shift):
-                bonus, mini, maxi = race.get(stat, (0, 1, 10))
-                special[stat] = max(min(value + shift, maxi), mini)
-                left = points - sum(special.values())
-                if not left:
-                    break
+        special = {stat: randint(mini, maxi) for stat, (mini, maxi) in bounds.items()}
+        special = get_balanced_values(special, points, bounds)
         for key, value in special.items():
             sv(self, key, value)
         # Reset health and action points to their maximum
@@ -1280,20 +2277,21 @@ class Character(Entity, BaseStatistics):
         # Experience points for the targeted level
         level = level or self.level or 1
         self.level = 1
-        self.experience = sum((lvl - 1) * BASE_XP for lvl in range(2, level + 1))
+        self.experience = get_level_experience(level)
         self.check_level()
         # Randomly distribute a fraction of the skill points on tag skills
         skill_points = self.skill_points - self.used_skill_points
+        distribution = Counter()
         if self.tag_skills:
-            for i in range(int(skill_points * (balance / 100))):
-                self.modify_value(choice(self.tag_skills), 1)
-                skill_points -= 1
-        # Randomly distribute remaining skill points on other skills
+            tag_points = int(skill_points * (balance / 100))
+            distribution.update(get_random_distribution(list(self.tag_skills), tag_points))
+            skill_points -= tag_points
+        # Randomly distribute remaining skill points on other skills (tag skills cost half as much)
         other_skills = list(set(LIST_SKILLS) - set(self.tag_skills)) if balance else list(LIST_SKILLS)
-        while skill_points > 0:
-            skill = choice(other_skills)
-            self.modify_value(skill, 1)
-            skill_points -= 1 if skill in self.tag_skills else 2
+        costs = {skill: 1 if skill in self.tag_skills else 2 for skill in other_skills}
+        distribution.update(get_random_distribution(other_skills, skill_points, costs))
+        for skill, value in distribution.items():
+            self.modify_value(skill, value)
         # Reset health and action points to their maximum
         self.heal(save=save)
 
@@ -1374,9 +2372,7 @@ class Character(Entity, BaseStatistics):
                 sv(self, stats_name, 0)
         stats = Stats.get(self)
         self.skill_points = 0
-        for stats_name, stats_value in dataclasses.asdict(stats).items():
-            if stats_name == "modifiers":
-                continue
+        for stats_name, stats_value in zip(STATS_NAMES, stats.values):
             if stats_name in LIST_SKILLS:
                 self.skill_points += stats_value * (2, 1)[stats_name in self.tag_skills]
             sv(self, stats_name, stats_value)
@@ -1425,29 +2421,111 @@ class Character(Entity, BaseStatistics):
         :param save: Sauvegarder les modifications sur le personnage ?
         :return: Dégâts potentiels infligés
         """
-        damages = []
-        if needs and self.has_needs:
-            for stats_name, formula in COMPUTED_NEEDS:
-                rate = -2.0 if stats_name == STATS_SLEEP and (resting or self.is_resting) else 1.0
-                rate *= NEEDS_RESTING_RATE if resting or self.is_resting else NEEDS_NORMAL_RATE
-                self.modify_value(stats_name, formula(self.stats, self) * hours * rate)
-        if radiation:
-            damage = self.damage(
-                raw_damage=radiation * hours,
-                damage_type=DAMAGE_RADIATION,
-                save=False,
-                log=False,
-            )
-            damage.reason = _("environnement radioactif")
-            damages.append(damage)
-        healing_rate_modifier = HEALING_RATE_RESTING_MULT if (resting or self.is_resting) else 1.0
-        print(healing_rate_modifier)
-        self.regeneration += max(self.stats.healing_rate * (hours / 24.0) * healing_rate_modifier, 0.0)
-        print(self.regeneration)
+        damages = Character.update_needs_bulk([self], hours=hours, radiation=radiation, resting=resting, needs=needs)
         if save:
             self.save(reset=False)
         return damages
 
+    @staticmethod
+    def update_needs_bulk(
+        characters: Iterable["Character"],
+        hours: float = 0.0,
+        radiation: int = 0,
+        resting: bool = True,
+        needs: bool = True,
+    ) -> List["DamageHistory"]:
+        """
+        Mise à jour des besoins et de la régénération de plusieurs personnages (sans sauvegarde)
+        Les besoins sont évalués par les formules compilées sur le vecteur de statistiques de chaque personnage
+        :param characters: Personnages
+        :param hours: Nombre d'heures passées
+        :param radiation: Radioactivité actuelle (en rads / heure)
+        :param resting: Personnages en train de se reposer ?
+        :param needs: Active la perte des besoins (soif, faim, sommeil) ?
+        :return: Dégâts potentiels infligés
+        """
+        damages = []
+        for character in characters:
+            is_resting = resting or character.is_resting
+            stats = character.stats
+            if needs and character.has_needs:
+                vector = stats.values if isinstance(stats, Stats) else STATS_GETTER(stats)
+                rates = NEEDS_EVALUATOR(vector, character.level, character)
+                for (stats_name, formula), value in zip(COMPUTED_NEEDS, rates):
+                    rate = -2.0 if stats_name == STATS_SLEEP and is_resting else 1.0
+                    rate *= NEEDS_RESTING_RATE if is_resting else NEEDS_NORMAL_RATE
+                    character.modify_value(stats_name, value * hours * rate)
+            if radiation:
+                damage = character.damage(
+                    raw_damage=radiation * hours,
+                    damage_type=DAMAGE_RADIATION,
+                    save=False,
+                    log=False,
+                )
+                damage.reason = _("environnement radioactif")
+                damages.append(damage)
+            healing_rate_modifier = HEALING_RATE_RESTING_MULT if is_resting else 1.0
+            character.regeneration += max(stats.healing_rate * (hours / 24.0) * healing_rate_modifier, 0.0)
+        return damages
+
+    @property
+    def survival_levels(self) -> Tuple[int, ...]:
+        """
+        Retourne le palier atteint pour chacun des besoins (voir SURVIVAL_EFFECTS)
+        """
+        return get_survival_levels(self.__dict__)
+
+    def has_crossed_threshold(self) -> bool:
+        """
+        Vérifie si le personnage franchit un seuil nécessitant une sauvegarde complète
+        (décès, montée de niveau ou changement de palier d'un besoin modifiant ses statistiques)
+        :return: Vrai si le personnage franchit un seuil
+        """
+        return (
+            not self.pk
+            or self.health + int(self.regeneration) <= 0
+            or self.experience >= self.next_required_experience
+            or self.survival_levels != get_survival_levels(self._copy)
+        )
+
+    @staticmethod
+    def save_bulk(characters: Iterable["Character"]) -> int:
+        """
+        Sauvegarde groupée des personnages après un passage du temps
+        Seuls les personnages franchissant un seuil (voir has_crossed_threshold) passent par la sauvegarde complète,
+        les autres sont écrits en une seule requête sans invalider leurs statistiques
+        :param characters: Personnages
+        :return: Nombre de personnages sauvegardés en une seule requête
+        """
+        updated = []
+        for character in characters:
+            if character.has_crossed_threshold():
+                character.save()
+                continue
+            # Regeneration
+            if character.regeneration >= 1.0:
+                healing = int(character.regeneration)
+                character.regeneration -= healing
+                character.health += healing
+            # Fixing health, action points, needs and money (statistics are not modified)
+            stats = character.stats
+            character.health = max(0, min(character.health, stats.max_health))
+            character.action_points = max(0, min(character.action_points, stats.max_action_points))
+            for stats_name in LIST_NEEDS:
+                sv(character, stats_name, min(max(gv(character, stats_name), 0), 1000))
+            character.money = max(character.money, 0)
+            updated.append(character)
+        if updated:
+            # The modification date is only set automatically by save()
+            modification_date = now()
+            for character in updated:
+                character.modification_date = modification_date
+            Character.objects.bulk_update(updated, fields=CHARACTER_TIME_FIELDS + ("modification_date",))
+            # Written values are no longer considered as modified
+            for character in updated:
+                character._copy = character.to_dict(editables=True)
+        return len(updated)
+
     def roll(self, stats: str, modifier: int = 0, xp: bool = True, log: bool = True, reason: str = "") -> "RollHistory":
         """
         Réalise un jet de compétence pour un personnage
@@ -1483,6 +2561,13 @@ class Character(Entity, BaseStatistics):
             history.save()
         return history
 
+    @property
+    def is_dying(self) -> bool:
+        """
+        Personnage non joueur encore actif dont la santé est épuisée (pillé et désactivé à sa sauvegarde)
+        """
+        return bool(self.pk and self.is_active and self.health <= 0 and not self.is_player)
+
     def loot(self, empty: bool = True) -> Optional[List["Loot"]]:
         """
         Transforme l'équipement de ce personnage en butin
@@ -1491,26 +2576,66 @@ class Character(Entity, BaseStatistics):
         """
         if not self.pk:
             return
+        return Character.loot_bulk([self], empty=empty)
+
+    @staticmethod
+    def loot_bulk(characters: Iterable["Character"], empty: bool = True) -> List["Loot"]:
+        """
+        Transforme en une seule passe l'équipement de plusieurs personnages en butin
+        (les objets sont déséquipés en mémoire puis les butins sont fusionnés et écrits en masse)
+        :param characters: Personnages
+        :param empty: Vide l'inventaire des personnages ?
+        :return: Liste des butins
+        """
+        characters = {character.pk: character for character in characters if character.pk}
+        if not characters:
+            return []
+        all_equipments: Dict[int, List["Equipment"]] = {}
+        for equipment in (
+            Equipment.objects.select_related("item").filter(character_id__in=characters).order_by("item__name")
+        ):
+            all_equipments.setdefault(equipment.character_id, []).append(equipment)
+        all_items: Dict[Optional[int], list] = {}
+        all_money: Dict[int, int] = Counter()
+        campaigns: Dict[int, Optional["Campaign"]] = {}
+        updates = []
+        for character in characters.values():
+            items = all_items.setdefault(character.campaign_id, [])
+            if character.campaign_id and character.money:
+                all_money[character.campaign_id] += character.money
+                campaigns.setdefault(character.campaign_id, character._state.fields_cache.get("campaign"))
+            equipments = all_equipments.get(character.pk, [])
+            # Unequipping puts the weapon clip back into the equipped ammunition
+            slots = {equipment.slot: equipment for equipment in reversed(equipments) if equipment.slot}
+            weapon, ammo = slots.get(ITEM_WEAPON), slots.get(ITEM_AMMO)
+            if weapon and ammo and weapon.clip_count and not weapon.item.is_single_charge:
+                ammo.quantity += weapon.clip_count
+                weapon.clip_count = 0
+            for equipment in equipments:
+                if equipment.slot:
+                    equipment.slot = ""
+                    updates.append(equipment)
+                if equipment.item.is_droppable:
+                    items.append((equipment.item, equipment.quantity, equipment.condition))
+            character._inventory = character._inventory_index = None
         loots = []
-        if self.money:
-            self.campaign.money_loot += self.money
-            self.campaign.save(update_fields=("money_loot",))
-        for equipement in self.inventory.exclude(slot=""):
-            equipement.equip(is_action=False)
-        for equipement in self.inventory.filter(item__is_droppable=True):
-            loots.append(
-                Loot.create(
-                    campaign=self.campaign,
-                    item=equipement.item,
-                    condition=equipement.condition,
-                    quantity=equipement.quantity,
-                )
-            )
-        if empty:
-            self.inventory.delete()
-            if self.money:
-                self.money = 0
-                self.save(update_fields=("money",))
+        with transaction.atomic():
+            for campaign_id, money in all_money.items():
+                Campaign.objects.filter(pk=campaign_id).update(money_loot=F("money_loot") + money)
+                if campaigns[campaign_id] is not None:
+                    campaigns[campaign_id].money_loot += money
+            for campaign_id, items in all_items.items():
+                loots.extend(Loot.create_bulk(campaign_id, items))
+            if empty:
+                Equipment.objects.filter(character_id__in=characters).delete()
+                rich = [character for character in characters.values() if character.money]
+                if rich:
+                    Character.objects.filter(pk__in=[character.pk for character in rich]).update(money=0)
+                    for character in rich:
+                        character.money = 0
+            elif updates:
+                Equipment.objects.bulk_update(updates, fields=("slot", "quantity", "clip_count"))
+            Character.reset_stats(*characters.values())
         return loots
 
     def burst(
@@ -1534,16 +2659,18 @@ class Character(Entity, BaseStatistics):
         :return: Liste d'historiques de combat
         """
         _assert(targets, _("Une attaque en rafale doit cibler au moins un personnage."))
-        # Fetch characters for optimisation
-        query = Character.objects.select_related("statistics")
+        # Fetch all characters at once for optimisation
+        characters = Character.get_targets(target for target, target_range in targets)
         targets = [
             (
-                target if isinstance(target, Character) else query.get(id=target),
+                target if isinstance(target, Character) else characters.get(int(target)),
                 target_range,
             )
             for target, target_range in targets
         ]
-        histories = []
+        _assert(all(target for target, target_range in targets), _("Une ou plusieurs cibles sont introuvables."))
+        # Histories and equipment changes of the whole burst are written at once
+        histories, recorder = [], CombatRecorder(simulation=simulation)
         if weapon_type == WEAPON_TYPE_GRENADE:
             attacker_weapon_equipment = self.get_from_inventory(slot=ITEM_GRENADE)
             attacker_weapon = gv(attacker_weapon_equipment, "item", None)
@@ -1557,11 +2684,13 @@ class Character(Entity, BaseStatistics):
                     weapon_type=weapon_type,
                     target_range=int(target_range),
                     hit_chance_modifier=hit_chance_modifier,
+                    attacker_weapon=attacker_weapon_equipment,
                     log=log,
                     simulation=simulation,
                     is_action=is_action,
                     is_burst=True,
                     hit_count=hit_count,
+                    recorder=recorder,
                     **kwargs,
                 )
                 histories.append(history)
@@ -1591,6 +2720,7 @@ class Character(Entity, BaseStatistics):
                     is_action=is_action,
                     is_burst=True,
                     hit_count=hit_count,
+                    recorder=recorder,
                     **kwargs,
                 )
                 histories.append(history)
@@ -1602,26 +2732,15 @@ class Character(Entity, BaseStatistics):
                 target = None
 
             attacker_remaining_ammo = attacker_weapon.burst_count - hit_count + 1
-            if attacker_remaining_ammo > 0:
+            if attacker_remaining_ammo > 0 and attacker_ammo_equipment:
                 attacker_remaining_ammo = min(attacker_ammo_equipment.quantity, attacker_remaining_ammo)
                 attacker_ammo_equipment.quantity -= attacker_remaining_ammo
-                if not simulation:
-                    attacker_ammo_equipment.save()
+                recorder.add_equipment(attacker_ammo_equipment)
                 if attacker_weapon.durability:
-                    attacker_weapon_damage = (
-                        attacker_remaining_ammo
-                        * (1.0 / attacker_weapon.durability)
-                        * (
-                            1.0
-                            - add(
-                                gv(attacker_weapon, "condition_modifier", 0.0),
-                                gv(attacker_ammo, "condition_modifier", 0.0),
-                            ),
-                        )
+                    attacker_weapon_equipment.condition -= attacker_remaining_ammo * get_weapon_wear(
+                        attacker_weapon, attacker_ammo
                     )
-                    attacker_weapon_equipment.condition -= attacker_weapon_damage
-            if not simulation:
-                attacker_weapon_equipment.save()
+        recorder.add_equipment(attacker_weapon_equipment)
         # Saves characters
         if not simulation:
             for history in histories:
@@ -1631,8 +2750,9 @@ class Character(Entity, BaseStatistics):
                     history.experience = max(history.defender.level - self.level, 1) * XP_GAIN_BURST
                 level, required_xp, history.level_up = self.add_experience(history.experience, save=False)
             for target, target_range in targets:
-                target.save()
-            self.save()
+                recorder.add_character(target)
+            recorder.add_character(self)
+        recorder.save()
         return histories
 
     def fight(
@@ -1655,6 +2775,7 @@ class Character(Entity, BaseStatistics):
         fail_target: Union["Character", int] = None,
         fail: bool = False,
         reason: str = "",
+        recorder: Optional[CombatRecorder] = None,
         **kwargs,
     ) -> Optional["FightHistory"]:
         """
@@ -1677,24 +2798,16 @@ class Character(Entity, BaseStatistics):
         :param fail_target: Cible secondaire en cas d'échec critique
         :param fail: Attaque donnée sur la cible secondaire en cas d'échec critique ?
         :param reason: Raison de l'attaque ou de ses modificateurs (facultatif)
+        :param recorder: Etape de persistance partagée entre plusieurs coups (optionnel)
         :return: Historique de combat
-        """
-        if not target:
-            return
-        target_range, is_burst = int(target_range), bool(is_burst)
-        if isinstance(target, (int, str)):
-            target = Character.objects.select_related("statistics").get(pk=target)
-        history = FightHistory(
-            attacker=self,
-            attacker_level=self.level,
-            defender=target,
-            defender_level=target.level,
-            range=target_range,
-            burst=is_burst,
-            hit_count=hit_count + 1,
-            reason=reason or "",
-        )
-        history.game_date = self.campaign and self.campaign.current_game_date
+        """
+        if not target:
+            return
+        target_range, is_burst = int(target_range), bool(is_burst)
+        if isinstance(target, (int, str)):
+            target = Character.objects.select_related("statistics").get(pk=target)
+        own_recorder = recorder is None
+        recorder = recorder or CombatRecorder(simulation=simulation)
         # Equipment
         is_grenade = False
         if weapon_type == WEAPON_TYPE_GRENADE:
@@ -1713,254 +2826,54 @@ class Character(Entity, BaseStatistics):
         else:
             attacker_weapon_equipment = attacker_weapon or self.get_from_inventory(slot=ITEM_WEAPON)
             attacker_ammo_equipment = attacker_ammo or self.get_from_inventory(slot=ITEM_AMMO)
-        attacker_weapon = history.attacker_weapon = gv(attacker_weapon_equipment, "item", None)
-        attacker_ammo = history.attacker_ammo = gv(attacker_ammo_equipment, "item", None)
-        # Fight conditions
-        if target.health <= 0:
-            history.status = STATUS_TARGET_DEAD
-        elif not fail:
-            if attacker_weapon:
-                if attacker_weapon.clip_size and attacker_weapon_equipment.clip_count <= 0:
-                    history.status = STATUS_NO_MORE_AMMO
-                elif attacker_weapon.is_throwable and attacker_weapon_equipment.quantity <= 0:
-                    if not is_grenade or (is_burst and not hit_count):
-                        history.status = STATUS_NO_MORE_AMMO
-            elif (
-                attacker_weapon_equipment
-                and attacker_weapon_equipment.condition is not None
-                and attacker_weapon_equipment.condition <= 0.0
-            ):
-                history.status = STATUS_WEAPON_BROKEN
-        # Action points
-        ap_cost = 0
-        if is_action and not fail:
-            if not is_burst or is_grenade:
-                ap_cost_type = "ap_cost_target" if target_part else "ap_cost_normal"
-            else:
-                ap_cost_type = "ap_cost_burst"
-            ap_cost = gv(attacker_weapon, ap_cost_type, None)
-            ap_cost = ap_cost if ap_cost is not None else AP_COST_FIGHT
-            ap_cost += self.stats.ap_cost_modifier
-            if ap_cost > self.action_points:
-                history.status = STATUS_NOT_ENOUGH_AP
-        # Premature end of fight
-        if history.status:
-            if log and not simulation:
-                history.save()
-            return history
-        # Targeted body part modifiers and equipment
-        roll_modifier = int(round((5 - self.stats.luck) * LUCK_ROLL_MULT, 0))
-        body_part = target_part
-        if not target_part:
-            for body_part, chance in BODY_PARTS_RANDOM_CHANCES:
-                if randint(1, 100 + roll_modifier) <= chance:
-                    break
-        history.body_part = body_part = body_part or PART_TORSO
-        (  # Body part hit/critical modifiers
-            ranged_hit_modifier,
-            melee_hit_modifier,
-            critical_modifier,
-            critical_damage_modifier,
-        ) = BODY_PARTS_MODIFIERS[history.body_part]
-        armor_slot = ITEM_HELMET if body_part in (PART_EYES, PART_HEAD) else ITEM_ARMOR
-        defender_armor_equipment = target.get_from_inventory(slot=armor_slot)
-        defender_armor = history.defender_armor = gv(defender_armor_equipment, "item", None)
-        # Base hit chance
-        is_melee = not attacker_weapon or attacker_weapon.is_melee
-        attacker_skill = gv(attacker_weapon, "skill", SKILL_UNARMED)
-        attacker_hit_chance = gv(self.stats, attacker_skill, 0)  # Base skill
-        if not attacker_hit_chance and not self.has_stats:
-            attacker_hit_chance = self.level * LEVELED_STATS_MULT  # Base skill level for creatures
-        # Accuracy modifier for one-hand or two-hands weapons
-        hands_hit_chance = [
-            0,
-            self.stats.one_hand_accuracy,
-            self.stats.two_hands_accuracy,
-        ]
-        attacker_hit_chance += hands_hit_chance[gv(attacker_weapon, "hands", 0)]
-        attacker_hit_chance += min(
-            MIN_STRENGTH_MALUS
-            * (  # Accuracy malus if below required strength
-                self.stats.strength - gv(attacker_weapon, "min_strength", 0)
-            ),
-            0,
-        )
-        attacker_hit_chance += min(
-            MIN_SKILL_MALUS
-            * (  # Accuracy malus if below required skill
-                gv(self.stats, attacker_skill, 0) - gv(attacker_weapon, "min_skill", 0)
-            ),
-            0,
+        # Rules are resolved on snapshots, mutations are then applied on characters and equipments
+        result = resolve_fight(
+            self.get_snapshot(equipments=False),
+            target.get_snapshot(),
+            weapon=EquipmentSnapshot.from_equipment(attacker_weapon_equipment),
+            ammo=EquipmentSnapshot.from_equipment(attacker_ammo_equipment),
+            target_range=target_range,
+            target_part=target_part,
+            hit_chance_modifier=hit_chance_modifier,
+            is_grenade=is_grenade,
+            is_burst=is_burst,
+            is_action=is_action,
+            hit_count=hit_count,
+            force_success=force_success,
+            force_critical=force_critical,
+            force_raw_damage=force_raw_damage,
+            fail=fail,
         )
-        # Weapon/ammo range modifiers (min & max)
-        attacker_range_type = "{}_burst_range" if is_burst else "{}_range"
-        attacker_min_range = (
-            0
-            if not attacker_weapon
-            else max(
-                add(
-                    gv(attacker_weapon, attacker_range_type.format("min"), 0),
-                    gv(attacker_ammo, attacker_range_type.format("min"), 0),
-                ),
-                0,
-            )
-        )
-        attacker_max_range = (
-            1
-            if not attacker_weapon
-            else max(
-                add(
-                    gv(attacker_weapon, attacker_range_type.format("max"), 0),
-                    gv(attacker_ammo, attacker_range_type.format("max"), 0),
-                ),
-                1,
-            )
-        )
-        # Ranged weapon accuracy modifiers
-        if attacker_weapon and attacker_weapon.attack_mode in RANGE_MODIFIERS:
-            weapon_range_modifier = RANGE_MODIFIERS.get(attacker_weapon.attack_mode)
-            attacker_hit_chance += (self.stats.perception - 2) * weapon_range_modifier
-            attacker_hit_chance -= max(attacker_min_range - target_range, 0) * RANGED_CLOSE_MALUS_MULT
-            attacker_hit_chance -= max(target_range - attacker_min_range, 0) * RANGED_MALUS_MULT
-        # Increase hit chance of weapons
-        elif not is_melee:
-            attacker_range_stats = SPECIAL_STRENGTH if attacker_weapon.is_throwable else SPECIAL_PERCEPTION
-            attacker_hit_chance += RANGED_NORMAL_MULT * gv(self.stats, attacker_range_stats, 0)
-            attacker_hit_chance -= target_range * RANGED_MALUS_MULT
-        # Targeted hit chance modifier
-        if target_part:  # Hit chance malus are only for targeted shot
-            attacker_hit_chance += melee_hit_modifier if is_melee else ranged_hit_modifier
-        # Hit chance modifiers
-        attacker_hit_chance += gv(attacker_weapon, "hit_chance_modifier", 0)  # Weapon hit_count chance modifier
-        attacker_hit_chance += gv(attacker_ammo, "hit_chance_modifier", 0)  # Ammo hit_count chance modifier
-        attacker_hit_chance *= gv(attacker_weapon_equipment, "condition", 1.0) or 1.0  # Weapon condition
-        defender_armor_class = gv(defender_armor, "armor_class", 0) + target.stats.armor_class
-        defender_armor_class -= int((5 - target.stats.luck) * LUCK_ROLL_MULT)  # Luck-based armor class
-        defender_armor_class *= max(
-            (
-                1.0
-                + add(  # Armor class modifiers by weapon/ammo
-                    gv(attacker_weapon, "armor_class_modifier", 0),
-                    gv(attacker_ammo, "armor_class_modifier", 0),
-                )
-                / 100.0
-            ),
-            0.0,
+        history = FightHistory(
+            attacker=self,
+            attacker_level=self.level,
+            defender=target,
+            defender_level=target.level,
+            range=target_range,
+            burst=is_burst,
+            hit_count=hit_count + 1,
+            reason=reason or "",
+            **result.get_history(),
         )
-        attacker_hit_chance -= defender_armor_class  # Defender armor class modifier
-        attacker_hit_chance += int(hit_chance_modifier)  # Other modifiers
-        attacker_hit_chance = max(min(attacker_hit_chance, MAX_HIT_CHANCE), 0)
-        # Force hit chance to null if target is farther than weapon range
-        if target_range > attacker_max_range:
-            attacker_hit_chance = 0
-        # Hit roll and history
-        history.hit_modifier = int(hit_chance_modifier)
-        history.hit_chance = int(round(attacker_hit_chance))
-        history.status = STATUS_HIT_FAILED
-        history.hit_roll = randint(1, 100)
-        history.success = bool(force_success) or history.hit_roll <= history.hit_chance
-        history.critical = bool(force_critical) or history.hit_roll >= min(100, CRITICAL_FAIL_D100 - roll_modifier)
-        if history.success:
-            # Apply damage
-            attacker_damage_type = (  # Damage type
-                gv(attacker_ammo, "damage_type", None) or gv(attacker_weapon, "damage_type", None) or DAMAGE_NORMAL
-            )
-            damage = 0
-            for item in (attacker_weapon, attacker_ammo):
-                if not item:
-                    continue
-                damage += item.calculated_damage
-            damage += self.stats.melee_damage if is_melee else 0
-            damage *= max(
-                (
-                    1.0
-                    + sum(  # Damage modifiers (in %) by weapon/ammo
-                        (
-                            self.stats.damage_modifier,
-                            gv(attacker_weapon, "damage_modifier", 0),
-                            gv(attacker_ammo, "damage_modifier", 0),
-                        )
-                    )
-                    / 100.0
-                ),
-                0.0,
-            )
-            # Critical chance
-            critical_chance = gv(self.stats, "critical_chance", 0)  # Base critical chance
-            critical_chance += critical_modifier  # Critical chance modifiers by body part
-            critical_chance += add(  # Critical chance modifiers by weapon/ammo
-                gv(attacker_weapon, "critical_modifier", 0),
-                gv(attacker_ammo, "critical_modifier", 0),
-            )
-            history.status = STATUS_HIT_SUCCEED
-            history.critical = bool(force_critical) or history.hit_roll <= critical_chance
-            # Critical damage
-            if history.critical:
-                damage *= max(
-                    (
-                        1.0
-                        + sum(  # Critical damage modifiers (in %) by weapon/ammo
-                            (
-                                self.stats.critical_damage,
-                                critical_damage_modifier,
-                                gv(attacker_weapon, "critical_damage_modifier", 0),
-                                gv(attacker_ammo, "critical_damage_modifier", 0),
-                                ((self.stats.strength * 10) if is_melee else 0),
-                            )
-                        )
-                        / 100.0
-                    ),
-                    0.0,
-                )
-                damage += add(  # Critical damage modifiers (in raw damage) by weapon/ammo
-                    gv(attacker_weapon, "critical_damage", 0),
-                    gv(attacker_ammo, "critical_damage", 0),
-                )
-                critical_raw_chance = self.stats.critical_raw_chance + add(  # Raw damage type chance modifiers
-                    gv(attacker_weapon, "critical_raw_modifier", 0),
-                    gv(attacker_ammo, "critical_raw_modifier", 0),
-                )
-                critical_raw_damage = force_raw_damage or randint(1, 100) <= critical_raw_chance
-                if attacker_damage_type not in LIST_NON_DAMAGE and critical_raw_damage:
-                    attacker_damage_type = DAMAGE_RAW
-            damage = max(damage, 0)  # Avoid negative damage
-            threshold_modifier = add(  # Threshold modifiers from weapon/ammo
-                gv(attacker_weapon, "threshold_modifier", 0),
-                gv(attacker_ammo, "threshold_modifier", 0),
-            )
-            threshold_rate_modifier = add(  # Threshold rate modifiers from weapon/ammo
-                gv(attacker_weapon, "threshold_rate_modifier", 0),
-                gv(attacker_ammo, "threshold_rate_modifier", 0),
-            )
-            resistance_modifier = add(  # Resistance modifiers from weapon/ammo
-                gv(attacker_weapon, "resistance_modifier", 0),
-                gv(attacker_ammo, "resistance_modifier", 0),
-            )
-            history.damage = target.damage(
-                raw_damage=damage,
-                damage_type=attacker_damage_type,
-                body_part=body_part,
-                save=not is_burst,
-                threshold_modifier=threshold_modifier,
-                threshold_rate_modifier=threshold_rate_modifier,
-                resistance_modifier=resistance_modifier,
-                simulation=simulation,
-            )
-            if target.health <= 0:
-                history.status = STATUS_TARGET_KILLED
-            # On hit_count effects
+        history.game_date = self.campaign and self.campaign.current_game_date
+        # Premature end of fight
+        if result.body_part is None:
+            if log:
+                recorder.add_fight(history)
+            if own_recorder:
+                recorder.save()
+            return history
+        if result.damage:
+            history.damage = recorder.apply_damage(target, result.damage, save=not is_burst)
+            # On hit effects
             if not simulation:
-                damages = []
-                for item in (attacker_weapon, attacker_ammo, defender_armor):
+                for item in (result.weapon, result.ammo, result.armor):
                     if not item:
                         continue
                     for effect in item.effects.all():
-                        character_effect = effect.affect(target)
-                        if character_effect:
-                            damages.extend(character_effect)
-                damages.extend(target.apply_effects())  # Apply effects immediatly
+                        recorder.add_effect(effect, target)
         # If critical fail and secondary target defined
-        if not history.success and history.critical and fail_target:
+        if not result.success and result.critical and fail_target:
             history.fail = self.fight(
                 target=fail_target,
                 target_range=0,
@@ -1971,30 +2884,14 @@ class Character(Entity, BaseStatistics):
                 simulation=simulation,
                 attacker_weapon=attacker_weapon_equipment,
                 attacker_ammo=attacker_ammo_equipment,
+                recorder=recorder,
             )
-        # Clip count & weapon condition
-        if attacker_weapon_equipment and attacker_weapon and not fail:
-            if is_grenade and (not is_burst or not hit_count):
-                attacker_weapon_equipment.quantity -= 1
-            elif not is_grenade and attacker_weapon.is_throwable:
-                attacker_weapon_equipment.drop(quantity=1, save=False)
-            elif attacker_weapon.clip_size:
-                attacker_weapon_equipment.clip_count -= 1
-            if attacker_weapon.durability and attacker_weapon.is_repairable:
-                attacker_weapon_damage = (1.0 / attacker_weapon.durability) * (
-                    1.0
-                    - add(  # Weapon/ammo condition modifier
-                        gv(attacker_weapon, "condition_modifier", 0.0),
-                        gv(attacker_ammo, "condition_modifier", 0.0),
-                    )
-                )
-                attacker_weapon_equipment.condition -= attacker_weapon_damage
-            if not is_burst and not simulation:
-                # Optimisation: don't save if weapon is provided by burst attack
-                attacker_weapon_equipment.save()
+        # Clip count & weapon condition (optimisation: not saved if weapon is provided by burst attack)
+        if attacker_weapon_equipment and result.weapon and not fail:
+            recorder.apply_weapon(attacker_weapon_equipment, result, save=not is_burst)
         # Save character and return history
         if not simulation:
-            self.action_points -= max(ap_cost, 0)
+            self.action_points -= max(result.ap_cost, 0)
             if not is_burst and not fail:
                 # Experience only on single shot
                 if target.reward and history.damage and history.damage.damage_rate:
@@ -2002,9 +2899,11 @@ class Character(Entity, BaseStatistics):
                 else:
                     history.experience = max(target.level - self.level, 1) * XP_GAIN_FIGHT[history.success]
                 level, required_xp, history.level_up = self.add_experience(history.experience, save=False)
-                self.save()
-            if log and not simulation:
-                history.save()
+                recorder.add_character(self)
+            if log:
+                recorder.add_fight(history)
+        if own_recorder:
+            recorder.save()
         return history
 
     def damage(
@@ -2017,6 +2916,7 @@ class Character(Entity, BaseStatistics):
         threshold_modifier: int = 0,
         threshold_rate_modifier: int = 0,
         resistance_modifier: int = 0,
+        ticks: int = 1,
         save: bool = True,
         log: bool = True,
         simulation: bool = False,
@@ -2032,124 +2932,47 @@ class Character(Entity, BaseStatistics):
         :param threshold_modifier: Modificateur d'absorption de dégâts (appliqué à l'armure et au personnage)
         :param threshold_rate_modifier: Modificateur de taux d'absorption de dégâts (appliqué à l'armure et au personnage)
         :param resistance_modifier: Modificateur de résistance aux dégâts (appliqué à l'armure et au personnage)
+        :param ticks: Nombre d'applications successives des dégâts (agrégées en un seul historique)
         :param save: Sauvegarder les modifications sur le personnage ?
         :param log: Historise les dégâts ?
         :param simulation: Fait une simulation des dégâts ?
         :param reason: Raison de l'origine des dégâts (facultatif)
         :return: Nombre de dégâts
         """
-        threshold_rate_modifier = round(threshold_rate_modifier / 100.0, 2)
-        damage_type, body_part = damage_type or DAMAGE_NORMAL, body_part or ""
         _assert(
             min_damage <= max_damage,
             _("Les bornes de dégâts min. et max. ne sont pas correctes."),
         )
-        if not body_part and damage_type in LIST_NON_DAMAGE:
-            roll_modifier = int(round((5 - self.stats.luck) * LUCK_ROLL_MULT, 0))
-            for body_part, chance in BODY_PARTS_RANDOM_CHANCES:
-                if randint(1, 100 + roll_modifier) <= chance:
-                    break
-        body_part = "" if damage_type in LIST_NON_DAMAGE else body_part
-        history = DamageHistory(
-            character=self,
-            level=self.level,
-            damage_type=damage_type,
-            body_part=body_part,
+        # Equipments are only needed for the armor protecting the body part
+        armored = bool(body_part) and (damage_type or DAMAGE_NORMAL) not in LIST_NON_DAMAGE
+        result = resolve_damage(
+            self.get_snapshot(equipments=armored),
             raw_damage=raw_damage,
             min_damage=min_damage,
             max_damage=max_damage,
-            reason=reason,
+            damage_type=damage_type,
+            body_part=body_part,
+            threshold_modifier=threshold_modifier,
+            threshold_rate_modifier=threshold_rate_modifier,
+            resistance_modifier=resistance_modifier,
+            ticks=ticks,
         )
-        history.game_date = self.campaign and self.campaign.current_game_date
-        # Base damage
-        total_damage = raw_damage + randint(min_damage, max_damage)
-        base_damage = history.base_damage = total_damage
-        # Character already KO
-        if damage_type != HEAL_HEALTH and self.health <= 0:
-            return history
-        damage_threshold, damage_resistance = 0, 0.0
-        if damage_type not in LIST_NON_DAMAGE:
-            # Armor threshold and resistance
-            to_head = damage_type == DAMAGE_GAZ_INHALED or body_part in (
-                PART_EYES,
-                PART_HEAD,
-            )
-            armor_slot = None if not body_part else ITEM_HELMET if to_head else ITEM_ARMOR
-            armor_equipment = self.get_from_inventory(slot=armor_slot) if armor_slot else None
-            armor = history.armor = gv(armor_equipment, "item", None)
-            armor_damage = 0
-            if armor and armor_equipment:
-                armor_threshold = (armor.get_threshold(damage_type) * armor_equipment.condition) + threshold_modifier
-                armor_threshold = round(armor_threshold * max(1.0 + threshold_rate_modifier, 0.0), 2)
-                armor_resistance = armor.get_resistance(damage_type) * armor_equipment.condition
-                armor_resistance *= 1.0 + (resistance_modifier / 100.0)
-                armor_resistance = round(min(max(0, armor_resistance), MAX_DAMAGE_RESISTANCE), 2)
-                total_damage = max(total_damage - max(armor_threshold, 0), 0)
-                total_damage *= max(1.0 - min(round(armor_resistance / 100.0, 2), 1.0), 0.0)
-                armor_damage = 0
-                if armor.durability and damage_type in LIST_PHYSICAL_DAMAGE:
-                    armor_condition_modifier = 1.0 - armor.condition_modifier
-                    armor_damage = max(
-                        ((base_damage - total_damage) / armor.durability) * armor_condition_modifier,
-                        0,
-                    )
-                # History
-                history.armor_threshold = armor_threshold
-                history.armor_resistance = armor_resistance
-                history.armor_damage = armor_damage
-            # Condition decrease on armor
-            if history.armor_damage > 0 and not simulation:
-                armor_equipment.condition -= armor_damage
-                armor_equipment.save()
-            # Self threshold and resistance
-            damage_threshold = self.stats.get_threshold(damage_type)
-            damage_resistance = self.stats.get_resistance(damage_type)
-            if damage_type in LIST_PHYSICAL_DAMAGE:
-                damage_threshold += self.stats.damage_threshold
-                damage_resistance += self.stats.damage_resistance
-            damage_threshold += threshold_modifier
-            damage_threshold = round(damage_threshold * threshold_rate_modifier, 2)
-            damage_resistance *= 1.0 + (resistance_modifier / 100.0)
-            damage_resistance = round(min(max(0, damage_resistance), MAX_DAMAGE_RESISTANCE), 2)
-        total_damage = max(total_damage - max(damage_threshold, 0), 0)
-        total_damage *= max(1.0 - round(damage_resistance / 100.0, 2), 0.0)
-        total_damage *= (1.0, -1.0)[history.is_heal]
-        total_damage = int(round(total_damage))
-        # Apply damage on self
-        if total_damage:
-            if damage_type in (DAMAGE_RADIATION, HEAL_RADIATION):
-                self.rads += total_damage
-            elif damage_type in (DAMAGE_THIRST, HEAL_THIRST):
-                self.thirst += total_damage
-            elif damage_type in (DAMAGE_HUNGER, HEAL_HUNGER):
-                self.hunger += total_damage
-            elif damage_type in (DAMAGE_SLEEP, HEAL_SLEEP):
-                self.sleep += total_damage
-            elif damage_type in (ADD_MONEY, REMOVE_MONEY):
-                self.money -= total_damage
-            elif damage_type in (ADD_KARMA, REMOVE_KARMA):
-                self.karma -= total_damage
-            else:
-                history.damage_rate = round(min(self.health, abs(total_damage)) / self.stats.max_health, 2)
-                self.health -= total_damage
-            if save and not simulation:
-                self.save()
-        # History
-        history.damage_threshold = damage_threshold
-        history.damage_resistance = damage_resistance
-        history.real_damage = total_damage
-        if log and not simulation:
-            history.save()
+        recorder = CombatRecorder(simulation=simulation)
+        history = recorder.apply_damage(self, result, save=save, log=log, reason=reason)
+        recorder.save()
         return history
 
-    def apply_effects(self, save: bool = True) -> List["DamageHistory"]:
+    def apply_effects(
+        self, save: bool = True, effects: Optional[Iterable["CharacterEffect"]] = None
+    ) -> List["DamageHistory"]:
         """
         Applique les effets actifs du personnage
         :param save: Sauvegarde les données relatives aux personnages
+        :param effects: Effets à appliquer (par défaut tous les effets actifs du personnage)
         :return: Liste des dégâts éventuellement subis
         """
         damages, next_effects = [], []
-        for effect in self.effects:
+        for effect in self.effects if effects is None else effects:
             damages.extend(effect.apply(self, save=save))
             next_effects.extend(effect.next_effects)
             effect.next_effects.clear()
@@ -2196,6 +3019,126 @@ class Character(Entity, BaseStatistics):
                 effect.save(force_insert=True)
         return self
 
+    def spawn(
+        self,
+        count: int = 1,
+        campaign: Union[int, "Campaign"] = None,
+        name: str = None,
+        equipments: bool = True,
+        effects: bool = True,
+        is_active: bool = True,
+        points: int = 0,
+        level: int = 0,
+        balance: int = 0,
+    ) -> List["Character"]:
+        """
+        Crée en masse plusieurs copies de ce personnage en un nombre fixe de requêtes
+        :param count: Nombre de copies
+        :param campaign: Campagne de destination
+        :param name: Nom des copies ("{number}" est remplacé par le numéro de la copie)
+        :param equipments: Copie également les équipements
+        :param effects: Copie également les effets
+        :param is_active: Active les personnages ?
+        :param points: Nombre de points à répartir aléatoirement dans le S.P.E.C.I.A.L. (aucun par défaut)
+        :param level: Niveau des statistiques à générer aléatoirement (aucun par défaut)
+        :param balance: Pourcentage des points à répartir sur les spécialités
+        :return: Personnages
+        """
+        _assert(self.pk, _("Ce personnage doit être préalablement enregistré avant d'être dupliqué."))
+
+        def get_values(instance: models.Model) -> Dict[str, Any]:
+            # Unique fields (such as UUID) get their default value
+            return {
+                field.attname: gv(instance, field.attname)
+                for field in instance._meta.concrete_fields
+                if not field.primary_key and not field.unique
+            }
+
+        name, campaign_id = name or self.name, gv(campaign, "pk", campaign) or self.campaign_id
+        values = get_values(self)
+        all_equipments = (
+            list(Equipment.objects.filter(character_id=self.pk).select_related("item")) if equipments else []
+        )
+        all_effects = list(CharacterEffect.objects.filter(character_id=self.pk)) if effects else []
+        # Every copy shares the equipments and effects of this character: modifiers are grouped once
+        # and only drawn for each copy, the statistics are then computed in memory
+        equipment_groups, effect_groups, campaign_groups = Stats.get_modifier_groups([self.pk], [campaign_id])
+        groups = (
+            equipment_groups.get(self.pk, []) if equipments else [],
+            effect_groups.get(self.pk, []) if effects else [],
+        )
+        campaign_modifiers = Stats.draw_modifiers(campaign_groups.get(campaign_id, []))
+        charge = float(sum(equipment.quantity * equipment.item.weight for equipment in all_equipments))
+
+        def compute(character: "Character", modifiers: Dict[str, int]) -> Stats:
+            stats = Stats.get(character, modifiers=modifiers, campaign_modifiers=campaign_modifiers, charge=charge)
+            character.statistics = Statistics(character=character, obsolete=False, **stats.to_row())
+            return stats
+
+        characters, all_stats = [], []
+        for number in range(1, count + 1):
+            character = Character(**values)
+            character.name = (
+                name.replace("{number}", str(number))
+                if "{number}" in name
+                else (f"{name} {number}" if count > 1 else name)
+            )
+            character.campaign_id = campaign_id
+            characters.append(character)
+            if not character.has_stats:
+                all_stats.append(None)
+                character.is_active = is_active
+                continue
+            modifiers = Stats.draw_modifiers(*groups)
+            stats = compute(character, modifiers)
+            if points:
+                character.randomize_special(points=points, save=False)
+                stats = compute(character, modifiers)
+            if level:
+                character.randomize_stats(level=level, balance=balance or 0, save=False)
+                stats = compute(character, modifiers)
+            for key, value in stats.character_modifiers.items():
+                sv(character, key, value)
+            character.heal(save=False)
+            character.is_active = is_active
+            all_stats.append(stats)
+        with transaction.atomic():
+            Character.objects.bulk_create(characters)
+            Equipment.objects.bulk_create(
+                [
+                    Equipment(**dict(get_values(equipment), character_id=character.pk))
+                    for character in characters
+                    for equipment in all_equipments
+                ]
+            )
+            CharacterEffect.objects.bulk_create(
+                [
+                    CharacterEffect(**dict(get_values(effect), character_id=character.pk))
+                    for character in characters
+                    for effect in all_effects
+                ]
+            )
+            unit, to_create = StatsUnitOfWork.current(), []
+            for character, stats in zip(characters, all_stats):
+                if not stats:
+                    continue
+                if unit is not None:
+                    character.statistics = unit.add_statistics(character, stats)
+                else:
+                    character.statistics.character_id = character.pk
+                    to_create.append(character.statistics)
+            if to_create:
+                Statistics.objects.bulk_create(to_create)
+
+            def set_cache() -> None:
+                for character, stats in zip(characters, all_stats):
+                    if stats:
+                        Character._stats.set(character.pk, stats, group=campaign_id)
+
+            # Statistics are only cached once the new characters are committed
+            transaction.on_commit(set_cache)
+        return characters
+
     def levelup(self, stats: str, value: int = 0, save: bool = True, **kwargs) -> int:
         """
         Permet d'augmenter le niveau d'une compétence
@@ -2214,10 +3157,22 @@ class Character(Entity, BaseStatistics):
             self.save(**kwargs)
         return gv(self, stats)
 
+    def has_stats_changes(self, modified: Optional[Dict[str, tuple]] = None) -> bool:
+        """
+        Vérifie si un champ utilisé dans le calcul des statistiques a été modifié depuis le chargement du personnage
+        :param modified: Modifications du personnage déjà calculées (optionnel)
+        :return: Vrai si les statistiques doivent être recalculées
+        """
+        return (
+            not self.pk
+            or not CHARACTER_STATS_FIELDS.isdisjoint(self.modified if modified is None else modified)
+            or self.survival_levels != get_survival_levels(self._copy)
+        )
+
     def save(self, *args, reset: bool = True, **kwargs):
         """
-        Sauvegarde du personnage
-        :param reset: Réinitialise le cache ?
+        Sauvegarde du personnage (seuls les champs modifiés sont écrits, sauf avec _full_update=True)
+        :param reset: Réinitialise le cache (si un champ utilisé dans le calcul des statistiques a été modifié) ?
         """
         # Regeneration
         if self.regeneration >= 1.0:
@@ -2229,10 +3184,12 @@ class Character(Entity, BaseStatistics):
         has_max_action_points = not self.pk or self.action_points == self.stats.max_action_points
         # Check and increase level
         self.check_level()
+        # Modifications are only computed once for the statistics and the campaign
+        newly_created = not self.pk
+        modified = {} if newly_created else self.modified
         # Remove stats in cache
-        if reset:
+        if reset and self.has_stats_changes(modified):
             Character.reset_stats(self)
-        newly_created = not self.pk
         if not newly_created:
             # Fixing health and action points
             self.health = (
@@ -2246,12 +3203,12 @@ class Character(Entity, BaseStatistics):
                 else max(0, min(self.action_points, self.stats.max_action_points))
             )
             # Remove current character on campaign if character is added or removed
-            for campaign_id in self.modified.get("campaign_id") or []:
+            for campaign_id in modified.get("campaign_id") or []:
                 if not campaign_id:
                     continue
                 Campaign.objects.filter(id=campaign_id).update(current_character=None)
         # Loot character if NPC
-        if not newly_created and self.is_active and self.health <= 0 and not self.is_player:
+        if not newly_created and self.is_dying:
             if self.loot_on_death:
                 self.loot(empty=True)
             self.is_active = False
@@ -2753,7 +3710,7 @@ class Equipment(CommonModel):
         if self.slot or self.item.type != ITEM_AMMO:
             return None
         weapon = self.character.get_from_inventory(slot=ITEM_WEAPON)
-        return weapon and self.item in weapon.item.ammunitions.all()
+        return weapon and self.item_id in self.character.inventory_index.ammunitions
 
     @property
     def current_condition(self) -> Optional[int]:
@@ -2764,6 +3721,18 @@ class Equipment(CommonModel):
             return int(self.condition * 100)
         return None
 
+    def get_equipped(self, slot: str) -> Optional["Equipment"]:
+        """
+        Retourne l'équipement porté à un emplacement par le personnage possédant cet objet
+        (sans requête si l'inventaire du personnage est déjà indexé)
+        :param slot: Emplacement
+        :return: Equipement ou rien
+        """
+        character = self._state.fields_cache.get("character")
+        if character is not None and character._inventory_index is not None:
+            return character.inventory_index.by_slot.get(slot)
+        return Equipment.objects.select_related("item").filter(character_id=self.character_id, slot=slot).first()
+
     def equip(self, is_action: bool = False) -> "Equipment":
         """
         Permet d'équiper ou de déséquiper un objet
@@ -2779,20 +3748,15 @@ class Equipment(CommonModel):
             _("Le personnage ne possède plus assez de points d'actions pour s'équiper de cet objet."),
         )
 
-        def get_equipment(equipment: "Equipment", slot: str) -> Optional["Equipment"]:
-            return (
-                Equipment.objects.select_related("item").filter(character_id=equipment.character_id, slot=slot).first()
-            )
-
         def handle_equipment(equipment: "Equipment") -> None:
             if equipment.clip_count and not equipment.item.is_single_charge:
-                ammo = get_equipment(equipment, ITEM_AMMO)
+                ammo = equipment.get_equipped(ITEM_AMMO)
                 if ammo:
                     ammo.quantity += equipment.clip_count
                     ammo.save()
                     equipment.clip_count = 0
             elif equipment.slot == ITEM_AMMO:
-                weapon = get_equipment(equipment, ITEM_WEAPON)
+                weapon = equipment.get_equipped(ITEM_WEAPON)
                 if weapon and not weapon.item.is_single_charge:
                     equipment.quantity += weapon.clip_count
                     weapon.clip_count = 0
@@ -2802,7 +3766,7 @@ class Equipment(CommonModel):
         if self.slot:
             handle_equipment(self)
         else:
-            item = get_equipment(self, self.item.type)
+            item = self.get_equipped(self.item.type)
             if item:
                 handle_equipment(item)
                 item.save()
@@ -2902,7 +3866,7 @@ class Equipment(CommonModel):
             not is_action or self.character.action_points >= self.item.ap_cost_reload,
             _("Le personnage ne possède plus assez de points d'actions pour recharger cette arme."),
         )
-        ammo = Equipment.objects.filter(character_id=self.character_id, slot=ITEM_AMMO).first()
+        ammo = self.get_equipped(ITEM_AMMO)
         _assert(
             ammo and ammo.quantity > 0,
             _("Il n'y a aucun type de munition équipé ou le nombre de munitions disponibles est insuffisant."),
@@ -2991,21 +3955,78 @@ class Equipment(CommonModel):
                     dict(secondary=_("Un autre objet de l'inventaire est déjà défini comme arme secondaire."))
                 )
 
-    def reset_character_stats(self):
+    def get_stats_changes(self) -> Optional[Dict[str, int]]:
+        """
+        Calcule la variation des modificateurs de statistiques suite à la modification de l'équipement
+        :return: Variation par statistique ou None si un recalcul complet est nécessaire
+        """
+        previous = self._copy
+        if (
+            not self.pk
+            or previous.get("id") != self.pk
+            or previous.get("item_id") != self.item_id
+            or previous.get("character_id") != self.character_id
+            or self.quantity <= 0
+            or (self.condition is not None and self.condition <= 0)
+        ):
+            return None
+        if self.quantity != previous.get("quantity") and self.item.weight:
+            return None  # Charge has changed
+
+        def get_count(slot: str, quantity: int) -> int:
+            return quantity if (slot or self.item.type in (ITEM_EXTRA, ITEM_TOOL)) else 0
+
+        count = get_count(self.slot, self.quantity) - get_count(previous.get("slot"), previous.get("quantity") or 0)
+        changes: Dict[str, int] = {}
+        if not count:
+            return changes
+        for modifier in self.item.modifiers.all():
+            if modifier.min_value != modifier.max_value:
+                return None
+            changes[modifier.stats] = changes.get(modifier.stats, 0) + modifier.calculated_value * count
+        return changes
+
+    def reset_character_stats(self, incremental: bool = False):
         """
         Optimisation de la réinitialisation des stats du personnage concerné
+        :param incremental: Tente une mise à jour incrémentale des statistiques du personnage
         """
         character = self._state.fields_cache.get("character")
+        if incremental:
+            changes = self.get_stats_changes()
+            if changes == {} or (changes and character and character.update_stats(**changes)):
+                return
         Character.reset_stats(character or self.character_id)
 
     def save(self, *args, **kwargs):
         """
         Sauvegarde de l'objet
         """
-        self.reset_character_stats()
-        if (not self.slot and self.quantity <= 0) or (self.condition is not None and self.condition <= 0):
+        self.reset_character_stats(incremental=True)
+        if self.clean_state():
             kwargs = {k: v for k, v in kwargs.items() if k.startswith("_")}
             return self.delete(**kwargs)
+        result = super().save(*args, **kwargs)
+        self.update_inventory()
+        return result
+
+    def update_inventory(self, deleted: bool = False) -> None:
+        """
+        Répercute la modification de l'objet dans l'index de l'inventaire du personnage (s'il est chargé)
+        :param deleted: Objet supprimé ?
+        :return: Rien
+        """
+        character = self._state.fields_cache.get("character")
+        if character is not None and character._inventory_index is not None:
+            character._inventory_index.update(self, deleted=deleted)
+
+    def clean_state(self) -> bool:
+        """
+        Borne la quantité, l'état et les munitions de l'objet avant sa sauvegarde
+        :return: Vrai si l'objet est épuisé ou détruit et doit être supprimé, faux sinon
+        """
+        if (not self.slot and self.quantity <= 0) or (self.condition is not None and self.condition <= 0):
+            return True
         self.quantity = max(0, self.quantity) if self.quantity else 0
         self.condition = (
             max(0.0, min(1.0, self.condition or 0.0))
@@ -3013,13 +4034,14 @@ class Equipment(CommonModel):
             else None
         )
         self.clip_count = max(0, self.clip_count or 0) if self.item.clip_size else None
-        return super().save(*args, **kwargs)
+        return False
 
     def delete(self, *args, **kwargs):
         """
         Suppression de l'objet
         """
         self.reset_character_stats()
+        self.update_inventory(deleted=True)
         return super().delete(*args, **kwargs)
 
     def __str__(self) -> str:
@@ -3231,6 +4253,21 @@ class ActiveEffect(CommonModel):
     next_date = models.DateTimeField(blank=True, null=True, verbose_name=_("date suivante"))
     damages, next_effects = [], []
 
+    def get_ticks(self, game_date: datetime) -> int:
+        """
+        Calcule le nombre d'applications de l'effet dues à une date (sans dépasser la date de fin de l'effet)
+        :param game_date: Date actuelle de jeu
+        :return: Nombre d'applications
+        """
+        if not self.next_date or self.next_date > game_date:
+            return 0
+        if self.end_date and self.next_date > self.end_date:
+            return 0
+        if not self.effect.interval:
+            return int(self.start_date == game_date)
+        last_date = min(game_date, self.end_date) if self.end_date else game_date
+        return (last_date - self.next_date) // self.effect.interval + 1
+
     def get_progress(self, current_date: datetime) -> Optional[List[Tuple[float, datetime, str]]]:
         """
         Retourne l'avancement de l'effet dans le temps
@@ -3288,17 +4325,13 @@ class CampaignEffect(ActiveEffect):
         if not self.campaign or not self.effect.damage_config:
             return self.damages
         game_date = self.campaign.current_game_date
-        while self.next_date and self.next_date <= game_date:
-            if self.start_date != game_date and not self.effect.interval:
-                break
-            if self.end_date and self.next_date > self.end_date:
-                break
-            damage = character.damage(save=save, **self.effect.damage_config)
+        ticks = self.get_ticks(game_date)
+        if ticks:
+            damage = character.damage(save=save, ticks=ticks, **self.effect.damage_config)
             damage.source = self.effect
             self.damages.append(damage)
-            if not self.effect.interval:
-                break
-            self.next_date += self.effect.interval
+            if self.effect.interval:
+                self.next_date += ticks * self.effect.interval
         if self.damages or (self.end_date and self.end_date <= game_date):
             self.save()
         self.damages = self.damages
@@ -3315,21 +4348,17 @@ class CampaignEffect(ActiveEffect):
             return self.damages
         game_date = self.campaign.current_game_date
         if self.effect.damage_config:
-            characters = self.campaign.characters.filter(is_active=True).exclude(health__lte=0)
-            while self.next_date and self.next_date <= game_date:
-                if self.start_date != game_date and not self.effect.interval:
-                    break
-                if self.end_date and self.next_date > self.end_date:
-                    break
-                for character in characters:
-                    damage = character.damage(save=save, **self.effect.damage_config)
+            ticks = self.get_ticks(game_date)
+            # Applied once per time advance while running, every remaining application is caught up once ended
+            if not self.end_date or game_date <= self.end_date:
+                ticks = min(ticks, 1)
+            if ticks:
+                for character in self.campaign.characters.filter(is_active=True).exclude(health__lte=0):
+                    damage = character.damage(save=save, ticks=ticks, **self.effect.damage_config)
                     damage.source = self.effect
                     self.damages.append(damage)
-                if not self.effect.interval:
-                    break
-                self.next_date += self.effect.interval
-                if not self.end_date or game_date <= self.end_date:
-                    break
+                if self.effect.interval:
+                    self.next_date += ticks * self.effect.interval
         if self.damages or (self.end_date and self.end_date <= game_date):
             self.save()
         return self.damages
@@ -3338,8 +4367,7 @@ class CampaignEffect(ActiveEffect):
         """
         Sauvegarde de l'effet actif
         """
-        for character_id in self.campaign.characters.values_list("pk", flat=True):
-            Character.reset_stats(character_id)
+        Character.reset_stats_bulk(campaign=self.campaign_id)
         if not self.start_date:
             self.start_date = self.campaign.current_game_date
         if not self.end_date and self.start_date and self.effect.duration:
@@ -3365,8 +4393,7 @@ class CampaignEffect(ActiveEffect):
         """
         Suppression de l'effet actif
         """
-        for character_id in self.campaign.characters.values_list("pk", flat=True):
-            Character.reset_stats(character_id)
+        Character.reset_stats_bulk(campaign=self.campaign_id)
         if self.pk:
             return super().delete(*args, **kwargs)
 
@@ -3376,6 +4403,10 @@ class CampaignEffect(ActiveEffect):
     class Meta:
         verbose_name = _("effet de campagne")
         verbose_name_plural = _("effets de campagne")
+        indexes = [
+            models.Index(fields=["campaign", "next_date"], name="campaigneffect_next_date_idx"),
+            models.Index(fields=["campaign", "end_date"], name="campaigneffect_end_date_idx"),
+        ]
 
 
 class CharacterEffect(ActiveEffect):
@@ -3409,17 +4440,13 @@ class CharacterEffect(ActiveEffect):
             return self.damages
         game_date = character.campaign.current_game_date
         if self.effect.damage_config:
-            while self.next_date and self.next_date <= game_date:
-                if self.start_date != game_date and not self.effect.interval:
-                    break
-                if self.end_date and self.next_date > self.end_date:
-                    break
-                damage = character.damage(save=save, **self.effect.damage_config)
+            ticks = self.get_ticks(game_date)
+            if ticks:
+                damage = character.damage(save=save, ticks=ticks, **self.effect.damage_config)
                 damage.source = self.effect
                 self.damages.append(damage)
-                if not self.effect.interval:
-                    break
-                self.next_date += self.effect.interval
+                if self.effect.interval:
+                    self.next_date += ticks * self.effect.interval
         if self.damages or (self.end_date and self.end_date <= game_date):
             self.save()
         return self.damages
@@ -3476,6 +4503,91 @@ class CharacterEffect(ActiveEffect):
     class Meta:
         verbose_name = _("effet de personnage")
         verbose_name_plural = _("effets de personnage")
+        indexes = [
+            models.Index(fields=["character", "next_date"], name="charactereffect_next_date_idx"),
+            models.Index(fields=["character", "end_date"], name="charactereffect_end_date_idx"),
+        ]
+
+
+class EffectScheduler:
+    """
+    Files de priorité des effets actifs d'une campagne arrivant à échéance (prochaine application ou fin)
+    Seuls les effets dus à la date courante de la campagne sont chargés (grâce aux index sur leurs dates),
+    ils sont ensuite traités par ordre d'échéance pour la campagne puis pour chacun de ses personnages
+    """
+
+    def __init__(self, campaign: "Campaign"):
+        """
+        Initialisation de l'ordonnanceur
+        :param campaign: Campagne
+        """
+        self.campaign = campaign
+        self.game_date = campaign.current_game_date
+        self.queues: Dict[Optional[int], List[Tuple[datetime, int, ActiveEffect]]] = {}
+        self.counter = count()
+        for effect in (
+            CampaignEffect.objects.filter(self.due, campaign=campaign)
+            .select_related("effect__next_effect")
+            .prefetch_related("effect__modifiers")
+        ):
+            effect.campaign = campaign
+            self.push(None, effect)
+
+    @property
+    def due(self) -> Q:
+        """
+        Filtre des effets dus à la date courante de la campagne
+        :return: Filtre
+        """
+        return Q(next_date__lte=self.game_date) | Q(end_date__lte=self.game_date)
+
+    def push(self, owner: Optional[int], effect: ActiveEffect) -> None:
+        """
+        Ajoute un effet dans la file de priorité de son porteur
+        :param owner: Identifiant du personnage (ou rien pour la campagne)
+        :param effect: Effet actif
+        :return: Rien
+        """
+        due_date = min(date for date in (effect.next_date, effect.end_date) if date is not None)
+        heappush(self.queues.setdefault(owner, []), (due_date, next(self.counter), effect))
+
+    def pop(self, owner: Optional[int]) -> Iterable[ActiveEffect]:
+        """
+        Retire les effets dus d'un porteur par ordre d'échéance
+        :param owner: Identifiant du personnage (ou rien pour la campagne)
+        :return: Effets actifs
+        """
+        queue = self.queues.pop(owner, [])
+        while queue:
+            yield heappop(queue)[-1]
+
+    def load_character_effects(self, characters: Iterable["Character"]) -> None:
+        """
+        Charge en une seule requête les effets dus des personnages
+        :param characters: Personnages
+        :return: Rien
+        """
+        characters = {character.pk: character for character in characters}
+        if not characters:
+            return
+        for effect in (
+            CharacterEffect.objects.filter(self.due, character_id__in=characters)
+            .select_related("effect__next_effect")
+            .prefetch_related("effect__modifiers")
+        ):
+            effect.character = characters[effect.character_id]
+            self.push(effect.character_id, effect)
+
+    def apply_campaign_effects(self, save: bool = True) -> List["DamageHistory"]:
+        """
+        Applique les effets dus de la campagne
+        :param save: Sauvegarde les données relatives aux personnages ?
+        :return: Dégâts potentiels infligés
+        """
+        damages = []
+        for effect in self.pop(None):
+            damages.extend(effect.apply_all(save=save))
+        return damages
 
 
 class Loot(CommonModel):
@@ -3570,17 +4682,67 @@ class Loot(CommonModel):
         item: Union["Item", int],
         quantity: int = 1,
         condition: float = 1.0,
-    ) -> "Loot":
-        if isinstance(item, (int, str)):
-            item = Item.objects.get(pk=int(item))
-        try:
-            _assert(not item.is_repairable)
-            loot = Loot.objects.get(campaign=campaign, item=item)
-            loot.quantity += quantity
-            loot.save()
-        except (AssertionError, Loot.DoesNotExist):
-            loot = Loot.objects.create(campaign=campaign, item=item, quantity=quantity, condition=condition)
-        return loot
+    ) -> Optional["Loot"]:
+        """
+        Crée un butin ou complète le butin existant de la campagne pour les objets non réparables
+        :param campaign: Campagne
+        :param item: Objet
+        :param quantity: Quantité
+        :param condition: Etat
+        :return: Butin
+        """
+        return next(iter(cls.create_bulk(campaign, [(item, quantity, condition)])), None)
+
+    @classmethod
+    def create_bulk(
+        cls,
+        campaign: Union["Campaign", int],
+        items: Iterable[Tuple[Union["Item", int], int, Optional[float]]],
+    ) -> List["Loot"]:
+        """
+        Crée en masse des butins dans une campagne en empilant les objets non réparables
+        (les butins existants sont complétés, les quantités sont fusionnées en mémoire avant l'écriture)
+        :param campaign: Campagne
+        :param items: Objets, quantités et états
+        :return: Butins (un par objet)
+        """
+        campaign_id = gv(campaign, "pk", campaign)
+        items = [(item, quantity, condition) for item, quantity, condition in items if quantity > 0]
+        item_ids = {int(item) for item, quantity, condition in items if not isinstance(item, Item)}
+        all_items = Item.objects.in_bulk(item_ids) if item_ids else {}
+        items = [
+            (item if isinstance(item, Item) else all_items[int(item)], quantity, condition)
+            for item, quantity, condition in items
+        ]
+        stacks: Dict[int, "Loot"] = {}
+        stackable_ids = {item.pk for item, quantity, condition in items if not item.is_repairable}
+        if stackable_ids:
+            for loot in Loot.objects.filter(campaign_id=campaign_id, item_id__in=stackable_ids).order_by("pk"):
+                stacks.setdefault(loot.item_id, loot)
+        loots, to_create, to_update = [], [], {}
+        for item, quantity, condition in items:
+            loot = None if item.is_repairable else stacks.get(item.pk)
+            if loot is None:
+                loot = Loot(
+                    campaign_id=campaign_id,
+                    item=item,
+                    quantity=quantity,
+                    condition=max(0.0, min(1.0, condition or 1.0)) if item.is_repairable else None,
+                )
+                to_create.append(loot)
+                if not item.is_repairable:
+                    stacks[item.pk] = loot
+            else:
+                loot.quantity += quantity
+                if loot.pk:
+                    to_update[loot.pk] = loot
+            loots.append(loot)
+        with transaction.atomic():
+            if to_create:
+                Loot.objects.bulk_create(to_create)
+            if to_update:
+                Loot.objects.bulk_update(to_update.values(), fields=("quantity",))
+        return loots
 
     def save(self, *args, **kwargs):
         """
@@ -3634,7 +4796,6 @@ class LootTemplate(CommonModel):
         :param character: Personnage
         :return: Liste de butins, argent trouvé
         """
-        loots = []
         if isinstance(campaign, (int, str)):
             campaign = Campaign.objects.get(pk=campaign)
         roll_modifier = 0
@@ -3650,18 +4811,18 @@ class LootTemplate(CommonModel):
         if money:
             campaign.money_loot += money
             campaign.save(update_fields=("money_loot",))
+        items = []
         for template in self.items.select_related("item").all():
             if randint(1, 100 + roll_modifier) > template.chance:
                 continue
-            loots.append(
-                Loot.create(
-                    campaign=campaign,
-                    item=template.item,
-                    quantity=randint(template.min_quantity, template.max_quantity),
-                    condition=randint(template.min_condition, template.max_condition) / 100.0,
+            items.append(
+                (
+                    template.item,
+                    randint(template.min_quantity, template.max_quantity),
+                    randint(template.min_condition, template.max_condition) / 100.0,
                 )
             )
-        return loots, money
+        return Loot.create_bulk(campaign, items), money
 
     def duplicate(self, name: str = None) -> "LootTemplate":
         """
@@ -3860,8 +5021,17 @@ class RollHistory(CommonModel):
             .annotate(count=Count("*"))
             .values_list("level", "stats", "success", "critical", "count")
         )
-        for level, stats, success, critical, count in rolls:
-            all_stats[stats].add(level, success, critical, count or 0)
+        # Archived rolls are counted from their rollups
+        counts = Counter()
+        for level, stats, success, critical, total in chain(
+            rolls,
+            RollHistoryRollup.objects.filter(character=character).values_list(
+                "level", "stats", "success", "critical", "count"
+            ),
+        ):
+            counts[level, stats, success, critical] += total or 0
+        for (level, stats, success, critical), total in counts.items():
+            all_stats[stats].add(level, success, critical, total)
         return list(all_stats.values())
 
     @property
@@ -3931,7 +5101,7 @@ class DamageHistory(Damage):
         verbose_name=_("personnage"),
     )
     level = models.SmallIntegerField(default=0, verbose_name=_("niveau"))
-    base_damage = models.SmallIntegerField(default=0, verbose_name=_("dégâts de base"))
+    base_damage = models.IntegerField(default=0, verbose_name=_("dégâts de base"))
     armor = models.ForeignKey(
         "Item",
         blank=True,
@@ -3946,8 +5116,9 @@ class DamageHistory(Damage):
     armor_damage = models.FloatField(default=0.0, verbose_name=_("dégâts armure"))
     damage_threshold = models.FloatField(default=0.0, verbose_name=_("absorption dégâts"))
     damage_resistance = models.FloatField(default=0.0, verbose_name=_("résistance dégâts"))
-    real_damage = models.SmallIntegerField(default=0, verbose_name=_("dégâts réels"))
+    real_damage = models.IntegerField(default=0, verbose_name=_("dégâts réels"))
     damage_rate = models.FloatField(default=0.0, verbose_name=_("taux de dégâts"))
+    ticks = models.PositiveIntegerField(default=1, verbose_name=_("applications"))
     source = models.ForeignKey("Effect", blank=True, null=True, on_delete=models.SET_NULL, verbose_name=_("source"))
     reason = models.TextField(blank=True, verbose_name=_("raison"))
 
@@ -4002,6 +5173,8 @@ class DamageHistory(Damage):
                 real_damage=self.real_damage * (1, -1)[self.is_heal],
                 type=self.get_damage_type_display(),
             )
+        if self.ticks > 1:
+            label = _("{label} (x{ticks})").format(label=label, ticks=self.ticks)
         return _("{label} - source : {source}").format(label=label, source=self.source) if self.source else label
 
     def __str__(self) -> str:
@@ -4233,9 +5406,20 @@ class FightHistory(CommonModel):
             .annotate(count=Count("*"), damage=Sum("damage__real_damage"))
             .values_list("level", "is_attacker", "success", "critical", "count", "damage")
         )
+        # Archived fights are counted from their rollups
+        totals: Dict[Tuple[int, bool, bool, bool], List[int]] = {}
+        for level, is_attacker, success, critical, total, damage in chain(
+            fights,
+            FightHistoryRollup.objects.filter(character=character).values_list(
+                "level", "is_attacker", "success", "critical", "count", "damage"
+            ),
+        ):
+            values = totals.setdefault((level, is_attacker, success, critical), [0, 0])
+            values[0] += total or 0
+            values[1] += damage or 0
         attacker, defender = FightHistory.FightStats(character, True), FightHistory.FightStats(character, False)
-        for level, is_attacker, success, critical, count, damage in fights:
-            (defender, attacker)[is_attacker].add(level, success, critical, count or 0, damage or 0)
+        for (level, is_attacker, success, critical), (total, damage) in totals.items():
+            (defender, attacker)[is_attacker].add(level, success, critical, total, damage)
         return attacker, defender
 
     @property
@@ -4347,6 +5531,207 @@ class FightHistory(CommonModel):
         verbose_name_plural = _("historiques des combats")
 
 
+class RollHistoryRollup(CommonModel):
+    """
+    Cumul des jets archivés
+    """
+
+    character = models.ForeignKey(
+        "Character",
+        on_delete=models.CASCADE,
+        related_name="roll_rollups",
+        verbose_name=_("personnage"),
+    )
+    level = models.SmallIntegerField(default=0, verbose_name=_("niveau"))
+    stats = models.CharField(max_length=20, blank=True, choices=ROLL_STATS, verbose_name=_("statistique"))
+    success = models.BooleanField(default=False, verbose_name=_("succès ?"))
+    critical = models.BooleanField(default=False, verbose_name=_("critique ?"))
+    count = models.PositiveIntegerField(default=0, verbose_name=_("nombre"))
+
+    def __str__(self) -> str:
+        return f"{self.character} - {self.get_stats_display()} ({self.level})"
+
+    class Meta:
+        verbose_name = _("cumul de jets")
+        verbose_name_plural = _("cumuls des jets")
+        unique_together = ("character", "level", "stats", "success", "critical")
+
+
+class FightHistoryRollup(CommonModel):
+    """
+    Cumul des combats archivés
+    """
+
+    character = models.ForeignKey(
+        "Character",
+        on_delete=models.CASCADE,
+        related_name="fight_rollups",
+        verbose_name=_("personnage"),
+    )
+    is_attacker = models.BooleanField(default=True, verbose_name=_("attaquant ?"))
+    level = models.SmallIntegerField(default=0, verbose_name=_("niveau"))
+    success = models.BooleanField(default=False, verbose_name=_("touché ?"))
+    critical = models.BooleanField(default=False, verbose_name=_("critique ?"))
+    count = models.PositiveIntegerField(default=0, verbose_name=_("nombre"))
+    damage = models.IntegerField(default=0, verbose_name=_("dégâts"))
+
+    def __str__(self) -> str:
+        return f"{self.character} ({self.level})"
+
+    class Meta:
+        verbose_name = _("cumul de combats")
+        verbose_name_plural = _("cumuls des combats")
+        unique_together = ("character", "is_attacker", "level", "success", "critical")
+
+
+class HistoryArchiver:
+    """
+    Archivage des historiques de jets, de dégâts et de combats plus anciens qu'une date réelle et/ou en jeu
+    Les lignes archivées sont écrites dans un fichier JSON-lines compressé (rechargeable avec loaddata),
+    les jets et combats sont cumulés par personnage, niveau et résultat pour les statistiques avant d'être supprimés
+    """
+
+    def __init__(
+        self,
+        date: Optional[datetime] = None,
+        game_date: Optional[datetime] = None,
+        campaign: Union["Campaign", int] = None,
+        directory: Optional[str] = None,
+        batch_size: int = HISTORY_ARCHIVE_BATCH_SIZE,
+    ):
+        """
+        Initialisation de l'archivage
+        :param date: Date réelle avant laquelle les historiques sont archivés
+        :param game_date: Date en jeu avant laquelle les historiques sont archivés
+        :param campaign: Campagne (toutes par défaut)
+        :param directory: Répertoire du fichier d'archive (aucun fichier si vide)
+        :param batch_size: Nombre de lignes traitées à la fois
+        """
+        _assert(date or game_date, _("Une date réelle ou en jeu est nécessaire pour archiver les historiques."))
+        self.date, self.game_date = date, game_date
+        self.campaign_id = gv(campaign, "pk", campaign)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.filename = None
+
+    def get_queryset(self, model: models.Model, character: str) -> models.QuerySet:
+        """
+        Retourne les historiques à archiver
+        :param model: Modèle d'historique
+        :param character: Champ du personnage concerné
+        :return: QuerySet
+        """
+        filters = {}
+        if self.date:
+            filters["date__lt"] = self.date
+        if self.game_date:
+            filters["game_date__lt"] = self.game_date
+        if self.campaign_id:
+            filters[f"{character}__campaign_id"] = self.campaign_id
+        return model.objects.filter(**filters).order_by("pk")
+
+    def archive(self) -> Dict[str, int]:
+        """
+        Archive les historiques
+        :return: Nombre de lignes archivées par modèle
+        """
+        stream = None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.filename = os.path.join(self.directory, f"histories-{now():%Y%m%d%H%M%S}.jsonl.gz")
+            stream = gzip.open(self.filename, "wt", encoding="utf-8")
+        counts = {}
+        try:
+            # Fights are archived before damages which would delete them in cascade
+            for model, character, rollup in (
+                (RollHistory, "character", self.rollup_rolls),
+                (FightHistory, "attacker", self.rollup_fights),
+                (DamageHistory, "character", None),
+            ):
+                queryset = self.get_queryset(model, character)
+                if model is DamageHistory:
+                    queryset = queryset.filter(fight__isnull=True)
+                counts[model._meta.model_name] = 0
+                while True:
+                    with transaction.atomic():
+                        rows = list(queryset[: self.batch_size])
+                        if not rows:
+                            break
+                        if stream:
+                            serializers.serialize("jsonl", rows, stream=stream)
+                        if rollup:
+                            rollup(rows)
+                        model.objects.filter(pk__in=[row.pk for row in rows]).delete()
+                    counts[model._meta.model_name] += len(rows)
+        finally:
+            if stream:
+                stream.close()
+        return counts
+
+    @staticmethod
+    def save_rollups(model: models.Model, keys: Tuple[str, ...], values: Dict[tuple, Counter]) -> None:
+        """
+        Ajoute des compteurs aux cumuls existants et les écrit en une seule requête
+        :param model: Modèle de cumul
+        :param keys: Champs identifiant un cumul
+        :param values: Compteurs à ajouter par identifiant
+        :return: Rien
+        """
+        if not values:
+            return
+        attnames = [model._meta.get_field(key).attname for key in keys]
+        fields = list(next(iter(values.values())))
+        for rollup in model.objects.filter(character_id__in={key[0] for key in values}):
+            key = tuple(gv(rollup, attname) for attname in attnames)
+            if key in values:
+                values[key].update({field: gv(rollup, field) for field in fields})
+        features = connections[router.db_for_write(model)].features
+        model.objects.bulk_create(
+            [model(**dict(zip(attnames, key)), **counters) for key, counters in values.items()],
+            update_conflicts=True,
+            unique_fields=keys if features.supports_update_conflicts_with_target else None,
+            update_fields=fields,
+        )
+
+    def rollup_rolls(self, rolls: List["RollHistory"]) -> None:
+        """
+        Cumule des jets archivés
+        :param rolls: Jets
+        :return: Rien
+        """
+        values = {}
+        for roll in rolls:
+            key = (roll.character_id, roll.level, roll.stats, roll.success, roll.critical)
+            values.setdefault(key, Counter(count=0))["count"] += 1
+        self.save_rollups(RollHistoryRollup, ("character", "level", "stats", "success", "critical"), values)
+
+    def rollup_fights(self, fights: List["FightHistory"]) -> None:
+        """
+        Cumule des combats archivés (pour l'attaquant et pour le défenseur)
+        :param fights: Combats
+        :return: Rien
+        """
+        damages = dict(
+            DamageHistory.objects.filter(pk__in=[fight.damage_id for fight in fights if fight.damage_id]).values_list(
+                "pk", "real_damage"
+            )
+        )
+        values = {}
+        for fight in fights:
+            if fight.status not in (STATUS_HIT_SUCCEED, STATUS_TARGET_KILLED, STATUS_HIT_FAILED):
+                continue
+            for character_id, is_attacker, level in (
+                (fight.attacker_id, True, fight.attacker_level),
+                (fight.defender_id, False, fight.defender_level),
+            ):
+                counters = values.setdefault(
+                    (character_id, is_attacker, level, fight.success, fight.critical), Counter(count=0, damage=0)
+                )
+                counters["count"] += 1
+                counters["damage"] += damages.get(fight.damage_id) or 0
+        self.save_rollups(FightHistoryRollup, ("character", "is_attacker", "level", "success", "critical"), values)
+
+
 class Log(CommonModel):
     """
     Journal
@@ -4412,12 +5797,17 @@ __all__ = (
     "CampaignEffect",
     "Character",
     "CharacterEffect",
+    "CombatRecorder",
     "Damage",
     "DamageHistory",
     "Effect",
     "EffectModifier",
+    "EffectScheduler",
     "Equipment",
     "FightHistory",
+    "FightHistoryRollup",
+    "HistoryArchiver",
+    "InventoryIndex",
     "Item",
     "ItemModifier",
     "Log",
@@ -4429,6 +5819,8 @@ __all__ = (
     "Player",
     "Resistance",
     "RollHistory",
+    "RollHistoryRollup",
     "Statistics",
     "Stats",
+    "StatsUnitOfWork",
 )
@@ -0,0 +1,780 @@
+# coding: utf-8
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from operator import add
+from random import Random
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from django.utils.translation import gettext_lazy as _
+
+from fallout.combat import (
+    DAMAGE_ATTRIBUTES,
+    CombatantSnapshot,
+    get_ap_cost,
+    get_armor,
+    get_armor_class,
+    get_critical_chance,
+    get_critical_multiplier,
+    get_damage_modifiers,
+    get_damage_multiplier,
+    get_damage_reduction,
+    get_damage_type,
+    get_hit_chance,
+    get_roll_modifier,
+    get_weapon_wear,
+)
+from fallout.constants import *  # noqa
+from fallout.enums import *  # noqa
+from fallout.models import Character, _assert
+
+gv = getattr
+
+# Types de dégâts qui ne modifient pas la santé du personnage ciblé
+NON_HEALTH_DAMAGE = tuple(DAMAGE_ATTRIBUTES)
+
+
+class FightOutcome(NamedTuple):
+    """
+    Résultat d'un coup simulé
+    """
+
+    status: str
+    body_part: Optional[str] = None
+    hit_chance: int = 0
+    hit_roll: int = 0
+    success: bool = False
+    critical: bool = False
+    damage_type: Optional[str] = None
+    real_damage: int = 0
+
+
+class FightSimulation:
+    """
+    Simulation de Monte-Carlo d'un combat (ou d'une rafale sur une seule cible) entre deux personnages
+    Les personnages et leurs équipements sont figés une seule fois, chaque tirage ne fait ensuite que des calculs
+    en reprenant exactement les règles (et l'ordre des tirages aléatoires) du moteur de combat (fallout.combat)
+    """
+
+    def __init__(
+        self,
+        attacker: Union[Character, CombatantSnapshot],
+        target: Union[Character, CombatantSnapshot],
+        target_range: int = 1,
+        target_part: Optional[str] = None,
+        weapon_type: str = WEAPON_TYPE_PRIMARY,
+        hit_chance_modifier: int = 0,
+        is_burst: bool = False,
+        is_action: bool = False,
+        force_success: bool = False,
+        force_critical: bool = False,
+        force_raw_damage: bool = False,
+        **kwargs,
+    ):
+        """
+        Initialisation de la simulation
+        :param attacker: Attaquant (ou son état figé)
+        :param target: Personnage ciblé (ou son état figé)
+        :param target_range: Distance (en cases) entre les deux personnages
+        :param target_part: Partie du corps ciblée par l'attaquant (ou aléatoire)
+        :param weapon_type: Type d'arme utilisé ("primary", "secondary", "grenade" ou "unarmed")
+        :param hit_chance_modifier: Modificateurs complémentaires de précision (lumière, couverture, etc...)
+        :param is_burst: Attaque en rafale ?
+        :param is_action: Vérifie les points d'action de l'attaquant ?
+        :param force_success: Force le succès du coup ?
+        :param force_critical: Force un coup critique ?
+        :param force_raw_damage: Force les dégâts bruts ?
+        """
+        self.target_range, self.target_part = int(target_range), target_part or None
+        self.is_burst, self.is_grenade = bool(is_burst), weapon_type == WEAPON_TYPE_GRENADE
+        self.force_success, self.force_critical = bool(force_success), bool(force_critical)
+        self.force_raw_damage = bool(force_raw_damage)
+        self.hit_chance_modifier = int(hit_chance_modifier or 0)
+        self.ap_status = None
+        if isinstance(attacker, Character):
+            attacker = attacker.get_snapshot()
+        if isinstance(target, Character):
+            target = target.get_snapshot()
+        stats = attacker.stats
+        # Equipment
+        weapon_equipment, ammo_equipment = attacker.get_weapon(weapon_type)
+        _assert(not self.is_grenade or weapon_equipment, _("L'attaquant ne possède pas ou plus de grenade."))
+        weapon, ammo = gv(weapon_equipment, "item", None), gv(ammo_equipment, "item", None)
+        self.weapon, self.ammo = weapon, ammo
+        self.has_weapon_equipment = bool(weapon_equipment and weapon)
+        self.clip_size = gv(weapon, "clip_size", 0) or 0
+        self.is_throwable = bool(gv(weapon, "is_throwable", False))
+        self.burst_count = (gv(weapon, "burst_count", 0) or 0) if self.is_burst else 1
+        _assert(
+            not self.is_burst or (weapon and self.burst_count and not self.is_grenade),
+            _("L'attaquant ne possède pas d'arme ou celle-ci ne permet pas d'attaque en rafale."),
+        )
+        self.clip_count = gv(weapon_equipment, "clip_count", 0) or 0
+        self.quantity = gv(weapon_equipment, "quantity", 0) or 0
+        self.ammo_quantity = gv(ammo_equipment, "quantity", 0) or 0
+        self.has_ammo_equipment = ammo_equipment is not None
+        self.condition = gv(weapon_equipment, "condition", None)
+        self.health = target.health
+        # Weapon condition decrease on each shot
+        self.durability = gv(weapon, "durability", 0)
+        self.weapon_damage = get_weapon_wear(weapon, ammo)
+        self.is_repairable = bool(gv(weapon, "is_repairable", False))
+        # Action points
+        if is_action:
+            ap_cost = get_ap_cost(attacker, weapon, self.target_part, self.is_burst and not self.is_grenade)
+            if ap_cost > attacker.action_points:
+                self.ap_status = STATUS_NOT_ENOUGH_AP
+        # Body part roll
+        self.roll_modifier = get_roll_modifier(stats)
+        self.critical_fail = min(100, CRITICAL_FAIL_D100 - self.roll_modifier)
+        # Base hit chance (before weapon condition)
+        self.hit_chance, max_range = get_hit_chance(
+            attacker, weapon, ammo, self.target_range, self.target_part, self.is_burst
+        )
+        self.out_of_range = self.target_range > max_range
+        # Base damage
+        self.damage_items = []
+        for item in (weapon, ammo):
+            if not item:
+                continue
+            _assert(item.min_damage <= item.max_damage, _("Les bornes de dégâts min. et max. ne sont pas correctes."))
+            self.damage_items.append((item.min_damage + item.raw_damage, item.max_damage - item.min_damage + 1))
+        self.melee_damage = stats.melee_damage if not weapon or weapon.is_melee else 0
+        self.damage_multiplier = get_damage_multiplier(attacker, weapon, ammo)
+        self.damage_type = get_damage_type(weapon, ammo)
+        self.critical_raw_chance = stats.critical_raw_chance + add(
+            gv(weapon, "critical_raw_modifier", 0),
+            gv(ammo, "critical_raw_modifier", 0),
+        )
+        self.critical_damage = add(gv(weapon, "critical_damage", 0), gv(ammo, "critical_damage", 0))
+        damage_modifiers = get_damage_modifiers(weapon, ammo)
+        # Body part specific modifiers
+        damage_types = {self.damage_type}
+        if self.damage_type not in LIST_NON_DAMAGE:
+            damage_types.add(DAMAGE_RAW)
+        self.body_parts: Dict[str, Tuple[float, int, float]] = {}
+        self.armors: Dict[Tuple[str, str], Tuple[float, float, float, float]] = {}
+        for body_part in BODY_PARTS_MODIFIERS:
+            armor = target.get_equipment(ITEM_HELMET if body_part in (PART_EYES, PART_HEAD) else ITEM_ARMOR)
+            self.body_parts[body_part] = (
+                get_armor_class(target, gv(armor, "item", None), weapon, ammo),
+                get_critical_chance(attacker, body_part, weapon, ammo),
+                get_critical_multiplier(attacker, body_part, weapon, ammo),
+            )
+            for damage_type in damage_types:
+                reduction = get_damage_reduction(
+                    target, get_armor(target, damage_type, body_part), damage_type, *damage_modifiers
+                )
+                self.armors[body_part, damage_type] = (
+                    reduction.armor_threshold,
+                    reduction.armor_factor,
+                    reduction.damage_threshold,
+                    reduction.damage_factor,
+                )
+
+    def fight(self, rng: Random, state: Dict[str, Union[int, float]], hit_count: int = 0) -> FightOutcome:
+        """
+        Simule un coup en modifiant l'état courant (santé de la cible, munitions et état de l'arme)
+        :param rng: Générateur aléatoire
+        :param state: Etat courant du combat
+        :param hit_count: Compteur de coups lors d'une attaque en rafale
+        :return: Résultat du coup
+        """
+        # randint(a, b) is a + _randbelow(b - a + 1): same draws as resolve_fight without the call overhead
+        randbelow = rng._randbelow
+        # Fight conditions
+        status = None
+        if state["health"] <= 0:
+            status = STATUS_TARGET_DEAD
+        elif self.weapon:
+            if self.clip_size and state["clip_count"] <= 0:
+                status = STATUS_NO_MORE_AMMO
+            elif self.is_throwable and state["quantity"] <= 0:
+                if not self.is_grenade or (self.is_burst and not hit_count):
+                    status = STATUS_NO_MORE_AMMO
+        status = self.ap_status or status
+        if status:
+            return FightOutcome(status)
+        # Body part
+        body_part = self.target_part
+        if not body_part:
+            for body_part, chance in BODY_PARTS_RANDOM_CHANCES:
+                if randbelow(100 + self.roll_modifier) < chance:
+                    break
+        body_part = body_part or PART_TORSO
+        armor_class, critical_chance, critical_multiplier = self.body_parts[body_part]
+        # Hit roll
+        hit_chance = self.hit_chance * (state["condition"] or 1.0)
+        hit_chance -= armor_class
+        hit_chance += self.hit_chance_modifier
+        hit_chance = max(min(hit_chance, MAX_HIT_CHANCE), 0)
+        if self.out_of_range:
+            hit_chance = 0
+        hit_chance = int(round(hit_chance))
+        hit_roll = randbelow(100) + 1
+        success = self.force_success or hit_roll <= hit_chance
+        critical = self.force_critical or hit_roll >= self.critical_fail
+        status, damage_type, real_damage = STATUS_HIT_FAILED, None, 0
+        if success:
+            damage_type = self.damage_type
+            damage = 0
+            for base_damage, width in self.damage_items:
+                damage += randbelow(width) + base_damage
+            damage += self.melee_damage
+            damage *= self.damage_multiplier
+            status = STATUS_HIT_SUCCEED
+            critical = self.force_critical or hit_roll <= critical_chance
+            if critical:
+                damage *= critical_multiplier
+                damage += self.critical_damage
+                critical_raw_damage = self.force_raw_damage or randbelow(100) < self.critical_raw_chance
+                if damage_type not in LIST_NON_DAMAGE and critical_raw_damage:
+                    damage_type = DAMAGE_RAW
+            damage = max(damage, 0)
+            # Damage on target
+            damage += randbelow(1)  # randint(0, 0) of resolve_damage
+            real_damage = self.get_real_damage(damage, body_part, damage_type)
+            if damage_type not in NON_HEALTH_DAMAGE:
+                state["health"] -= real_damage
+            if state["health"] <= 0:
+                status = STATUS_TARGET_KILLED
+        # Clip count & weapon condition
+        if self.has_weapon_equipment:
+            if self.is_grenade and (not self.is_burst or not hit_count):
+                state["quantity"] -= 1
+                state["ammo"] += 1
+            elif not self.is_grenade and self.is_throwable:
+                state["quantity"] -= 1
+                state["ammo"] += 1
+            elif self.clip_size:
+                state["clip_count"] -= 1
+                state["ammo"] += 1
+            if self.durability and self.is_repairable:
+                state["condition"] -= self.weapon_damage
+        return FightOutcome(status, body_part, hit_chance, hit_roll, success, critical, damage_type, real_damage)
+
+    def get_real_damage(self, damage: float, body_part: str, damage_type: str) -> int:
+        """
+        Dégâts réellement infligés à la cible après absorptions et résistances (armure et personnage)
+        :param damage: Dégâts de l'attaque
+        :param body_part: Partie du corps touchée
+        :param damage_type: Type des dégâts
+        :return: Dégâts réels
+        """
+        armor_threshold, armor_factor, damage_threshold, damage_factor = self.armors[body_part, damage_type]
+        total_damage = max(damage - max(armor_threshold, 0), 0)
+        total_damage *= armor_factor
+        total_damage = max(total_damage - max(damage_threshold, 0), 0)
+        total_damage *= damage_factor
+        total_damage *= -1.0 if damage_type in LIST_HEALS + (ADD_MONEY, ADD_KARMA) else 1.0
+        return int(round(total_damage))
+
+    def get_state(self) -> Dict[str, Union[int, float]]:
+        """
+        Etat initial d'un combat simulé
+        :return: Etat
+        """
+        return dict(
+            health=self.health,
+            clip_count=self.clip_count,
+            quantity=self.quantity,
+            ammo_quantity=self.ammo_quantity,
+            condition=self.condition,
+            ammo=0,
+        )
+
+    def trial(self, rng: Random) -> Tuple[List[FightOutcome], Dict[str, Union[int, float]]]:
+        """
+        Simule un combat complet (un coup ou une rafale)
+        :param rng: Générateur aléatoire
+        :return: Résultats des coups et état final
+        """
+        state = self.get_state()
+        outcomes, hit_count = [], 0
+        for hit_count in range(self.burst_count):
+            if self.is_burst:
+                rng._randbelow(1)  # Same random draw as the target selection in Character.burst
+            outcome = self.fight(rng, state, hit_count)
+            outcomes.append(outcome)
+            if outcome.status in (
+                STATUS_TARGET_DEAD,
+                STATUS_TARGET_KILLED,
+                STATUS_NOT_ENOUGH_AP,
+                STATUS_NO_MORE_AMMO,
+                STATUS_WEAPON_BROKEN,
+            ):
+                break
+        if self.is_burst:
+            # Premature end of burst: removing remaining ammo and degrading weapon condition
+            remaining_ammo = self.burst_count - hit_count + 1
+            if remaining_ammo > 0 and self.has_ammo_equipment:
+                remaining_ammo = min(state["ammo_quantity"], remaining_ammo)
+                state["ammo_quantity"] -= remaining_ammo
+                state["ammo"] += remaining_ammo
+                if self.durability:
+                    state["condition"] -= remaining_ammo * self.weapon_damage
+        return outcomes, state
+
+    def run(self, count: int = SIMULATION_COUNT, seed: Optional[int] = None) -> Dict[str, Union[int, float, dict]]:
+        """
+        Lance la simulation
+        :param count: Nombre de combats simulés
+        :param seed: Graine du générateur aléatoire (optionnel)
+        :return: Statistiques de la simulation
+        """
+        count = max(1, min(int(count), SIMULATION_MAX_COUNT))
+        rng = Random(seed)
+        condition = self.condition if self.condition is not None else 1.0
+        shots = hits = criticals = critical_fails = kills = ammo = 0
+        condition_loss, status = 0.0, None
+        damages = []
+        for index in range(count):
+            outcomes, state = self.trial(rng)
+            if not index and outcomes[0].body_part is None:
+                status = outcomes[0].status
+            damage = 0
+            for outcome in outcomes:
+                if outcome.body_part is None:
+                    continue
+                shots += 1
+                damage += outcome.real_damage
+                if outcome.success:
+                    hits += 1
+                    criticals += outcome.critical
+                else:
+                    critical_fails += outcome.critical
+            damages.append(damage)
+            kills += state["health"] <= 0 < self.health
+            ammo += state["ammo"]
+            condition_loss += condition - (state["condition"] if state["condition"] is not None else 1.0)
+        damages.sort()
+        return dict(
+            count=count,
+            status=status,
+            shots=shots / count,
+            hit_chance=hits / (shots or 1),
+            critical_chance=criticals / (shots or 1),
+            critical_fail_chance=critical_fails / (shots or 1),
+            kill_chance=kills / count,
+            damage=sum(damages) / count,
+            damage_percentiles={
+                percentile: damages[min(count - 1, (count * percentile) // 100)] for percentile in (5, 25, 50, 75, 95)
+            },
+            ammo=ammo / count,
+            condition=condition_loss / count,
+        )
+
+
+class FightOdds(FightSimulation):
+    """
+    Calcul exact (sans tirage aléatoire) des chances et des dégâts d'un coup simple entre deux personnages
+    Les distributions de dégâts ne dépendent pas de la distance et sont calculées une seule fois par partie du corps,
+    seules les chances de toucher sont recalculées pour chaque distance
+    """
+
+    def __init__(
+        self,
+        attacker: Union[Character, CombatantSnapshot],
+        target: Union[Character, CombatantSnapshot],
+        weapon_type: str = WEAPON_TYPE_PRIMARY,
+        hit_chance_modifier: int = 0,
+    ):
+        """
+        Initialisation du calcul
+        :param attacker: Attaquant (ou son état figé)
+        :param target: Personnage ciblé (ou son état figé)
+        :param weapon_type: Type d'arme utilisé ("primary", "secondary", "grenade" ou "unarmed")
+        :param hit_chance_modifier: Modificateurs complémentaires de précision (lumière, couverture, etc...)
+        """
+        if isinstance(attacker, Character):
+            attacker = attacker.get_snapshot()
+        if isinstance(target, Character):
+            target = target.get_snapshot()
+        super().__init__(attacker, target, weapon_type=weapon_type, hit_chance_modifier=hit_chance_modifier)
+        self.attacker = attacker
+        # Body part randomly hit (same draws as the fight)
+        self.random_parts: Dict[str, float] = {}
+        remaining, roll_max = 1.0, max(100 + self.roll_modifier, 1)
+        for body_part, chance in BODY_PARTS_RANDOM_CHANCES:
+            self.random_parts[body_part] = remaining * min(max(chance, 0), roll_max) / roll_max
+            remaining -= self.random_parts[body_part]
+        self.random_parts[body_part] += remaining
+        # Distribution of the base damage (sum of uniform weapon and ammo damage rolls)
+        base_damages = {0: 1.0}
+        for base_damage, width in self.damage_items:
+            damages: Dict[int, float] = {}
+            for damage, chance in base_damages.items():
+                for value in range(base_damage + damage, base_damage + damage + width):
+                    damages[value] = damages.get(value, 0.0) + chance / width
+            base_damages = damages
+        # Distributions and kill chances of normal and critical hits on each body part
+        self.damages = {
+            body_part: (self.get_damages(base_damages, body_part), self.get_damages(base_damages, body_part, True))
+            for body_part in self.body_parts
+        }
+        self._odds: Dict[Tuple[str, int], Tuple[float, float, float, Dict[int, float], float]] = {}
+
+    def get_damages(
+        self, base_damages: Dict[int, float], body_part: str, critical: bool = False
+    ) -> Tuple[Dict[int, float], float]:
+        """
+        Distribution des dégâts réels d'un coup réussi sur une partie du corps
+        :param base_damages: Distribution des dégâts de base
+        :param body_part: Partie du corps touchée
+        :param critical: Coup critique ?
+        :return: Probabilités par dégâts réels et chance de tuer la cible
+        """
+        armor_class, critical_chance, critical_multiplier = self.body_parts[body_part]
+        raw_chance = 0.0
+        if critical and self.damage_type not in LIST_NON_DAMAGE:
+            raw_chance = min(max(self.critical_raw_chance, 0), 100) / 100.0
+        damage_types = ((self.damage_type, 1.0 - raw_chance), (DAMAGE_RAW, raw_chance))
+        damages, kill_chance = {}, 0.0
+        for base_damage, chance in base_damages.items():
+            damage = (base_damage + self.melee_damage) * self.damage_multiplier
+            if critical:
+                damage = damage * critical_multiplier + self.critical_damage
+            damage = max(damage, 0)
+            for damage_type, type_chance in damage_types:
+                if not type_chance:
+                    continue
+                real_damage = self.get_real_damage(damage, body_part, damage_type)
+                damages[real_damage] = damages.get(real_damage, 0.0) + chance * type_chance
+                if damage_type not in NON_HEALTH_DAMAGE and real_damage >= self.health > 0:
+                    kill_chance += chance * type_chance
+        return damages, kill_chance
+
+    def get_part_odds(
+        self, body_part: str, hit_chance: int
+    ) -> Tuple[float, float, float, Dict[int, float], float]:
+        """
+        Chances et dégâts d'un coup sur une partie du corps pour une précision donnée
+        :param body_part: Partie du corps touchée
+        :param hit_chance: Précision finale du coup
+        :return: Chances de toucher, de critique et d'échec critique, distribution des dégâts et chance de tuer
+        """
+        odds = self._odds.get((body_part, hit_chance))
+        if odds is not None:
+            return odds
+        armor_class, critical_chance, critical_multiplier = self.body_parts[body_part]
+        # The hit roll is uniform between 1 and 100
+        hits = min(max(hit_chance, 0), 100)
+        criticals = min(max(critical_chance, 0), hits)
+        critical_fails = max(100 - max(hits, self.critical_fail - 1), 0)
+        (normal_damages, normal_kill), (critical_damages, critical_kill) = self.damages[body_part]
+        normal, critical = (hits - criticals) / 100.0, criticals / 100.0
+        damages = {0: 1.0 - hits / 100.0} if hits < 100 else {}
+        for chance, part_damages in ((normal, normal_damages), (critical, critical_damages)):
+            if not chance:
+                continue
+            for damage, damage_chance in part_damages.items():
+                damages[damage] = damages.get(damage, 0.0) + chance * damage_chance
+        odds = self._odds[body_part, hit_chance] = (
+            hits / 100.0,
+            critical,
+            critical_fails / 100.0,
+            damages,
+            normal * normal_kill + critical * critical_kill,
+        )
+        return odds
+
+    def get_odds(self, target_range: int = 1, target_part: Optional[str] = None) -> Dict[str, Union[float, dict]]:
+        """
+        Calcule les chances et les dégâts d'un coup simple
+        :param target_range: Distance (en cases) entre les deux personnages
+        :param target_part: Partie du corps ciblée par l'attaquant (ou aléatoire)
+        :return: Chances de toucher, de critique, d'échec critique et de tuer, dégâts moyens et leur distribution
+        """
+        base_hit_chance, max_range = get_hit_chance(
+            self.attacker, self.weapon, self.ammo, target_range, target_part or None, False
+        )
+        base_hit_chance *= self.condition or 1.0
+        hit_chance = critical_chance = critical_fail_chance = kill_chance = 0.0
+        damages: Dict[int, float] = {}
+        body_parts = {target_part: 1.0} if target_part else self.random_parts
+        for body_part, part_chance in body_parts.items():
+            part_hit_chance = 0
+            if target_range <= max_range:
+                armor_class = self.body_parts[body_part][0]
+                part_hit_chance = base_hit_chance - armor_class + self.hit_chance_modifier
+                part_hit_chance = int(round(max(min(part_hit_chance, MAX_HIT_CHANCE), 0)))
+            hits, criticals, critical_fails, part_damages, kills = self.get_part_odds(body_part, part_hit_chance)
+            hit_chance += part_chance * hits
+            critical_chance += part_chance * criticals
+            critical_fail_chance += part_chance * critical_fails
+            kill_chance += part_chance * kills
+            for damage, damage_chance in part_damages.items():
+                damages[damage] = damages.get(damage, 0.0) + part_chance * damage_chance
+        return dict(
+            hit_chance=hit_chance,
+            critical_chance=critical_chance,
+            critical_fail_chance=critical_fail_chance,
+            kill_chance=kill_chance,
+            damage=sum(damage * chance for damage, chance in damages.items()),
+            damages=dict(sorted(damages.items())),
+        )
+
+    def get_matrix(self, ranges: Iterable[int]) -> Dict[int, Dict[str, Dict[str, Union[float, dict]]]]:
+        """
+        Calcule les chances et les dégâts d'un coup simple pour chaque distance et chaque partie du corps
+        :param ranges: Distances (en cases)
+        :return: Résultats par distance puis par partie du corps ciblée (vide si aléatoire)
+        """
+        body_parts = ("",) + tuple(LIST_BODY_PARTS)
+        return {
+            target_range: {body_part: self.get_odds(target_range, body_part) for body_part in body_parts}
+            for target_range in map(int, ranges)
+        }
+
+
+class EncounterSimulation:
+    """
+    Simulation de Monte-Carlo de batailles complètes entre deux groupes de personnages
+    Chaque bataille se joue par tours jusqu'à l'élimination d'un des groupes (ou le nombre maximum de tours),
+    les personnages agissent par ordre de séquence (comme Campaign.next_turn) avec tous leurs points d'action
+    Les personnages sont figés une seule fois, les batailles ne font ensuite aucun accès à la base de données
+    """
+
+    def __init__(
+        self,
+        attackers: Iterable[Union[Character, CombatantSnapshot]],
+        defenders: Iterable[Union[Character, CombatantSnapshot]],
+        target_range: int = 1,
+        target_policy: str = TARGET_POLICY_WEAKEST,
+        max_rounds: int = ENCOUNTER_MAX_ROUNDS,
+        hit_chance_modifier: int = 0,
+    ):
+        """
+        Initialisation de la simulation
+        :param attackers: Personnages (ou leurs états figés) du premier groupe
+        :param defenders: Personnages (ou leurs états figés) du second groupe
+        :param target_range: Distance (en cases) entre les deux groupes
+        :param target_policy: Choix de la cible ("weakest", "strongest" ou "random")
+        :param max_rounds: Nombre maximum de tours d'une bataille (plafonné à ENCOUNTER_MAX_ROUNDS)
+        :param hit_chance_modifier: Modificateurs complémentaires de précision (lumière, couverture, etc...)
+        """
+        attackers, defenders = list(attackers), list(defenders)
+        _assert(attackers and defenders, _("Chaque groupe doit contenir au moins un personnage."))
+        _assert(target_policy in dict(TARGET_POLICIES), _("La politique de choix de la cible est incorrecte."))
+        self.target_policy, self.max_rounds = target_policy, min(max(1, int(max_rounds)), ENCOUNTER_MAX_ROUNDS)
+        snapshots = [
+            character.get_snapshot() if isinstance(character, Character) else character
+            for character in attackers + defenders
+        ]
+        groups = [0] * len(attackers) + [1] * len(defenders)
+        self.ids = [snapshot.id for snapshot in snapshots]
+        ids = [pk for pk in self.ids if pk is not None]
+        _assert(len(set(ids)) == len(ids), _("Un personnage ne peut figurer qu'une seule fois dans la bataille."))
+        self.groups = groups
+        self.healths = [snapshot.health for snapshot in snapshots]
+        self.max_action_points = [snapshot.stats.max_action_points for snapshot in snapshots]
+        # Turn order by sequence (stable for equal sequences, as in Campaign.next_turn)
+        self.order = sorted(range(len(snapshots)), key=lambda index: -snapshots[index].stats.sequence)
+        self.enemies = [[other for other in self.order if groups[other] != group] for group in (0, 1)]
+        # Weapons, action points costs and precomputed fights against each enemy
+        self.fights: List[Dict[int, Tuple[FightSimulation, FightSimulation]]] = []
+        self.ap_costs: List[Tuple[int, int]] = []
+        self.reloads: List[Tuple[int, int, bool]] = []
+        self.armed: List[bool] = []
+        for index, snapshot in enumerate(snapshots):
+            weapon_equipment = snapshot.get_equipment(ITEM_WEAPON)
+            weapon = gv(weapon_equipment, "item", None)
+            self.armed.append(bool(weapon))
+            # At least one action point per attack, otherwise a turn would never end
+            self.ap_costs.append((max(get_ap_cost(snapshot, weapon), 1), max(get_ap_cost(snapshot, None), 1)))
+            self.reloads.append(
+                (
+                    gv(weapon, "clip_size", 0) or 0,
+                    gv(weapon, "ap_cost_reload", 0) or 0,
+                    bool(gv(weapon, "is_single_charge", False)),
+                )
+            )
+            fights = {}
+            for enemy in self.enemies[groups[index]]:
+                kwargs = dict(target_range=target_range, hit_chance_modifier=hit_chance_modifier)
+                unarmed = FightSimulation(snapshot, snapshots[enemy], weapon_type=WEAPON_TYPE_UNARMED, **kwargs)
+                armed = FightSimulation(snapshot, snapshots[enemy], **kwargs) if weapon else unarmed
+                fights[enemy] = (armed, unarmed)
+            self.fights.append(fights)
+
+    def select_target(self, rng: Random, index: int, healths: List[int]) -> Optional[int]:
+        """
+        Choisit la cible d'un personnage parmi les ennemis encore en vie
+        :param rng: Générateur aléatoire
+        :param index: Index du personnage
+        :param healths: Santé courante de l'ensemble des personnages
+        :return: Index de la cible (ou rien si tous les ennemis sont morts)
+        """
+        enemies = [enemy for enemy in self.enemies[self.groups[index]] if healths[enemy] > 0]
+        if not enemies:
+            return None
+        if self.target_policy == TARGET_POLICY_RANDOM:
+            return enemies[rng._randbelow(len(enemies))]
+        if self.target_policy == TARGET_POLICY_STRONGEST:
+            return max(enemies, key=healths.__getitem__)
+        return min(enemies, key=healths.__getitem__)
+
+    def battle(self, rng: Random) -> Tuple[int, Optional[int], List[int], List[Dict[str, Union[int, float]]]]:
+        """
+        Simule une bataille complète
+        :param rng: Générateur aléatoire
+        :return: Nombre de tours, groupe vainqueur (ou rien si égalité), santé et état des armes des personnages
+        """
+        healths = list(self.healths)
+        # Weapon state (ammo, condition) and unarmed state of each character
+        states = [tuple(fight.get_state() for fight in next(iter(fights.values()))) for fights in self.fights]
+        armed = list(self.armed)
+        alive = [
+            any(health > 0 for health, member_group in zip(healths, self.groups) if member_group == group)
+            for group in (0, 1)
+        ]
+        if not all(alive):
+            return 0, (alive.index(True) if any(alive) else None), healths, [state[0] for state in states]
+        winner, rounds = None, 0
+        while winner is None and rounds < self.max_rounds:
+            rounds += 1
+            for index in self.order:
+                if healths[index] <= 0:
+                    continue
+                action_points = self.max_action_points[index]
+                clip_size, reload_cost, single_charge = self.reloads[index]
+                while True:
+                    target = self.select_target(rng, index, healths)
+                    if target is None:
+                        winner = self.groups[index]
+                        break
+                    unarmed = not armed[index]
+                    ap_cost = self.ap_costs[index][unarmed]
+                    if ap_cost > action_points:
+                        break
+                    state = states[index][unarmed]
+                    state["health"] = healths[target]
+                    outcome = self.fights[index][target][unarmed].fight(rng, state)
+                    if outcome.status == STATUS_NO_MORE_AMMO:
+                        # Reloads the weapon when possible or fights unarmed
+                        if clip_size and state["ammo_quantity"] > 0:
+                            if reload_cost > action_points:
+                                break
+                            needed_ammo = 1 if single_charge else min(clip_size, state["ammo_quantity"])
+                            state["clip_count"] = clip_size if single_charge else needed_ammo
+                            state["ammo_quantity"] -= needed_ammo
+                            action_points -= reload_cost
+                        else:
+                            armed[index] = False
+                        continue
+                    action_points -= ap_cost
+                    healths[target] = state["health"]
+                if winner is not None:
+                    break
+        return rounds, winner, healths, [state[0] for state in states]
+
+    def run_battles(self, count: int, seed: Optional[int] = None) -> Dict[str, Union[int, float, list]]:
+        """
+        Simule une série de batailles et cumule leurs résultats
+        :param count: Nombre de batailles
+        :param seed: Graine du générateur aléatoire (optionnel)
+        :return: Résultats cumulés
+        """
+        rng = Random(seed)
+        size = len(self.ids)
+        totals = dict(count=count, wins=[0, 0, 0], rounds=0, deaths=[0] * size, ammo=[0] * size)
+        for _index in range(count):
+            rounds, winner, healths, states = self.battle(rng)
+            totals["rounds"] += rounds
+            totals["wins"][2 if winner is None else winner] += 1
+            for index in range(size):
+                totals["deaths"][index] += healths[index] <= 0
+                totals["ammo"][index] += states[index]["ammo"]
+        return totals
+
+    def run(
+        self, count: int = ENCOUNTER_COUNT, seed: Optional[int] = None, workers: Optional[int] = None
+    ) -> Dict[str, Union[int, float, dict]]:
+        """
+        Lance la simulation en répartissant les batailles sur un ensemble de processus
+        Les batailles sont découpées en lots de taille fixe ayant chacun leur propre graine,
+        les résultats ne dépendent donc pas du nombre de processus
+        :param count: Nombre de batailles simulées
+        :param seed: Graine du générateur aléatoire (optionnel)
+        :param workers: Nombre de processus (par défaut le nombre de processeurs, 1 pour ne pas paralléliser)
+        :return: Statistiques de la simulation
+        """
+        count = max(1, min(int(count), ENCOUNTER_MAX_COUNT))
+        rng = Random(seed)
+        batches = [
+            (min(ENCOUNTER_BATCH_SIZE, count - start), rng.getrandbits(64))
+            for start in range(0, count, ENCOUNTER_BATCH_SIZE)
+        ]
+        if workers == 1 or len(batches) == 1:
+            results = [self.run_battles(*batch) for batch in batches]
+        else:
+            # Forked workers inherit the loaded Django applications needed to unpickle the items
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(batches)) if workers else None,
+                mp_context=context,
+                initializer=_init_encounter,
+                initargs=(self,),
+            ) as executor:
+                results = list(executor.map(_run_encounter, *zip(*batches)))
+        wins, rounds = [0, 0, 0], 0
+        deaths, ammo = [0] * len(self.ids), [0] * len(self.ids)
+        for result in results:
+            rounds += result["rounds"]
+            wins = list(map(add, wins, result["wins"]))
+            deaths = list(map(add, deaths, result["deaths"]))
+            ammo = list(map(add, ammo, result["ammo"]))
+        groups = []
+        for group in (0, 1):
+            members = [index for index, member_group in enumerate(self.groups) if member_group == group]
+            groups.append(
+                dict(
+                    win_chance=wins[group] / count,
+                    casualties=sum(deaths[index] for index in members) / count,
+                    ammo=sum(ammo[index] for index in members) / count,
+                    characters={
+                        self.ids[index]: dict(death_chance=deaths[index] / count, ammo=ammo[index] / count)
+                        for index in members
+                    },
+                )
+            )
+        attackers, defenders = groups
+        return dict(
+            count=count,
+            draw_chance=wins[2] / count,
+            rounds=rounds / count,
+            attackers=attackers,
+            defenders=defenders,
+        )
+
+
+# Simulation shared by the battles of a worker process
+_encounter: Optional[EncounterSimulation] = None
+
+
+def _init_encounter(encounter: EncounterSimulation) -> None:
+    """
+    Initialise un processus de simulation avec la simulation (transmise une seule fois par processus)
+    :param encounter: Simulation
+    :return: Rien
+    """
+    global _encounter
+    _encounter = encounter
+
+
+def _run_encounter(count: int, seed: int) -> Dict[str, Union[int, float, list]]:
+    """
+    Simule un lot de batailles dans un processus de simulation
+    :param count: Nombre de batailles
+    :param seed: Graine du générateur aléatoire
+    :return: Résultats cumulés
+    """
+    return _encounter.run_battles(count, seed)
+
+
+__all__ = (
+    "EncounterSimulation",
+    "FightOdds",
+    "FightOutcome",
+    "FightSimulation",
+)
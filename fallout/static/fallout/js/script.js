@@ -69,6 +69,25 @@ $(document).ready(function($) {
             if (result !== '') {
                 if (typeof result == 'string') {
                     alert(result);
+                } else if (result.count) {
+                    let percent = function (value) {
+                        return `${Math.round(value * 1000) / 10} %`;
+                    };
+                    let percentiles = $.map(result.damage_percentiles, function (value, key) {
+                        return `${key} % : ${value}`;
+                    });
+                    alert([
+                        `Simulations : ${result.count}` + (result.status ? ` (${result.status})` : ''),
+                        `Tirs : ${Math.round(result.shots * 100) / 100}`,
+                        `Touché : ${percent(result.hit_chance)}`,
+                        `Critique : ${percent(result.critical_chance)}`,
+                        `Echec critique : ${percent(result.critical_fail_chance)}`,
+                        `Cible tuée : ${percent(result.kill_chance)}`,
+                        `Dégâts moyens : ${Math.round(result.damage * 100) / 100}`,
+                        `Dégâts (centiles) : ${percentiles.join(', ')}`,
+                        `Munitions : ${Math.round(result.ammo * 100) / 100}`,
+                        `Usure de l'arme : ${percent(result.condition)}`,
+                    ].join('\n'));
                 } else if (Array.isArray(result)) {
                     let messages = [];
                     $.each(result, function (i, e) {
@@ -82,6 +101,25 @@ $(document).ready(function($) {
         });
     });
 
+    // Suivi des tâches de fond
+    $('[data-task]').each(function () {
+        let element = $(this);
+        let poll = function () {
+            $.get(element.data('task'), function (result) {
+                if (result.status === 'done' || result.status === 'failed') {
+                    location.reload();
+                    return;
+                }
+                if (result.total) {
+                    let percent = Math.round(result.current * 100 / result.total);
+                    element.find('.progress-bar').css('width', `${percent}%`);
+                }
+                setTimeout(poll, 1000);
+            });
+        };
+        poll();
+    });
+
     // Désactiver le re-POST
     window.history.replaceState(null, document.title, location.href);
 });
\ No newline at end of file
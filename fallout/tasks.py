@@ -0,0 +1,182 @@
+# coding: utf-8
+from datetime import timedelta
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+from django.utils.translation import gettext as _
+
+from fallout.constants import HISTORY_RETENTION_DAYS, TASK_PROGRESS_TIMEOUT, TURN_TIME
+from fallout.enums import TASK_DONE, TASK_FAILED, TASK_RUNNING
+from fallout.models import Campaign, Character, DamageHistory, Effect, HistoryArchiver, StatsUnitOfWork
+
+
+class TaskProgress:
+    """
+    Avancement d'une tâche de fond, stocké dans le cache partagé pour être suivi par l'interface
+    """
+
+    prefix = "fallout:task"
+
+    def __init__(self, task_id: str):
+        """
+        Initialisation de l'avancement
+        :param task_id: Identifiant de la tâche
+        """
+        self.task_id = task_id
+        self.key = f"{self.prefix}:{task_id}"
+        self.current, self.total = 0, 0
+
+    def get(self) -> Optional[Dict[str, Union[str, int, list]]]:
+        """
+        Récupère l'avancement de la tâche
+        :return: Etat, avancement, messages et erreur éventuelle (ou rien si la tâche est inconnue)
+        """
+        return cache.get(self.key)
+
+    def set(self, status: str, messages: Iterable[Tuple[int, str]] = (), error: str = "") -> None:
+        """
+        Enregistre l'avancement de la tâche
+        :param status: Etat de la tâche
+        :param messages: Messages (niveau, texte) à afficher à la fin de la tâche
+        :param error: Erreur éventuelle
+        :return: Rien
+        """
+        cache.set(
+            self.key,
+            dict(status=status, current=self.current, total=self.total, messages=list(messages), error=error),
+            TASK_PROGRESS_TIMEOUT,
+        )
+
+    def update(self, current: int, total: int) -> None:
+        """
+        Met à jour l'avancement de la tâche en cours
+        :param current: Nombre d'éléments traités
+        :param total: Nombre total d'éléments
+        :return: Rien
+        """
+        self.current, self.total = current, total
+        self.set(TASK_RUNNING)
+
+    def delete(self) -> None:
+        """
+        Supprime l'avancement de la tâche
+        :return: Rien
+        """
+        cache.delete(self.key)
+
+
+def progress_task(func: Callable[..., List[DamageHistory]]):
+    """
+    Décorateur de tâche de fond dont l'avancement est suivi dans le cache
+    La fonction décorée reçoit l'avancement en premier paramètre et retourne les dégâts infligés,
+    elle est exécutée dans une unité de travail des statistiques
+    """
+
+    @shared_task(bind=True, name=f"fallout.{func.__name__}")
+    @wraps(func)
+    def task(self, *args, **kwargs) -> List[int]:
+        progress = TaskProgress(self.request.id)
+        progress.set(TASK_RUNNING)
+        try:
+            with StatsUnitOfWork():
+                damages = func(progress, *args, **kwargs)
+        except Exception as error:  # noqa
+            progress.set(TASK_FAILED, error=str(error))
+            raise
+        messages = [
+            (
+                damage.message_level,
+                _("<strong>{pre_label}</strong> {label}").format(pre_label=damage.pre_label, label=damage.label),
+            )
+            for damage in damages
+        ]
+        progress.set(TASK_DONE, messages=messages)
+        return [damage.pk for damage in damages]
+
+    return task
+
+
+@progress_task
+def advance_time(
+    progress: TaskProgress, campaign_id: int, seconds: int = TURN_TIME, resting: bool = False, reset: bool = False
+) -> List[DamageHistory]:
+    """
+    Tâche de passage du temps dans une campagne (besoins, effets et régénération des personnages)
+    :param progress: Avancement de la tâche
+    :param campaign_id: Identifiant de la campagne
+    :param seconds: Temps écoulé (en secondes)
+    :param resting: Temps de repos ?
+    :param reset: Réinitialise l'ordre de passage des personnages
+    :return: Dégâts infligés
+    """
+    campaign = Campaign.objects.get(pk=campaign_id)
+    character, damages = campaign.next_turn(seconds=seconds, resting=resting, reset=reset, progress=progress.update)
+    return damages
+
+
+@progress_task
+def damage_characters(progress: TaskProgress, character_ids: List[int], **damage) -> List[DamageHistory]:
+    """
+    Tâche d'application de dégâts à plusieurs personnages
+    :param progress: Avancement de la tâche
+    :param character_ids: Identifiants des personnages
+    :param damage: Paramètres des dégâts (voir Character.damage)
+    :return: Dégâts infligés
+    """
+    characters = Character.get_targets(character_ids)
+    character_ids = [pk for pk in character_ids if pk in characters]
+    damages = []
+    for index, pk in enumerate(character_ids, start=1):
+        damages.append(characters[pk].damage(**damage))
+        progress.update(index, len(character_ids))
+    return damages
+
+
+@progress_task
+def apply_effect(
+    progress: TaskProgress,
+    effect_id: int,
+    campaign_id: Optional[int] = None,
+    character_ids: Iterable[int] = (),
+    force: bool = True,
+) -> List[DamageHistory]:
+    """
+    Tâche d'application d'un effet à une campagne et/ou à plusieurs personnages
+    :param progress: Avancement de la tâche
+    :param effect_id: Identifiant de l'effet
+    :param campaign_id: Identifiant de la campagne (facultatif)
+    :param character_ids: Identifiants des personnages (facultatif)
+    :param force: Force l'application de l'effet
+    :return: Dégâts infligés
+    """
+    effect = Effect.objects.select_related("next_effect", "cancel_effect").get(pk=effect_id)
+    character_ids = list(character_ids)
+    targets = [Campaign.objects.get(pk=campaign_id)] if campaign_id else []
+    characters = Character.get_targets(character_ids)
+    targets.extend(characters[pk] for pk in character_ids if pk in characters)
+    damages = []
+    for index, target in enumerate(targets, start=1):
+        active_effect = effect.affect(target, force=force)
+        damages.extend(getattr(active_effect, "damages", []))
+        progress.update(index, len(targets))
+    return damages
+
+
+@shared_task(name="fallout.archive_histories")
+def archive_histories(days: int = HISTORY_RETENTION_DAYS, campaign_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Tâche périodique d'archivage des historiques de jets, de dégâts et de combats
+    :param days: Age (en jours réels) des historiques à archiver
+    :param campaign_id: Identifiant de la campagne (toutes par défaut)
+    :return: Nombre de lignes archivées par modèle
+    """
+    archiver = HistoryArchiver(
+        date=now() - timedelta(days=days),
+        campaign=campaign_id,
+        directory=settings.HISTORY_ARCHIVE_ROOT,
+    )
+    return archiver.archive()
@@ -1,12 +1,59 @@
 # coding: utf-8
+import gzip
+import io
+import pickle
+import random
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
 from common.tests import create_api_test_class
 from django.contrib.admin import site
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.timezone import now
 from model_bakery import baker
 
-from fallout.models import MODELS, Player
+from fallout.cache import StatsCache
+from fallout.combat import resolve_fight
+from fallout.constants import *  # noqa
+from fallout.enums import *  # noqa
+from fallout.formulas import COMPILED_STATS, COMPUTED_STATS_DEPENDENTS, STATS_NAMES
+from fallout.levels import get_experience_level, get_level_experience
+from fallout.models import (
+    MODELS,
+    Campaign,
+    CampaignEffect,
+    Character,
+    CharacterEffect,
+    Effect,
+    EffectModifier,
+    EffectScheduler,
+    DamageHistory,
+    Equipment,
+    FightHistory,
+    HistoryArchiver,
+    Item,
+    ItemModifier,
+    Loot,
+    LootTemplate,
+    LootTemplateItem,
+    Player,
+    RollHistory,
+    RollHistoryRollup,
+    Statistics,
+    Stats,
+    StatsUnitOfWork,
+    get_balanced_values,
+    get_random_distribution,
+    get_random_sum,
+)
+from fallout.simulation import EncounterSimulation, FightOdds, FightSimulation
 
 
 def create_admin_tests():
@@ -72,3 +119,808 @@ for model in MODELS:
 
 # La création d'un nouvel utilisateur via l'API est autorisé sans authentification
 create_api_test_class(Player, namespace="fallout-api", test_post=False)
+
+
+class StatsTestCase(TestCase):
+    """
+    Tests du calcul des statistiques des personnages
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.campaign = Campaign.objects.create(name="Campaign")
+        cls.item = Item.objects.create(name="Ring", type=ITEM_EXTRA, weight=1.5)
+        ItemModifier.objects.create(item=cls.item, stats=SPECIAL_STRENGTH, raw_value=1, min_value=1, max_value=1)
+        cls.effect = Effect.objects.create(name="Effect")
+        EffectModifier.objects.create(
+            effect=cls.effect, stats=SPECIAL_AGILITY, raw_value=-1, min_value=-1, max_value=-1
+        )
+        CampaignEffect.objects.create(campaign=cls.campaign, effect=cls.effect)
+        cls.characters = []
+        for index in range(3):
+            character = Character.objects.create(name=f"Character {index}", campaign=cls.campaign)
+            Equipment.objects.create(character=character, item=cls.item, quantity=index + 1)
+            CharacterEffect.objects.create(character=character, effect=cls.effect)
+            cls.characters.append(character)
+
+    def test_get_many(self):
+        all_stats = Stats.get_many(self.characters)
+        for character in self.characters:
+            self.assertEqual(Stats.get(character), all_stats[character.pk])
+            self.assertEqual(all_stats[character.pk].charge, Stats.get(character).charge)
+
+    def test_with_stats(self):
+        for character in self.characters:
+            Character.reset_stats(character)
+        with self.assertNumQueries(6):
+            characters = list(Character.objects.filter(campaign=self.campaign).with_stats())
+            all_stats = [character.stats for character in characters]
+        for character, stats in zip(characters, all_stats):
+            self.assertFalse(stats.obsolete)
+            self.assertEqual(stats.strength, Stats.get(character).strength)
+
+    def test_stacked_modifiers(self):
+        character = self.characters[0]
+        Equipment.objects.filter(character=character).update(quantity=500)
+        stats = Stats.get(character)
+        self.assertEqual(stats.strength, character.strength + 1000)
+        self.assertEqual(stats.agility, character.agility - 4)
+
+    def test_random_sum(self):
+        self.assertEqual(get_random_sum(2, 2, 500), 1000)
+        self.assertEqual(get_random_sum(1, 3, 0), 0)
+        values = [get_random_sum(1, 3, 500) for _ in range(200)]
+        self.assertTrue(all(500 <= value <= 1500 for value in values))
+        self.assertAlmostEqual(sum(values) / len(values), 1000, delta=10)
+
+    def test_random_distribution(self):
+        names, costs, runs = ["a", "b", "c"], {"a": 1, "b": 2, "c": 2}, 2000
+        expected, totals = Counter(), Counter()
+        for _ in range(runs):
+            points = 101
+            while points > 0:
+                name = random.choice(names)
+                expected[name] += 1
+                points -= costs[name]
+            distribution = get_random_distribution(names, 101, costs)
+            self.assertIn(101 - sum(costs[name] * count for name, count in distribution.items()), (0, -1))
+            totals.update(distribution)
+        for name in names:
+            self.assertAlmostEqual(totals[name] / runs, expected[name] / runs, delta=1)
+        self.assertEqual(sum(get_random_distribution(names, 10).values()), 10)
+        self.assertEqual(get_random_distribution([], 10), Counter())
+
+    def test_balanced_values(self):
+        bounds = {"a": (1, 10), "b": (2, 6), "c": (1, 10), "d": (3, 4)}
+        for _ in range(200):
+            values = {name: random.randint(mini, maxi) for name, (mini, maxi) in bounds.items()}
+            total = random.randint(7, 30)
+            expected, left = dict(values), total - sum(values.values())
+            while left:
+                shift = -1 if left < 0 else 1
+                for name, value in sorted(expected.items(), key=lambda e: e[1] * shift):
+                    expected[name] = max(min(value + shift, bounds[name][1]), bounds[name][0])
+                    left = total - sum(expected.values())
+                    if not left:
+                        break
+            self.assertEqual(get_balanced_values(values, total, bounds), expected)
+
+    def test_dependencies(self):
+        self.assertEqual(COMPUTED_STATS_DEPENDENTS[SPECIAL_LUCK], ("critical_chance", "critical_raw_chance"))
+        self.assertIn("max_health", COMPUTED_STATS_DEPENDENTS["hit_points_per_level"])
+        self.assertIn("max_health", COMPUTED_STATS_DEPENDENTS[SPECIAL_ENDURANCE])
+
+    def test_update(self):
+        character = self.characters[0]
+        stats = Stats.get(character)
+        changes = stats.update(**{SPECIAL_LUCK: 2, SPECIAL_STRENGTH: 1})
+        self.assertIn("critical_chance", changes)
+        self.assertNotIn("small_guns", changes)
+        item = Item.objects.create(name="Charm", type=ITEM_EXTRA)
+        ItemModifier.objects.create(item=item, stats=SPECIAL_LUCK, raw_value=2)
+        ItemModifier.objects.create(item=item, stats=SPECIAL_STRENGTH, raw_value=1)
+        Equipment.objects.create(character=character, item=item)
+        self.assertEqual(stats, Stats.get(character))
+
+    def test_vector(self):
+        character = self.characters[0]
+        stats = Stats.get(character)
+        row = stats.to_row()
+        self.assertEqual(row[SPECIAL_STRENGTH], stats.strength)
+        self.assertEqual(row["charge"], stats.charge)
+        self.assertEqual(row["modifiers"], stats.modifiers)
+        other = pickle.loads(pickle.dumps(stats))
+        self.assertEqual(stats, other)
+        self.assertIsNone(other.character)
+        other.strength += 1
+        self.assertEqual(other.diff(stats), {SPECIAL_STRENGTH: stats.strength + 1})
+        self.assertEqual(Stats(strength=7).strength, 7)
+
+    def test_reset_stats_bulk(self):
+        Character.prepare_stats(Character.objects.filter(campaign=self.campaign).with_stats())
+        with self.assertNumQueries(1):
+            self.assertEqual(Character.reset_stats_bulk(campaign=self.campaign), len(self.characters))
+        for character in Character.objects.filter(campaign=self.campaign).select_related("statistics"):
+            self.assertTrue(character.statistics.obsolete)
+            self.assertIsNone(Character._stats.get(character.pk, group=character.campaign_id))
+
+    def test_obsolete_statistics(self):
+        character = self.characters[0]
+        character.stats
+        Statistics.objects.filter(character=character).update(obsolete=True)
+        character = Character.objects.select_related("statistics").get(pk=character.pk)
+        Character._stats.invalidate(character.pk)
+        with CaptureQueriesContext(connection) as context:
+            self.assertFalse(character.stats.obsolete)
+        self.assertFalse(
+            any(
+                query["sql"].startswith("SELECT") and "fallout_statistics" in query["sql"]
+                for query in context.captured_queries
+            )
+        )
+        self.assertFalse(Statistics.objects.get(character=character).obsolete)
+
+    def test_unit_of_work(self):
+        character = Character.objects.get(pk=self.characters[0].pk)
+        with CaptureQueriesContext(connection) as queries:
+            with StatsUnitOfWork() as unit:
+                for _ in range(5):
+                    character.health -= 1
+                    character.save()
+                self.assertIn(character.pk, unit)
+                self.assertIs(character.stats, unit.get_statistics(character.pk))
+        writes = [query for query in queries if "fallout_statistics" in query["sql"] and "SELECT" not in query["sql"]]
+        self.assertEqual(len(writes), 1)
+        self.assertIsNone(StatsUnitOfWork.current())
+        statistics = Character.objects.select_related("statistics").get(pk=character.pk).statistics
+        self.assertFalse(statistics.obsolete)
+        self.assertEqual(statistics.max_health, Stats.get(character).max_health)
+
+    def test_update_equipment(self):
+        character = self.characters[0]
+        item = Item.objects.create(name="Helmet", type=ITEM_HELMET)
+        ItemModifier.objects.create(item=item, stats=SPECIAL_PERCEPTION, raw_value=1)
+        equipment = Equipment.objects.create(character=character, item=item)
+        sequence = character.stats.sequence
+        equipment.slot = ITEM_HELMET
+        equipment.save()
+        self.assertFalse(Character.objects.get(pk=character.pk).statistics.obsolete)
+        self.assertEqual(character.stats.sequence, sequence + 2)
+        self.assertEqual(character.stats.sequence, Stats.get(character).sequence)
+
+    def test_modified_fields(self):
+        character = Character.objects.get(pk=self.characters[0].pk)
+        character.stats
+        with CaptureQueriesContext(connection) as context:
+            character.health -= 1
+            character.save()
+        updates = [query["sql"] for query in context.captured_queries if query["sql"].startswith('UPDATE "fallout_')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"health"', updates[0])
+        self.assertNotIn('"strength"', updates[0])
+        self.assertFalse(Character.objects.get(pk=character.pk).statistics.obsolete)
+
+
+class LevelsTestCase(TestCase):
+    """
+    Tests du calcul des niveaux en fonction de l'expérience
+    """
+
+    def test_levels(self):
+        needed_xp, level = 0, 1
+        for experience in range(0, 60 * BASE_XP, BASE_XP // 4):
+            while experience >= needed_xp + level * BASE_XP:
+                needed_xp += level * BASE_XP
+                level += 1
+            self.assertEqual(get_experience_level(experience), level)
+            self.assertEqual(get_level_experience(level), needed_xp)
+
+    def test_check_level(self):
+        character = Character.objects.create(name="Character")
+        skill_points, perk_points, health = character.skill_points, character.perk_points, character.health
+        stats = character.stats
+        character.experience = get_level_experience(7) + 1
+        self.assertEqual(character.check_level(), (7, get_level_experience(8)))
+        self.assertEqual(character.level, 7)
+        self.assertEqual(character.skill_points, skill_points + 6 * stats.skill_points_per_level)
+        self.assertEqual(character.perk_points, perk_points + 7 // stats.perk_rate)
+        self.assertEqual(character.health, health + 6 * stats.hit_points_per_level)
+
+    def test_randomize(self):
+        tag_skills = list(LIST_SKILLS)[:3]
+        character = Character.objects.create(name="Character", race=RACE_HUMAN, tag_skills=tag_skills)
+        for balance in (0, 50):
+            character.randomize_stats(level=20, balance=balance, save=False)
+            self.assertEqual(character.level, 20)
+            self.assertIn(character.skill_points - character.used_skill_points, (0, -1))
+            if balance:
+                self.assertGreater(sum(getattr(character, skill) for skill in tag_skills), 0)
+        character.randomize_special(points=40, save=False)
+        self.assertEqual(sum(getattr(character, stat) for stat in LIST_SPECIALS), 40)
+
+
+class SpawnTestCase(TestCase):
+    """
+    Tests de la création en masse de copies d'un personnage
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.campaign = Campaign.objects.create(name="Campaign")
+        cls.character = Character.objects.create(name="Ghoul", race=RACE_GHOUL, strength=6)
+        item = Item.objects.create(name="Ring", type=ITEM_EXTRA, weight=1.5)
+        Equipment.objects.create(character=cls.character, item=item, quantity=2)
+        effect = Effect.objects.create(name="Effect")
+        EffectModifier.objects.create(effect=effect, stats=SPECIAL_STRENGTH, raw_value=1)
+        CharacterEffect.objects.create(character=cls.character, effect=effect)
+
+    def test_spawn(self):
+        queries = []
+        for count in (2, 5):
+            with CaptureQueriesContext(connection) as context:
+                characters = self.character.spawn(count=count, campaign=self.campaign, name="Ghoul #{number}")
+            queries.append(len(context.captured_queries))
+            self.assertFalse(any(query["sql"].startswith("UPDATE") for query in context.captured_queries))
+            self.assertEqual([character.name for character in characters][-1], f"Ghoul #{count}")
+        self.assertEqual(queries[0], queries[1])
+        with self.assertRaises(TypeError):
+            self.character.spawn(cuont=2)
+        for character in Character.objects.filter(pk__in=[character.pk for character in characters]):
+            self.assertEqual(character.campaign_id, self.campaign.pk)
+            self.assertEqual(character.equipments.count(), 1)
+            self.assertEqual(character.active_effects.count(), 1)
+            self.assertEqual(character.stats.strength, Stats.get(character).strength)
+            self.assertEqual(character.health, character.stats.max_health)
+            self.assertFalse(character.statistics.obsolete)
+
+    def test_spawn_randomized(self):
+        characters = self.character.spawn(count=3, points=35, level=10, balance=50, is_active=False)
+        for character in Character.objects.filter(pk__in=[character.pk for character in characters]):
+            self.assertEqual(character.level, 10)
+            self.assertFalse(character.is_active)
+            self.assertEqual(character.stats.max_health, Stats.get(character).max_health)
+            self.assertEqual(character.health, character.stats.max_health)
+
+    def test_api(self):
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "admin@fallout.rpg", "admin"))
+        url = reverse("fallout-api:character_spawn", args=(self.character.pk,))
+        response = self.client.post(url, dict(campaign=self.campaign.pk, count=3), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Character.objects.filter(campaign=self.campaign).count(), 3)
+
+
+class LootTestCase(TestCase):
+    """
+    Tests de la génération des butins
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.campaign = Campaign.objects.create(name="Campaign")
+        cls.weapon = Item.objects.create(name="Pistol", type=ITEM_WEAPON, clip_size=10)
+        cls.ammo = Item.objects.create(name="Bullets", type=ITEM_AMMO)
+        cls.stimpak = Item.objects.create(name="Stimpak", type=ITEM_CHEM)
+
+    def create_characters(self, count):
+        characters = []
+        for index in range(count):
+            character = Character.objects.create(name=f"Raider {index}", campaign=self.campaign, money=10)
+            Equipment.objects.create(character=character, item=self.weapon, slot=ITEM_WEAPON, clip_count=5)
+            Equipment.objects.create(character=character, item=self.ammo, slot=ITEM_AMMO, quantity=10)
+            Equipment.objects.create(character=character, item=self.stimpak, quantity=2)
+            characters.append(character)
+        return characters
+
+    def test_loot(self):
+        Loot.objects.create(campaign=self.campaign, item=self.stimpak, quantity=3)
+        character = self.create_characters(1)[0]
+        character.loot(empty=True)
+        self.assertEqual(Loot.objects.get(item=self.stimpak).quantity, 5)
+        self.assertEqual(Loot.objects.get(item=self.ammo).quantity, 15)
+        self.assertEqual(Loot.objects.get(item=self.weapon).condition, 1.0)
+        self.assertFalse(Equipment.objects.filter(character=character).exists())
+        self.assertEqual(Character.objects.get(pk=character.pk).money, 0)
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).money_loot, 10)
+
+    def test_loot_bulk(self):
+        Loot.objects.create(campaign=self.campaign, item=self.stimpak, quantity=1)
+        queries = []
+        for count in (1, 5):
+            characters = self.create_characters(count)
+            with CaptureQueriesContext(connection) as context:
+                Character.loot_bulk(characters)
+            queries.append(len(context.captured_queries))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Loot.objects.filter(item=self.stimpak).count(), 1)
+        self.assertEqual(Loot.objects.get(item=self.stimpak).quantity, 13)
+        self.assertEqual(Loot.objects.filter(item=self.weapon).count(), 6)
+
+    def test_template(self):
+        template = LootTemplate.objects.create(name="Template")
+        LootTemplateItem.objects.create(template=template, item=self.stimpak, min_quantity=2, max_quantity=2)
+        LootTemplateItem.objects.create(template=template, item=self.stimpak, min_quantity=1, max_quantity=1)
+        loots, money = template.create(self.campaign)
+        self.assertEqual(len(loots), 2)
+        self.assertEqual(Loot.objects.get(item=self.stimpak).quantity, 3)
+
+
+class HistoryArchiverTestCase(TestCase):
+    """
+    Tests de l'archivage des historiques
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.attacker = Character.objects.create(name="Attacker")
+        cls.defender = Character.objects.create(name="Defender")
+
+    def create_histories(self):
+        for index in range(6):
+            RollHistory.objects.create(
+                character=self.attacker, level=1 + index % 2, stats=SKILL_SMALL_GUNS, success=bool(index % 3)
+            )
+            damage = DamageHistory.objects.create(character=self.defender, real_damage=index)
+            FightHistory.objects.create(
+                attacker=self.attacker,
+                defender=self.defender,
+                attacker_level=1,
+                defender_level=2,
+                status=STATUS_HIT_SUCCEED,
+                success=True,
+                damage=damage,
+            )
+        DamageHistory.objects.create(character=self.attacker, real_damage=3)
+
+    def get_stats(self):
+        rolls = {stats.code: (stats.all, dict(stats.count_by_level)) for stats in RollHistory.get_stats(self.attacker)}
+        fights = [
+            (stats.all, stats.total_damage, dict(stats.count_by_level))
+            for character in (self.attacker, self.defender)
+            for stats in FightHistory.get_stats(character)
+        ]
+        return rolls, fights
+
+    def test_archive(self):
+        self.create_histories()
+        stats = self.get_stats()
+        with tempfile.TemporaryDirectory() as directory:
+            archiver = HistoryArchiver(date=now() + timedelta(days=1), directory=directory, batch_size=4)
+            counts = archiver.archive()
+            with gzip.open(archiver.filename, "rt") as stream:
+                self.assertEqual(len(stream.readlines()), 19)
+        self.assertEqual(counts, dict(rollhistory=6, fighthistory=6, damagehistory=7))
+        self.assertFalse(RollHistory.objects.exists() or FightHistory.objects.exists())
+        self.assertFalse(DamageHistory.objects.exists())
+        self.assertEqual(self.get_stats(), stats)
+        # Rollups are merged with the new histories and with the next archives
+        self.create_histories()
+        stats = self.get_stats()
+        HistoryArchiver(date=now() + timedelta(days=1)).archive()
+        self.assertEqual(self.get_stats(), stats)
+        self.assertEqual(RollHistoryRollup.objects.count(), 4)
+
+    def test_command(self):
+        self.create_histories()
+        call_command("archive", game_before=now() - timedelta(days=1), no_file=True, stdout=io.StringIO())
+        self.assertEqual(RollHistory.objects.count(), 6)
+        call_command("archive", days=0, no_file=True, stdout=io.StringIO())
+        self.assertFalse(RollHistory.objects.exists())
+
+
+class InventoryIndexTestCase(TestCase):
+    """
+    Tests de l'index de l'inventaire des personnages
+    """
+
+    def test_inventory_index(self):
+        character = Character.objects.create(name="Character")
+        helmet = Item.objects.create(name="Helmet", type=ITEM_HELMET)
+        other = Item.objects.create(name="Other helmet", type=ITEM_HELMET)
+        first = Equipment.objects.create(character=character, item=helmet)
+        second = Equipment.objects.create(character=character, item=other)
+        character = Character.objects.get(pk=character.pk)
+        self.assertIsNone(character.get_from_inventory(slot=ITEM_HELMET))
+        with self.assertNumQueries(0):
+            self.assertEqual(character.get_from_inventory(id=first.pk), first)
+            self.assertEqual(character.get_from_inventory(many=True, slot=""), [first, second])
+        equipment = character.get_from_inventory(id=first.pk)
+        equipment.equip()
+        self.assertEqual(character.get_from_inventory(slot=ITEM_HELMET), equipment)
+        character.get_from_inventory(id=second.pk).equip()
+        self.assertEqual(character.get_from_inventory(slot=ITEM_HELMET).pk, second.pk)
+        self.assertEqual(Equipment.objects.get(pk=first.pk).slot, "")
+        self.assertEqual(character.get_from_inventory(id=first.pk).slot, "")
+        character.get_from_inventory(id=second.pk).delete()
+        self.assertIsNone(character.get_from_inventory(slot=ITEM_HELMET))
+        self.assertIsNone(character.get_from_inventory(id=second.pk))
+
+
+class EffectSchedulerTestCase(TestCase):
+    """
+    Tests de l'application des effets arrivés à échéance
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.campaign = Campaign.objects.create(name="Campaign")
+        cls.character = Character.objects.create(name="Character", campaign=cls.campaign)
+        cls.poison = Effect.objects.create(
+            name="Poison",
+            damage_type=DAMAGE_NORMAL,
+            raw_damage=1,
+            interval=timedelta(hours=1),
+            min_duration=timedelta(hours=5),
+        )
+        CharacterEffect.objects.create(character=cls.character, effect=cls.poison)
+        for index in range(10):
+            effect = Effect.objects.create(
+                name=f"Idle {index}",
+                damage_type=DAMAGE_NORMAL,
+                raw_damage=1,
+                apply=False,
+                interval=timedelta(days=1),
+                min_duration=timedelta(days=30),
+            )
+            CharacterEffect.objects.create(character=cls.character, effect=effect)
+            CampaignEffect.objects.create(campaign=cls.campaign, effect=effect)
+
+    def test_due_effects(self):
+        scheduler = EffectScheduler(self.campaign)
+        scheduler.load_character_effects([self.character])
+        self.assertEqual(list(scheduler.pop(None)), [])
+        self.assertEqual([effect.effect for effect in scheduler.pop(self.character.pk)], [self.poison])
+
+    def test_next_turn(self):
+        campaign = Campaign.objects.get(pk=self.campaign.pk)
+        health = self.character.health
+        campaign.next_turn(seconds=3600)
+        self.assertLess(Character.objects.get(pk=self.character.pk).health, health)
+        next_date = CharacterEffect.objects.get(character=self.character, effect=self.poison).next_date
+        self.assertEqual(next_date, campaign.current_game_date + timedelta(hours=1))
+        self.assertEqual(DamageHistory.objects.get(character=self.character).ticks, 2)
+
+    def test_time_skip(self):
+        campaign = Campaign.objects.get(pk=self.campaign.pk)
+        campaign.next_turn(seconds=10 * 24 * 3600)
+        # Poison damage over its whole duration is aggregated in a single history
+        self.assertTrue(DamageHistory.objects.filter(character=self.character, ticks=6).exists())
+        self.assertFalse(CharacterEffect.objects.filter(effect=self.poison).exists())
+
+    def test_needs_bulk(self):
+        character = Character.objects.get(pk=self.character.pk)
+        Character.update_needs_bulk([character], hours=1.0, resting=False)
+        self.assertAlmostEqual(character.thirst, max(1, 20 - character.stats.endurance) * NEEDS_NORMAL_RATE)
+        modification_date = character.modification_date
+        self.assertEqual(Character.save_bulk([character]), 1)
+        self.assertAlmostEqual(Character.objects.get(pk=character.pk).thirst, character.thirst)
+        self.assertGreater(Character.objects.get(pk=character.pk).modification_date, modification_date)
+        self.assertEqual(character.modified, {})
+        character.experience = character.next_required_experience
+        self.assertEqual(Character.save_bulk([character]), 0)
+        self.assertEqual(Character.objects.get(pk=character.pk).level, 2)
+
+    def test_task(self):
+        from fallout.tasks import TaskProgress, advance_time
+
+        result = advance_time.apply((self.campaign.pk,), dict(seconds=10 * 24 * 3600, reset=True))
+        progress = TaskProgress(result.id).get()
+        self.assertEqual(progress["status"], TASK_DONE)
+        self.assertEqual((progress["current"], progress["total"]), (1, 1))
+        self.assertEqual(len(progress["messages"]), len(result.get()))
+        self.assertTrue(DamageHistory.objects.filter(pk__in=result.get(), ticks=6).exists())
+
+    def test_task_view(self):
+        from fallout.tasks import advance_time
+
+        result = advance_time.apply((self.campaign.pk,))
+        self.client.force_login(get_user_model().objects.create_user("player", "player@fallout.rpg", "player"))
+        url = reverse("fallout:task", args=(result.id,))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        session = self.client.session
+        session["tasks"] = [result.id]
+        session.save()
+        self.assertEqual(self.client.get(url).json()["status"], TASK_DONE)
+        self.assertEqual(self.client.session["tasks"], [])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class StatsCompilerTestCase(TestCase):
+    """
+    Tests d'équivalence entre l'évaluateur compilé et l'interprétation des formules
+    """
+
+    def test_compiled_races(self):
+        self.assertEqual(set(COMPILED_STATS), set(RACES_STATS))
+
+    def test_equivalence(self):
+        import random
+
+        generator = random.Random(42)
+        names = list(STATS_NAMES) + LIST_NEEDS
+        for index in range(200):
+            values = dict(
+                race=generator.choice(list(RACES_STATS) + ["unknown"]),
+                level=generator.randint(1, 30),
+                tag_skills=generator.sample(list(LIST_SKILLS), 3),
+                **{special: generator.randint(0, 12) for special in LIST_SPECIALS},
+                **{need: generator.randint(0, 1200) for need in LIST_NEEDS},
+            )
+            modifiers = {generator.choice(names): generator.randint(-15, 15) for count in range(5)}
+            campaign_modifiers = {generator.choice(names): generator.randint(-5, 5) for count in range(2)}
+            charge = generator.uniform(0, 400)
+            compiled_character, interpreted_character = Character(**values), Character(**values)
+            compiled = Stats.get(compiled_character, modifiers, campaign_modifiers, charge)
+            interpreted = Stats.get(interpreted_character, modifiers, campaign_modifiers, charge, compiled=False)
+            self.assertEqual(compiled, interpreted)
+            self.assertEqual(compiled.base, interpreted.base)
+            self.assertEqual(compiled.initial, interpreted.initial)
+            self.assertEqual(compiled.carry_effects, interpreted.carry_effects)
+            self.assertEqual(compiled.clamped, interpreted.clamped)
+            self.assertEqual(compiled.character_modifiers, interpreted.character_modifiers)
+            self.assertEqual(
+                {key: value for key, value in compiled.raw.items() if value},
+                {key: value for key, value in interpreted.raw.items() if value},
+            )
+
+
+class StatsCacheTestCase(TestCase):
+    """
+    Tests du cache des statistiques
+    """
+
+    def test_lru(self):
+        cache = StatsCache(size=2, prefix="test:lru")
+        for key in range(3):
+            cache.set(key, key)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(list(cache.local), [1, 2])
+
+    def test_invalidate(self):
+        cache, other = StatsCache(check=0, prefix="test:invalidate"), StatsCache(check=0, prefix="test:invalidate")
+        cache.set(1, "stats")
+        self.assertEqual(other.get(1), "stats")
+        other.invalidate(1)
+        self.assertIsNone(cache.get(1))
+        self.assertIsNone(other.get(1))
+
+    def test_invalidate_group(self):
+        cache, other = StatsCache(check=0, prefix="test:group"), StatsCache(check=0, prefix="test:group")
+        cache.set(1, "stats", group=1)
+        cache.set(2, "stats", group=2)
+        self.assertEqual(other.get(1, group=1), "stats")
+        other.invalidate_group(1)
+        self.assertIsNone(cache.get(1, group=1))
+        self.assertEqual(cache.get(2, group=2), "stats")
+
+    def test_check(self):
+        cache, other = StatsCache(check=60, prefix="test:check"), StatsCache(check=60, prefix="test:check")
+        cache.set(1, "stats", group=1)
+        cache.set(2, "stats", group=2)
+        other.invalidate(1)
+        with mock.patch.object(type(cache.cache), "get_many") as get_many:
+            self.assertEqual(cache.get(1, group=1), "stats")
+            self.assertEqual(cache.get(2, group=2), "stats")
+        get_many.assert_not_called()
+        # Invalidations made by the process itself are immediate
+        cache.invalidate(1)
+        cache.invalidate_group(2)
+        self.assertIsNone(cache.get(1, group=1))
+        self.assertIsNone(cache.get(2, group=2))
+
+
+class FightSimulationTestCase(TestCase):
+    """
+    Tests d'équivalence entre la simulation de combat et les combats réels
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.attacker = Character.objects.create(name="Attacker", agility=8, perception=7, luck=6)
+        cls.target = Character.objects.create(name="Target", endurance=6)
+        weapon = Item.objects.create(
+            name="Rifle",
+            type=ITEM_WEAPON,
+            skill=SKILL_SMALL_GUNS,
+            attack_mode=MODE_RANGED,
+            hands=2,
+            clip_size=30,
+            burst_count=6,
+            min_range=1,
+            max_range=20,
+            max_burst_range=10,
+            min_damage=4,
+            max_damage=12,
+            critical_damage=5,
+            durability=200,
+        )
+        ammo = Item.objects.create(name="Bullets", type=ITEM_AMMO, min_damage=1, max_damage=3, damage_modifier=10)
+        armor = Item.objects.create(
+            name="Armor", type=ITEM_ARMOR, normal_threshold=3, normal_resistance=20, durability=100
+        )
+        Equipment.objects.create(character=cls.attacker, item=weapon, slot=ITEM_WEAPON, clip_count=30, condition=0.9)
+        Equipment.objects.create(character=cls.attacker, item=ammo, slot=ITEM_AMMO, quantity=100)
+        Equipment.objects.create(character=cls.target, item=armor, slot=ITEM_ARMOR, condition=0.8)
+
+    def setUp(self):
+        self.attacker = Character.objects.get(pk=self.attacker.pk)
+        self.target = Character.objects.get(pk=self.target.pk)
+        self.weapon = self.attacker.get_from_inventory(slot=ITEM_WEAPON)
+
+    def test_fight(self):
+        for kwargs in (dict(target_range=3), dict(target_range=5, target_part=PART_HEAD), dict(target_range=25)):
+            simulation = FightSimulation(self.attacker, self.target, **kwargs)
+            rng = random.Random(kwargs["target_range"])
+            random.seed(kwargs["target_range"])
+            health, clip_count, condition = self.target.health, self.weapon.clip_count, self.weapon.condition
+            for _ in range(200):
+                history = self.attacker.fight(self.target, simulation=True, log=False, **kwargs)
+                state = simulation.get_state()
+                outcome = simulation.fight(rng, state)
+                self.assertEqual(
+                    outcome[:-2],
+                    (
+                        history.status,
+                        history.body_part,
+                        history.hit_chance,
+                        history.hit_roll,
+                        history.success,
+                        history.critical,
+                    ),
+                )
+                self.assertEqual(outcome.real_damage, getattr(history.damage, "real_damage", 0))
+                self.assertEqual(state["health"], self.target.health)
+                self.assertEqual(state["clip_count"], self.weapon.clip_count)
+                self.assertEqual(state["condition"], self.weapon.condition)
+                self.target.health, self.weapon.clip_count, self.weapon.condition = health, clip_count, condition
+
+    def test_burst(self):
+        simulation = FightSimulation(self.attacker, self.target, target_range=4, is_burst=True)
+        ammo = self.attacker.get_from_inventory(slot=ITEM_AMMO)
+        rng, health = random.Random(1), self.target.health
+        random.seed(1)
+        for _ in range(50):
+            ammo.quantity, self.weapon.clip_count, self.weapon.condition = 100, 30, 0.9
+            histories = self.attacker.burst([(self.target, 4)], simulation=True, log=False)
+            outcomes, state = simulation.trial(rng)
+            self.assertEqual(
+                [(outcome.status, outcome.hit_roll, outcome.real_damage) for outcome in outcomes],
+                [(item.status, item.hit_roll, getattr(item.damage, "real_damage", 0)) for item in histories],
+            )
+            self.assertEqual(state["health"], self.target.health)
+            self.assertEqual(state["ammo_quantity"], ammo.quantity)
+            self.assertAlmostEqual(state["condition"], self.weapon.condition)
+            self.target.health = health
+
+    def test_run(self):
+        results = FightSimulation(self.attacker, self.target, target_range=3).run(20000, seed=1)
+        self.assertEqual(results["count"], 20000)
+        self.assertEqual(results["shots"], 1)
+        self.assertTrue(0 < results["hit_chance"] < 1)
+        self.assertLessEqual(results["damage_percentiles"][5], results["damage_percentiles"][95])
+        self.assertEqual(results, FightSimulation(self.attacker, self.target, target_range=3).run(20000, seed=1))
+        results = FightSimulation(self.attacker, self.target, target_range=3, force_success=True).run(1000)
+        self.assertEqual(results["hit_chance"], 1)
+        results = FightSimulation(self.attacker, self.target, target_range=25).run(1000)
+        self.assertEqual(results["hit_chance"], 0)
+
+    def test_kernel(self):
+        attacker, target = self.attacker.get_snapshot(), self.target.get_snapshot()
+        weapon, ammo = attacker.get_weapon()
+        target.health = 1000
+        with self.assertNumQueries(0):
+            results = [
+                resolve_fight(attacker, target, weapon, ammo, target_range=3, force_success=True, rng=random.Random(i))
+                for i in range(20)
+            ]
+        self.assertEqual(weapon.clip_count, self.weapon.clip_count - 20)
+        self.assertAlmostEqual(weapon.condition, self.weapon.condition - sum(result.condition for result in results))
+        self.assertEqual(target.health, 1000 + sum(result.damage.changes.get("health", 0) for result in results))
+        self.assertNotEqual(self.target.get_snapshot().health, target.health)
+
+    def test_persistence(self):
+        random.seed(1)
+        health, clip_count = self.target.health, self.weapon.clip_count
+        history = self.attacker.fight(self.target, target_range=3, force_success=True)
+        self.assertTrue(history.pk and history.damage.pk)
+        self.assertEqual(FightHistory.objects.get(pk=history.pk).damage_id, history.damage.pk)
+        self.assertEqual(DamageHistory.objects.count(), 1)
+        self.assertEqual(Character.objects.get(pk=self.target.pk).health, health - history.damage.real_damage)
+        self.assertEqual(Equipment.objects.get(pk=self.weapon.pk).clip_count, clip_count - 1)
+
+    def test_damage_ko(self):
+        self.target.health = 0
+        history = self.target.damage(raw_damage=5)
+        self.assertIsNone(history.pk)
+        self.assertEqual(history.real_damage, 0)
+        self.assertFalse(DamageHistory.objects.exists())
+
+    def test_burst_persistence(self):
+        other = Character.objects.create(name="Other")
+        self.weapon.item.burst_count, self.weapon.clip_count = 40, 40
+        self.target.health = other.health = 10000
+        for character in (self.attacker, self.target, other):
+            character.get_snapshot()
+        with CaptureQueriesContext(connection) as queries, StatsUnitOfWork():
+            histories = self.attacker.burst([(self.target, 2), (other, 3)], is_action=False)
+        self.assertEqual(len(histories), 40)
+        self.assertLess(len(queries), 15)
+        self.assertEqual(FightHistory.objects.count(), 40)
+        self.assertEqual(DamageHistory.objects.count(), sum(history.success for history in histories))
+        self.assertEqual(Equipment.objects.get(pk=self.weapon.pk).clip_count, 0)
+
+    def test_targets(self):
+        def resolve(targets):
+            with CaptureQueriesContext(connection) as queries:
+                characters = Character.get_targets(target.pk for target in targets)
+                for character in characters.values():
+                    character.get_snapshot()
+                    list(character.effects)
+            return characters, len(queries)
+
+        others = [Character.objects.create(name=f"Other {index}", endurance=5) for index in range(4)]
+        for other in others:
+            Equipment.objects.create(character=other, item=self.weapon.item, slot=ITEM_WEAPON, clip_count=10)
+        characters, few_queries = resolve([self.target])
+        self.assertEqual(characters[self.target.pk].get_snapshot().get_equipment(ITEM_ARMOR).condition, 0.8)
+        characters, many_queries = resolve([self.target, *others])
+        self.assertEqual(len(characters), 5)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_odds(self):
+        odds = FightOdds(self.attacker, self.target)
+        for kwargs in (dict(target_range=3), dict(target_range=5, target_part=PART_HEAD), dict(target_range=25)):
+            result = odds.get_odds(**kwargs)
+            results = FightSimulation(self.attacker, self.target, **kwargs).run(50000, seed=1)
+            self.assertAlmostEqual(sum(result["damages"].values()), 1)
+            self.assertAlmostEqual(result["hit_chance"], results["hit_chance"], delta=0.01)
+            self.assertAlmostEqual(result["critical_fail_chance"], results["critical_fail_chance"], delta=0.01)
+            self.assertAlmostEqual(result["damage"], results["damage"], delta=0.05 * max(results["damage"], 1))
+        self.assertEqual(odds.get_odds(target_range=25, target_part=PART_TORSO)["damages"], {0: 1.0})
+        with self.assertNumQueries(0):
+            matrix = odds.get_matrix(range(1, 21))
+        self.assertEqual(len(matrix), 20)
+        self.assertEqual(set(matrix[1]), {"", *LIST_BODY_PARTS})
+
+    def test_encounter(self):
+        raiders = [Character.objects.create(name=f"Raider {index}", endurance=4) for index in range(3)]
+        simulation = EncounterSimulation([self.attacker], raiders, target_range=3, max_rounds=20)
+        with self.assertNumQueries(0):
+            results = simulation.run(600, seed=1, workers=1)
+        self.assertEqual(results["count"], 600)
+        self.assertAlmostEqual(
+            results["attackers"]["win_chance"] + results["defenders"]["win_chance"] + results["draw_chance"], 1
+        )
+        self.assertTrue(1 <= results["rounds"] <= 20)
+        self.assertLessEqual(results["defenders"]["casualties"], 3)
+        self.assertGreater(results["attackers"]["ammo"], 0)
+        self.assertEqual(set(results["defenders"]["characters"]), {raider.pk for raider in raiders})
+        self.assertEqual(results, simulation.run(600, seed=1, workers=2))
+        with self.assertRaises(Exception):
+            EncounterSimulation([self.attacker, raiders[0]], raiders)
+
+    def test_encounter_api(self):
+        campaign = Campaign.objects.create(name="Campaign")
+        raider = Character.objects.create(name="Raider", campaign=campaign)
+        Character.objects.filter(pk=self.attacker.pk).update(campaign=campaign)
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "admin@fallout.rpg", "admin"))
+        url = reverse("fallout-api:campaign_encounter", args=(campaign.pk,))
+        data = dict(attackers=[self.attacker.pk], defenders=[raider.pk], count=50, seed=1)
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 50)
+        for values in (
+            dict(defenders=[raider.pk, self.attacker.pk]),
+            dict(count=ENCOUNTER_API_MAX_COUNT + 1),
+            dict(max_rounds=ENCOUNTER_MAX_ROUNDS + 1),
+        ):
+            response = self.client.post(url, dict(data, **values), content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+        simulation = EncounterSimulation([self.attacker], [raider], max_rounds=1000)
+        self.assertEqual(simulation.max_rounds, ENCOUNTER_MAX_ROUNDS)
+
+    def test_view(self):
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "admin@fallout.rpg", "admin"))
+        data = dict(character=self.attacker.pk, target=self.target.pk, type="fight", target_range=3, count=500)
+        response = self.client.post(reverse("fallout:simulation"), data).json()
+        self.assertEqual(response["count"], 500)
+        self.assertIn("kill_chance", response)
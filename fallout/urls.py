@@ -41,6 +41,11 @@ urlpatterns = [
         views.next_turn,
         name="next_turn",
     ),
+    path(
+        "task/<str:task_id>/",
+        views.task,
+        name="task",
+    ),
     path(
         "simulation/",
         views.simulation,
@@ -1,5 +1,6 @@
 # coding: utf-8
 from common.utils import ajax_request, render_to, to_object
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
@@ -10,9 +11,52 @@ from django.shortcuts import redirect
 from django.utils.translation import gettext as _
 from rest_framework.authtoken.models import Token
 
+from fallout.constants import *  # noqa
 from fallout.enums import *  # noqa
 from fallout.models import *  # noqa
 from fallout.forms import QuickCreateCharacterForm
+from fallout.simulation import FightOdds, FightSimulation
+from fallout.tasks import TaskProgress, advance_time, apply_effect, damage_characters
+
+
+def add_task_messages(request, task_id):
+    """
+    Ajoute les messages d'une tâche de fond terminée à la requête
+    :param request: Requête
+    :param task_id: Identifiant de la tâche
+    :return: Avancement de la tâche (ou rien si elle est inconnue)
+    """
+    progress = TaskProgress(task_id)
+    result = progress.get()
+    if result and result["status"] == TASK_DONE:
+        for level, message in result["messages"]:
+            messages.add_message(request, level, message)
+    elif result and result["status"] == TASK_FAILED:
+        messages.error(request, _("<strong>Erreur</strong> {error}").format(error=result["error"]))
+    progress.delete()
+    tasks = request.session.get("tasks", [])
+    if task_id in tasks:
+        tasks.remove(task_id)
+        request.session["tasks"] = tasks
+    return result
+
+
+def run_task(request, task, *args, **kwargs):
+    """
+    Exécute une tâche de fond (en arrière-plan si Celery est activé, immédiatement sinon)
+    :param request: Requête
+    :param task: Tâche
+    :return: Résultat asynchrone de la tâche
+    """
+    if settings.CELERY_ENABLE:
+        result = task.apply_async(args, kwargs)
+    else:
+        result = task.apply(args, kwargs)
+    if result.ready():
+        add_task_messages(request, result.id)
+    else:
+        request.session["tasks"] = request.session.get("tasks", []) + [result.id]
+    return result
 
 
 @login_required
@@ -43,6 +87,7 @@ def view_token(request, token):
 
 @login_required
 @render_to("fallout/campaign/dashboard.html")
+@StatsUnitOfWork()
 def view_dashboard(request, campaign_id):
     """
     Vue générale
@@ -107,7 +152,7 @@ def view_dashboard(request, campaign_id):
         "authorized": authorized,
         # Lists
         "campaigns": campaigns.distinct().order_by("name", "title"),
-        "characters": characters.order_by("-is_player", "name", "title"),
+        "characters": characters.order_by("-is_player", "name", "title").with_stats(),
         # Campaign
         "campaign": campaign,
     }
@@ -115,6 +160,7 @@ def view_dashboard(request, campaign_id):
 
 @login_required
 @render_to("fallout/campaign/campaign.html")
+@StatsUnitOfWork()
 def view_campaign(request, campaign_id):
     """
     Vue principale des campagnes
@@ -224,30 +270,23 @@ def view_campaign(request, campaign_id):
                     int(data.get("raw_damage")),
                 )
                 filter = dict(is_player=(group == "pj")) if group else dict()
-                for character in characters.filter(is_active=True, **filter):
-                    result = character.damage(raw_damage, min_damage, max_damage, damage_type, body_part)
-                    messages.add_message(
-                        request,
-                        result.message_level,
-                        _("<strong>{pre_label}</strong> {label}").format(
-                            pre_label=result.pre_label,
-                            label=result.label,
-                        ),
-                    )
+                character_ids = list(characters.filter(is_active=True, **filter).values_list("id", flat=True))
+                run_task(
+                    request,
+                    damage_characters,
+                    character_ids,
+                    raw_damage=raw_damage,
+                    min_damage=min_damage,
+                    max_damage=max_damage,
+                    damage_type=damage_type,
+                    body_part=body_part,
+                )
             elif type == "effect":
                 effect_id, effect_name = data.get("effect-id"), data.get("effect-name")
                 if method == "add":
                     filter = dict(pk=effect_id) if effect_id else dict(name__icontains=effect_name)
-                    effect = Effect.objects.filter(**filter).first().affect(campaign, force=True)
-                    for damage in getattr(effect, "damages", []):
-                        messages.add_message(
-                            request,
-                            damage.message_level,
-                            _("<strong>{pre_label}</strong> {label}").format(
-                                pre_label=damage.pre_label,
-                                label=damage.label,
-                            ),
-                        )
+                    effect = Effect.objects.filter(**filter).first()
+                    run_task(request, apply_effect, effect.pk, campaign_id=campaign.pk)
                 elif method == "remove":
                     scope = data.get("scope")
                     if scope == "character":
@@ -281,20 +320,14 @@ def view_campaign(request, campaign_id):
                         int(data.get("minutes") or 0),
                         "resting" in data,
                     )
-                    character, damages = campaign.next_turn(
+                    run_task(
+                        request,
+                        advance_time,
+                        campaign.pk,
                         seconds=hours * 3600 + minutes * 60,
                         resting=resting,
                         reset=True,
                     )
-                    for damage in damages:
-                        messages.add_message(
-                            request,
-                            damage.message_level,
-                            _("<strong>{pre_label}</strong> {label}").format(
-                                pre_label=damage.pre_label,
-                                label=damage.label,
-                            ),
-                        )
             elif type == "roll":
                 group, stats, modifier, xp = (
                     data.get("group"),
@@ -382,7 +415,7 @@ def view_campaign(request, campaign_id):
         "authorized": authorized,
         # Lists
         "campaigns": campaigns.distinct().order_by("name", "title"),
-        "characters": characters.order_by("-is_player", "name", "title"),
+        "characters": characters.order_by("-is_player", "name", "title").with_stats(),
         # Campaign
         "campaign": campaign,
         "loots": loots,
@@ -400,6 +433,7 @@ def view_campaign(request, campaign_id):
 
 @login_required
 @render_to("fallout/character/character.html")
+@StatsUnitOfWork()
 def view_character(request, character_id):
     """
     Vue principale des personnages
@@ -731,6 +765,7 @@ def view_character(request, character_id):
     }
 
 
+@StatsUnitOfWork()
 def next_turn(request, campaign_id):
     """
     Action pour passer au tour suivant
@@ -743,12 +778,13 @@ def next_turn(request, campaign_id):
         if "cancel" in data:
             campaign.clear_turn()
             return redirect(data.get("page"))
-        # Prochain tour ou passer le temps
+        # Passer le temps (en tâche de fond)
+        elif "time" in data:
+            run_task(request, advance_time, campaign.pk, seconds=int(data.get("seconds") or 0), reset=True)
+            return redirect(data.get("page"))
+        # Prochain tour
         else:
-            next_character, damages = campaign.next_turn(
-                seconds=int(data.get("seconds") or 0),
-                reset="time" in data,
-            )
+            next_character, damages = campaign.next_turn(seconds=int(data.get("seconds") or 0))
             for damage in damages:
                 messages.add_message(
                     request,
@@ -761,6 +797,23 @@ def next_turn(request, campaign_id):
     return redirect("fallout:campaign", campaign_id)
 
 
+@login_required
+@ajax_request
+def task(request, task_id):
+    """
+    Retourne l'avancement d'une tâche de fond (seulement pour les tâches lancées par l'utilisateur)
+    """
+    if task_id not in request.session.get("tasks", []):
+        raise Http404()
+    result = TaskProgress(task_id).get()
+    if not result or result["status"] in (TASK_DONE, TASK_FAILED):
+        # Les messages de la tâche terminée seront affichés au rechargement de la page
+        status = result["status"] if result else TASK_DONE
+        add_task_messages(request, task_id)
+        return dict(status=status, current=0, total=0)
+    return dict(status=result["status"], current=result["current"], total=result["total"])
+
+
 @login_required
 @render_to("fallout/thumbnails.html")
 def thumbnails(request):
@@ -797,6 +850,7 @@ def thumbnails(request):
 
 @login_required
 @ajax_request
+@StatsUnitOfWork()
 def simulation(request):
     """
     Réalise une simulation de combat
@@ -805,15 +859,37 @@ def simulation(request):
         try:
             data = request.POST
             attacker = Character.objects.select_related("statistics").get(pk=data.get("character"))
+            count = int(data.get("count") or 0)
             if data.get("type") == "burst":
                 targets = list(zip(data.getlist("targets") or [], data.getlist("ranges") or []))
                 data = data.dict()
-                data.pop("character"), data.pop("targets"), data.pop("ranges")
+                data.pop("character"), data.pop("targets"), data.pop("ranges"), data.pop("count", None)
+                # Monte Carlo simulation on a single target
+                if count > 1 and len(targets) == 1:
+                    target, target_range = targets[0]
+                    target = Character.objects.select_related("statistics").get(pk=target)
+                    simulation = FightSimulation(attacker, target, target_range=target_range, is_burst=True, **data)
+                    return simulation.run(count)
                 results = attacker.burst(**data, targets=targets, simulation=True)
                 return [result.to_dict(extra=("description",)) for result in results]
+            elif data.get("type") == "odds":
+                # Exact odds of a single hit for each range and body part
+                target = Character.objects.select_related("statistics").get(pk=data.get("target"))
+                odds = FightOdds(
+                    attacker,
+                    target,
+                    weapon_type=data.get("weapon_type") or WEAPON_TYPE_PRIMARY,
+                    hit_chance_modifier=int(data.get("hit_chance_modifier") or 0),
+                )
+                max_range = min(int(data.get("max_range") or ODDS_MAX_RANGE), ODDS_MAX_RANGE)
+                return odds.get_matrix(range(1, max_range + 1))
             elif data.get("target"):
                 data = data.dict()
-                data.pop("character")
+                data.pop("character"), data.pop("count", None)
+                # Monte Carlo simulation
+                if count > 1:
+                    target = Character.objects.select_related("statistics").get(pk=data.pop("target"))
+                    return FightSimulation(attacker, target, **data).run(count)
                 result = attacker.fight(**data, simulation=True)
                 result_data = result.to_dict(extra=("description",))
                 result_data["fail"] = result.fail.to_dict(extra=("description",)) if result.fail else None
@@ -903,6 +979,7 @@ def items(request):
 
 @login_required
 @render_to("fallout/character.html")
+@StatsUnitOfWork()
 def create_character(request, campaign_id=None):
     campaign = Campaign.objects.filter(id=campaign_id).first()
     if campaign_id and not campaign:
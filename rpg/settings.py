@@ -155,6 +155,15 @@ class Base(Configuration):
     CORS_ORIGIN_ALLOW_ALL = values.BooleanValue(True)
     APPEND_SLASH = values.BooleanValue(True)
 
+    # Histories archive directory
+    HISTORY_ARCHIVE_ROOT = values.Value(os.path.join(BASE_DIR, "archives"))
+
+    # Stats cache
+    STATS_CACHE_ALIAS = values.Value("default")
+    STATS_CACHE_SIZE = values.IntegerValue(1000)
+    STATS_CACHE_TIMEOUT = values.IntegerValue(3600)
+    STATS_CACHE_CHECK = values.FloatValue(2.0)
+
     # Django REST Framework configuration
     REST_FRAMEWORK = {
         "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
@@ -377,6 +386,12 @@ class Prod(Base):
     CELERY_TASK_ALWAYS_EAGER = values.BooleanValue(False, environ_name="CELERY_TASK_ALWAYS_EAGER")
     CELERY_TASK_EAGER_PROPAGATES = False
     CELERY_TASK_DEFAULT_QUEUE = values.Value("celery", environ_name="QUEUE_NAME")
+    CELERY_BEAT_SCHEDULE = {
+        "archive-histories": {
+            "task": "fallout.archive_histories",
+            "schedule": 24 * 3600,
+        },
+    }
 
 
 class Test(Base):